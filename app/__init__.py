@@ -1,11 +1,26 @@
 from flask import Flask
 from flask_sqlalchemy import SQLAlchemy
 from flask_migrate import Migrate
-import logging
 from app.config.config import config
 from app.models.models import db
+from app.services.database import engine_options, configure_engine
+from app.services.log_pipeline import log_pipeline
+from app.services.tracing import tracer
+from app.services.http_client import http_client
+from app.services.phone_numbers import phone_normalizer
 from app.services.sms_service import sms_service
 from app.services.ai_service import ai_service
+from app.services.response_cache import response_cache
+from app.services.prompt_builder import prompt_builder
+from app.services.job_queue import job_queue
+from app.services.conversation_cache import conversation_cache
+from app.services.session_store import session_store
+from app.services.user_lookup import user_lookup
+from app.services.inbound_dedup import inbound_dedup
+from app.services.campaign_service import campaign_service
+from app.services.delivery_reports import delivery_reports
+from app.services.retention import message_archiver
+from app.services.traffic_capture import traffic_capture
 
 def create_app(config_name='default'):
     """Create and configure the Flask application."""
@@ -16,31 +31,61 @@ def create_app(config_name='default'):
     config[config_name].init_app(app)
     
     # Initialize logging
-    logging.basicConfig(
-        level=logging.INFO,
-        format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
-    )
+    with app.app_context():
+        log_pipeline.initialize()
+        tracer.initialize()
+    log_pipeline.register(app)
+    tracer.register(app)
     
     # Initialize database
+    app.config.setdefault('SQLALCHEMY_ENGINE_OPTIONS', engine_options(app.config))
     db.init_app(app)
+    with app.app_context():
+        configure_engine(db.engine, app.config)
     migrate = Migrate(app, db)
     
     # Initialize services
     with app.app_context():
+        http_client.initialize()
+        phone_normalizer.initialize()
         sms_service.initialize()
+        response_cache.initialize()
+        prompt_builder.initialize()
         ai_service.initialize()
+        job_queue.initialize()
+        conversation_cache.initialize()
+        user_lookup.initialize()
+        inbound_dedup.initialize()
+        campaign_service.initialize()
+        delivery_reports.initialize()
+        session_store.initialize()
+        message_archiver.initialize()
+        traffic_capture.initialize()
     
     # Register blueprints
     from app.routes.sms_routes import sms_bp
     from app.routes.web_routes import web_bp
     from app.routes.health_routes import health_bp
+    from app.routes.campaign_routes import campaign_bp
     
     app.register_blueprint(sms_bp)
     app.register_blueprint(web_bp)
     app.register_blueprint(health_bp)
+    app.register_blueprint(campaign_bp)
+    
+    # Register CLI commands
+    from app.commands import register_commands
+    register_commands(app)
     
     # Create database tables
     with app.app_context():
         db.create_all()
     
+    # Start background threads lazily so each (forked) server process runs its own
+    @app.before_request
+    def start_background_workers():
+        job_queue.start(app)
+        session_store.start(app)
+        delivery_reports.start(app)
+    
     return app 
\ No newline at end of file
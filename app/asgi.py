@@ -0,0 +1,176 @@
+import asyncio
+import json
+import logging
+import time
+from urllib.parse import parse_qsl
+from asgiref.wsgi import WsgiToAsgi
+from app.services.ai_service import ai_service
+from app.services.inbound_sms import save_inbound_sms
+from app.services.job_queue import job_queue
+from app.services.session_store import session_store
+from app.services.delivery_reports import delivery_reports
+from app.services.log_pipeline import log_payload, log_request
+from app.services.metrics import metrics
+from app.services.traffic_capture import traffic_capture
+from app.routes.web_routes import add_session_message
+
+class AsyncGateway:
+    """ASGI application serving the AI-bound endpoints natively on asyncio.
+
+    `/api/chat` awaits Gemini on the event loop and `/sms_callback` replies are
+    processed by the job queue's asyncio consumer, so one process can hold
+    hundreds of Gemini calls in flight. Every other route is passed through to
+    the Flask app.
+    """
+
+    def __init__(self, flask_app):
+        self.flask_app = flask_app
+        self.wsgi = WsgiToAsgi(flask_app)
+        # (method, path) -> (handler, metrics stage)
+        self.routes = {
+            ('POST', '/api/chat'): (self.api_chat, 'chat'),
+            ('POST', '/sms_callback'): (self.sms_callback, 'webhook')
+        }
+        self.consumer = None
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] == 'lifespan':
+            return await self.lifespan(receive, send)
+
+        if scope['type'] == 'http':
+            route = self.routes.get((scope['method'], scope['path']))
+            if route:
+                handler, stage = route
+                return await self._handle(handler, stage, scope, receive, send)
+
+        await self.wsgi(scope, receive, send)
+
+    async def _handle(self, handler, stage, scope, receive, send):
+        """Run a native route, logging one request line as the Flask routes do."""
+        started = time.perf_counter()
+        fields = {}  # Extra fields for the request line, filled in by the handler
+        status = []
+
+        async def send_and_record(message):
+            if message['type'] == 'http.response.start':
+                status.append(message['status'])
+            await send(message)
+
+        try:
+            with metrics.time(stage):
+                await handler(scope, receive, send_and_record, fields)
+        finally:
+            log_request(scope['method'], scope['path'], status[0] if status else 500, started, fields)
+
+    async def lifespan(self, receive, send):
+        while True:
+            message = await receive()
+            if message['type'] == 'lifespan.startup':
+                # Flask's before_request hook is never reached by the native
+                # routes, so every background worker is started here
+                job_queue.async_mode = True
+                self.consumer = asyncio.create_task(job_queue.run_async(self.flask_app))
+                session_store.start(self.flask_app)
+                delivery_reports.start(self.flask_app)
+                await send({'type': 'lifespan.startup.complete'})
+            elif message['type'] == 'lifespan.shutdown':
+                job_queue.stop()
+                if self.consumer:
+                    await self.consumer
+                session_store.stop()
+                # Write delivery reports still buffered before the process exits
+                await asyncio.to_thread(delivery_reports.stop)
+                await send({'type': 'lifespan.shutdown.complete'})
+                return
+
+    async def api_chat(self, scope, receive, send, log_fields):
+        """Async version of the Flask `/api/chat` view."""
+        try:
+            try:
+                data = json.loads(await self._read_body(receive) or b'null')
+            except ValueError:
+                data = None
+
+            if not isinstance(data, dict) or 'message' not in data or 'session_id' not in data:
+                return await self._json(send, 400, {'success': False, 'error': 'Invalid request'})
+
+            message_text = data['message'].strip()
+            session_id = data['session_id']
+
+            if not message_text:
+                return await self._json(send, 400, {'success': False, 'error': 'Empty message'})
+
+            log_fields.update(session=session_id, chars=len(message_text))
+            log_payload("Web chat message session=%s text=%r", session_id, message_text)
+
+            conversation_history = await self._add_session_message(session_id, 'user', message_text)
+            ai_response = await ai_service.generate_response_async(
+                message_text,
+                conversation_history,
+                use_cache=not data.get('no_cache', False)
+            )
+            await self._add_session_message(session_id, 'ai', ai_response)
+
+            log_fields['response_chars'] = len(ai_response)
+            log_payload("Web chat response session=%s text=%r", session_id, ai_response)
+
+            await self._json(send, 200, {
+                'success': True,
+                'response': ai_response,
+                'session_id': session_id
+            })
+
+        except Exception as e:
+            logging.error(f"Error in web chat API: {e}")
+            await self._json(send, 500, {'success': False, 'error': 'Internal server error'})
+
+    async def sms_callback(self, scope, receive, send, log_fields):
+        """Async version of the Flask `/sms_callback` view."""
+        form = dict(parse_qsl((await self._read_body(receive)).decode('utf-8')))
+        log_payload("SMS callback form=%s", form)
+        traffic_capture.record(form)
+
+        sender_phone = form.get('from')
+        message_text = form.get('text', '').strip()
+        log_fields.update(sender=sender_phone, to=form.get('to'), link_id=form.get('linkId'), chars=len(message_text))
+
+        if not sender_phone or not message_text:
+            logging.error("Missing sender phone or message text")
+            return await self._respond(send, 400, b'Bad Request', 'text/plain')
+
+        with self.flask_app.app_context():
+            if not await asyncio.to_thread(save_inbound_sms, sender_phone, message_text, form.get('linkId'), form.get('id')):
+                log_fields['duplicate'] = 1
+
+        # Always return 200 OK to Africa's Talking
+        await self._respond(send, 200, b'OK', 'text/plain')
+
+    async def _add_session_message(self, session_id, sender, text):
+        with self.flask_app.app_context():
+            return await asyncio.to_thread(add_session_message, session_id, sender, text)
+
+    async def _read_body(self, receive):
+        body = b''
+        while True:
+            message = await receive()
+            body += message.get('body', b'')
+            if not message.get('more_body'):
+                return body
+
+    async def _json(self, send, status, data):
+        await self._respond(send, status, json.dumps(data).encode('utf-8'), 'application/json')
+
+    async def _respond(self, send, status, body, content_type):
+        await send({
+            'type': 'http.response.start',
+            'status': status,
+            'headers': [
+                (b'content-type', content_type.encode('latin-1')),
+                (b'content-length', str(len(body)).encode('latin-1'))
+            ]
+        })
+        await send({'type': 'http.response.body', 'body': body})
+
+def create_asgi_app(flask_app):
+    """Wrap a Flask app created by `create_app` for serving under an ASGI server."""
+    return AsyncGateway(flask_app)
@@ -0,0 +1,31 @@
+import click
+from app.models.models import db, User, Message
+from app.services.retention import message_archiver
+from app.services.traffic_capture import traffic_capture
+
+def register_commands(app):
+    """Register the application's `flask` CLI commands."""
+
+    @app.cli.command('archive-messages')
+    @click.option('--older-than', type=int, default=None, help='Age in days (default MESSAGE_RETENTION_DAYS)')
+    @click.option('--batch-size', type=int, default=None, help='Messages per transaction (default ARCHIVE_BATCH_SIZE)')
+    @click.option('--max-batches', type=int, default=None, help='Stop after this many batches')
+    def archive_messages(older_than, batch_size, max_batches):
+        """Move old messages to the archive table."""
+        moved = message_archiver.archive(older_than, batch_size, max_batches)
+        click.echo(f"Archived {moved} messages")
+
+    @app.cli.command('export-traffic')
+    @click.argument('output', type=click.File('w', encoding='utf-8'))
+    @click.option('--since', type=click.DateTime(), default=None, help='Only messages received after this (UTC)')
+    @click.option('--limit', type=int, default=None, help='Most messages to export')
+    def export_traffic(output, since, limit):
+        """Write stored inbound SMS as a capture file for benchmarks.replay."""
+        query = db.session.query(User.phone_number, Message.text, Message.link_id, Message.timestamp) \
+            .join(User, User.id == Message.user_id) \
+            .filter(Message.sender_type == 'user', Message.link_id.isnot(None), Message.timestamp.isnot(None))
+        if since is not None:
+            query = query.filter(Message.timestamp >= since)
+        query = query.order_by(Message.timestamp, Message.id).limit(limit)
+        exported = traffic_capture.export_messages(output, query.yield_per(1000))
+        click.echo(f"Exported {exported} messages")
@@ -9,19 +9,114 @@ class Config:
     SECRET_KEY = os.getenv('SECRET_KEY', 'your-secret-key-here')
     DEBUG = os.getenv('FLASK_DEBUG', 'True').lower() == 'true'
     
+    # Logging
+    LOG_LEVEL = os.getenv('LOG_LEVEL', 'INFO')
+    LOG_ASYNC = os.getenv('LOG_ASYNC', 'True').lower() == 'true'  # Write logs from a background thread
+    LOG_PAYLOAD_LEVEL = os.getenv('LOG_PAYLOAD_LEVEL', 'DEBUG')  # Set to INFO or higher to drop payload logs
+    LOG_PAYLOAD_SAMPLE_RATE = float(os.getenv('LOG_PAYLOAD_SAMPLE_RATE', '0.01'))  # Fraction of raw payloads logged
+    
+    # Request tracing and profiling
+    SERVER_TIMING_ENABLED = os.getenv('SERVER_TIMING_ENABLED', 'True').lower() == 'true'  # Send span timings in a Server-Timing header
+    SLOW_REQUEST_MS = int(os.getenv('SLOW_REQUEST_MS', '1000'))  # Log a span breakdown for slower requests, 0 disables
+    PROFILE_SAMPLE_RATE = float(os.getenv('PROFILE_SAMPLE_RATE', '0'))  # Fraction of requests run under cProfile
+    PROFILE_DIR = os.getenv('PROFILE_DIR')  # Defaults to instance/profiles
+    
     # Database settings
     SQLALCHEMY_DATABASE_URI = os.getenv('DATABASE_URL', 'sqlite:///sms_learning.db')
     SQLALCHEMY_TRACK_MODIFICATIONS = False
     
+    # SQLite profile, applied to every connection
+    SQLITE_JOURNAL_MODE = os.getenv('SQLITE_JOURNAL_MODE', 'WAL')  # WAL lets readers run alongside the writer
+    SQLITE_SYNCHRONOUS = os.getenv('SQLITE_SYNCHRONOUS', 'NORMAL')  # NORMAL is durable across crashes in WAL mode, FULL also across power loss
+    SQLITE_BUSY_TIMEOUT = int(os.getenv('SQLITE_BUSY_TIMEOUT', '5000'))  # ms a writer waits for the lock
+    SQLITE_MMAP_SIZE = int(os.getenv('SQLITE_MMAP_SIZE', str(256 * 1024 * 1024)))  # bytes, 0 disables
+    SQLITE_CACHE_SIZE = int(os.getenv('SQLITE_CACHE_SIZE', '-20000'))  # Page cache; negative is KiB
+    
+    # Connection pool for server databases (PostgreSQL)
+    DB_POOL_SIZE = int(os.getenv('DB_POOL_SIZE', '10'))  # Connections kept open per process
+    DB_MAX_OVERFLOW = int(os.getenv('DB_MAX_OVERFLOW', '20'))  # Extra connections under load
+    DB_POOL_TIMEOUT = float(os.getenv('DB_POOL_TIMEOUT', '30'))  # seconds to wait for a connection
+    DB_POOL_RECYCLE = int(os.getenv('DB_POOL_RECYCLE', '1800'))  # seconds before a connection is replaced
+    DB_POOL_PRE_PING = os.getenv('DB_POOL_PRE_PING', 'True').lower() == 'true'  # Check connections before use
+    
     # Africa's Talking settings
     AT_USERNAME = os.getenv('AT_USERNAME')
     AT_API_KEY = os.getenv('AT_API_KEY')
+    AT_BULK_CHUNK_SIZE = int(os.getenv('AT_BULK_CHUNK_SIZE', '500'))  # Recipients per bulk request
+    DEFAULT_COUNTRY_CODE = os.getenv('DEFAULT_COUNTRY_CODE', '254')  # Assumed for numbers without a country code
+    PHONE_CACHE_SIZE = int(os.getenv('PHONE_CACHE_SIZE', '65536'))  # Normalized numbers memoized per process
+    CAMPAIGN_TPS = float(os.getenv('CAMPAIGN_TPS', '50'))  # Default campaign recipients per second
+    CAMPAIGN_CHUNK_SIZE = int(os.getenv('CAMPAIGN_CHUNK_SIZE', '500'))  # Default users read and sent per chunk
+    DELIVERY_REPORT_FLUSH_INTERVAL = int(os.getenv('DELIVERY_REPORT_FLUSH_INTERVAL', '500'))  # ms between batched status updates, 0 disables
+    DELIVERY_REPORT_MAX_BATCH = int(os.getenv('DELIVERY_REPORT_MAX_BATCH', '1000'))  # Reports per UPDATE; a full batch flushes early
+    TRAFFIC_CAPTURE_PATH = os.getenv('TRAFFIC_CAPTURE_PATH')  # Append /sms_callback payloads to this file for replay, unset disables
     
     # Gemini AI settings
     GEMINI_API_KEY = os.getenv('GEMINI_API_KEY')
     
+    # Prompt size budget; PROMPT_MAX_TOKENS (approximate) overrides PROMPT_MAX_CHARS when set
+    PROMPT_MAX_CHARS = int(os.getenv('PROMPT_MAX_CHARS', '4000'))
+    PROMPT_MAX_TOKENS = int(os.getenv('PROMPT_MAX_TOKENS', '0'))
+    PROMPT_MAX_TURN_CHARS = int(os.getenv('PROMPT_MAX_TURN_CHARS', '600'))  # Longer history turns are trimmed
+    PROMPT_MAX_MESSAGE_CHARS = int(os.getenv('PROMPT_MAX_MESSAGE_CHARS', '1000'))
+    
+    # AI response cache (SQLite file shared by all worker processes)
+    RESPONSE_CACHE_ENABLED = os.getenv('RESPONSE_CACHE_ENABLED', 'True').lower() == 'true'
+    RESPONSE_CACHE_PATH = os.getenv('RESPONSE_CACHE_PATH')  # Defaults to instance/response_cache.db
+    RESPONSE_CACHE_TTL = int(os.getenv('RESPONSE_CACHE_TTL', str(7 * 24 * 3600)))  # seconds
+    RESPONSE_CACHE_MAX_ENTRIES = int(os.getenv('RESPONSE_CACHE_MAX_ENTRIES', '50000'))
+    RESPONSE_CACHE_TOUCH_INTERVAL = int(os.getenv('RESPONSE_CACHE_TOUCH_INTERVAL', '300'))  # seconds between last_used refreshes of an entry
+    # Key first-turn questions on the question alone so answers are shared across users
+    RESPONSE_CACHE_FIRST_TURN_HISTORY_INDEPENDENT = os.getenv('RESPONSE_CACHE_FIRST_TURN_HISTORY_INDEPENDENT', 'True').lower() == 'true'
+    
+    # Gemini admission control (per process): calls beyond the in-flight limit wait in a
+    # bounded queue, and callers that can't be admitted get the degraded reply
+    AI_MAX_IN_FLIGHT = int(os.getenv('AI_MAX_IN_FLIGHT', '16'))
+    AI_MAX_QUEUE = int(os.getenv('AI_MAX_QUEUE', '64'))
+    AI_QUEUE_TIMEOUT = float(os.getenv('AI_QUEUE_TIMEOUT', '5'))  # seconds
+    AI_DEGRADED_REPLY = os.getenv('AI_DEGRADED_REPLY', "We're very busy right now. Please send your question again in a few minutes.")
+    
+    # Outbound HTTP connection pool (shared by Africa's Talking and Gemini)
+    HTTP_POOL_CONNECTIONS = int(os.getenv('HTTP_POOL_CONNECTIONS', '4'))  # Hosts kept in the pool
+    HTTP_POOL_MAXSIZE = int(os.getenv('HTTP_POOL_MAXSIZE', '20'))  # Keep-alive connections per host
+    HTTP_POOL_BLOCK = os.getenv('HTTP_POOL_BLOCK', 'False').lower() == 'true'
+    HTTP_CONNECT_TIMEOUT = float(os.getenv('HTTP_CONNECT_TIMEOUT', '3.05'))  # seconds
+    HTTP_READ_TIMEOUT = float(os.getenv('HTTP_READ_TIMEOUT', '20'))  # seconds
+    HTTP_MAX_RETRIES = int(os.getenv('HTTP_MAX_RETRIES', '0'))  # Connection-level retries
+    
     # Session settings
-    SESSION_LIFETIME = 3600  # 1 hour in seconds
+    SESSION_LIFETIME = int(os.getenv('SESSION_LIFETIME', '3600'))  # Idle seconds before a web chat session expires
+    SESSION_STORE = os.getenv('SESSION_STORE', 'database')  # 'database' (shared by all workers) or 'memory'
+    SESSION_MAX_MESSAGES = int(os.getenv('SESSION_MAX_MESSAGES', '10'))  # Messages kept per web chat session
+    SESSION_CLEANUP_INTERVAL = int(os.getenv('SESSION_CLEANUP_INTERVAL', '300'))  # seconds, 0 disables
+    
+    # Message retention settings
+    MESSAGE_RETENTION_DAYS = int(os.getenv('MESSAGE_RETENTION_DAYS', '90'))  # Age at which messages move to the archive, 0 disables
+    ARCHIVE_BATCH_SIZE = int(os.getenv('ARCHIVE_BATCH_SIZE', '1000'))  # Messages moved per transaction
+    ARCHIVE_BATCH_PAUSE = float(os.getenv('ARCHIVE_BATCH_PAUSE', '0.1'))  # seconds between batches
+    
+    # Conversation history settings
+    CONVERSATION_HISTORY_LIMIT = int(os.getenv('CONVERSATION_HISTORY_LIMIT', '10'))  # Turns sent to the AI
+    CONVERSATION_CACHE_SIZE = int(os.getenv('CONVERSATION_CACHE_SIZE', '10000'))  # Users cached per process, 0 disables
+    CONVERSATION_CACHE_TTL = int(os.getenv('CONVERSATION_CACHE_TTL', '300'))  # seconds
+    
+    # Phone number to user id cache
+    USER_CACHE_SIZE = int(os.getenv('USER_CACHE_SIZE', '100000'))  # Numbers cached per process, 0 disables
+    USER_CACHE_TTL = int(os.getenv('USER_CACHE_TTL', '300'))  # seconds, also how often last_active is refreshed
+    USER_CACHE_NEGATIVE_TTL = int(os.getenv('USER_CACHE_NEGATIVE_TTL', '30'))  # seconds to remember unknown numbers
+    
+    # Recently ingested inbound SMS ids, for dropping Africa's Talking retries in memory
+    DEDUP_CACHE_SIZE = int(os.getenv('DEDUP_CACHE_SIZE', '100000'))  # Ids remembered per process, 0 disables
+    DEDUP_CACHE_TTL = int(os.getenv('DEDUP_CACHE_TTL', '3600'))  # seconds
+    
+    # Background job queue settings
+    JOB_WORKERS = int(os.getenv('JOB_WORKERS', '4'))
+    JOB_POLL_INTERVAL = float(os.getenv('JOB_POLL_INTERVAL', '1.0'))  # seconds
+    JOB_VISIBILITY_TIMEOUT = int(os.getenv('JOB_VISIBILITY_TIMEOUT', '120'))  # seconds
+    JOB_MAX_ATTEMPTS = int(os.getenv('JOB_MAX_ATTEMPTS', '5'))
+    JOB_RETRY_DELAY = float(os.getenv('JOB_RETRY_DELAY', '5'))  # seconds, doubled per attempt
+    ASYNC_JOB_CONCURRENCY = int(os.getenv('ASYNC_JOB_CONCURRENCY', '100'))  # Jobs in flight under ASGI
+    JOB_READY_QUEUE_SIZE = int(os.getenv('JOB_READY_QUEUE_SIZE', '100'))  # Jobs handed to local workers at enqueue; the rest wait as pending
     
     @staticmethod
     def init_app(app):
@@ -35,7 +130,12 @@ class ProductionConfig(Config):
 
 class TestingConfig(Config):
     TESTING = True
+    LOG_ASYNC = False
     SQLALCHEMY_DATABASE_URI = 'sqlite:///:memory:'
+    JOB_WORKERS = 0  # Drain the queue explicitly with job_queue.run_once()
+    RESPONSE_CACHE_ENABLED = False
+    SESSION_CLEANUP_INTERVAL = 0
+    DELIVERY_REPORT_FLUSH_INTERVAL = 0  # Apply reports explicitly with delivery_reports.flush()
 
 config = {
     'development': DevelopmentConfig,
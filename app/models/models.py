@@ -1,5 +1,7 @@
 from datetime import datetime
 from flask_sqlalchemy import SQLAlchemy
+from sqlalchemy import and_, or_
+from sqlalchemy.dialects import postgresql, sqlite
 
 db = SQLAlchemy()
 
@@ -14,10 +16,61 @@ class User(db.Model):
         return f'<User {self.phone_number}>'
 
     def update_last_active(self):
+        """Mark the user active; committed with the caller's transaction."""
         self.last_active = datetime.utcnow()
-        db.session.commit()
 
-class Message(db.Model):
+    @classmethod
+    def upsert(cls, phone_number):
+        """Get or create a user in one statement, marking them active.
+
+        Runs inside the caller's transaction and returns (user_id, created).
+        """
+        now = datetime.utcnow()
+        dialect = db.session.get_bind().dialect.name
+        if dialect not in ('sqlite', 'postgresql'):
+            user = cls.query.filter_by(phone_number=phone_number).first()
+            if user is None:
+                user = cls(phone_number=phone_number, created_at=now, last_active=now)
+                db.session.add(user)
+                db.session.flush()
+                return user.id, True
+            user.update_last_active()
+            return user.id, False
+
+        insert = sqlite.insert if dialect == 'sqlite' else postgresql.insert
+        stmt = insert(cls).values(phone_number=phone_number, created_at=now, last_active=now)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[cls.phone_number],
+            set_={'last_active': now}
+        ).returning(cls.id, cls.created_at)
+        user_id, created_at = db.session.execute(stmt).one()
+        return user_id, created_at == now
+
+class MessagePageMixin:
+    """Keyset-paginated reads shared by live and archived messages."""
+
+    @classmethod
+    def get_page(cls, before=None, limit=50, **scope):
+        """Return a newest-first page of messages matching `scope` (e.g. session_id=...).
+
+        `before` is the (timestamp, id) of the last message of the previous page.
+        """
+        query = cls.query.filter_by(**scope)
+        if before is not None:
+            timestamp, message_id = before
+            query = query.filter(or_(
+                cls.timestamp < timestamp,
+                and_(cls.timestamp == timestamp, cls.id < message_id)
+            ))
+        return query.order_by(cls.timestamp.desc(), cls.id.desc()).limit(limit).all()
+
+    @classmethod
+    def get_latest_id(cls, **scope):
+        """Return the id of the newest message matching `scope`, or None."""
+        return cls.query.with_entities(cls.id).filter_by(**scope) \
+            .order_by(cls.timestamp.desc(), cls.id.desc()).limit(1).scalar()
+
+class Message(MessagePageMixin, db.Model):
     id = db.Column(db.Integer, primary_key=True)
     user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=True)
     sender_type = db.Column(db.String(10), nullable=False)  # 'user' or 'ai'
@@ -25,16 +78,125 @@ class Message(db.Model):
     timestamp = db.Column(db.DateTime, index=True, default=datetime.utcnow)
     status = db.Column(db.String(10), default='sent')  # e.g., 'sent', 'failed', 'received', 'read'
     link_id = db.Column(db.String(50), nullable=True)  # For Africa's Talking SMS correlation
+    provider_message_id = db.Column(db.String(64), nullable=True, index=True)  # Africa's Talking messageId of an outbound SMS
+    session_id = db.Column(db.String(100), nullable=True)  # Web chat session of a /chat message
+    inbound_id = db.Column(db.String(64), nullable=True, unique=True, index=True)  # Africa's Talking id (or linkId) of an inbound SMS; retried callbacks collide here
+
+    __table_args__ = (
+        db.Index('ix_message_user_id_timestamp', 'user_id', 'timestamp'),
+        db.Index('ix_message_session_id_timestamp', 'session_id', 'timestamp'),
+    )
 
     def __repr__(self):
         return f'<Message from {self.sender_type} at {self.timestamp}>'
 
+    @classmethod
+    def get_recent_turns(cls, user_id, limit=10):
+        """Retrieve the latest `limit` (sender_type, text) turns for a user, oldest first."""
+        messages = cls.query.with_entities(cls.sender_type, cls.text).filter_by(user_id=user_id) \
+            .order_by(cls.timestamp.desc(), cls.id.desc()).limit(limit).all()
+        return [(msg.sender_type, msg.text) for msg in reversed(messages)]
+
+    @staticmethod
+    def format_history(turns):
+        """Render (sender_type, text) turns as a prompt transcript."""
+        lines = []
+        for sender_type, text in turns:
+            role = "User" if sender_type == 'user' else "Assistant"
+            lines.append(f"{role}: {text}")
+        return "\n".join(lines).strip()
+
     @classmethod
     def get_conversation_history(cls, user_id, limit=10):
-        """Retrieve conversation history for a user."""
-        messages = cls.query.filter_by(user_id=user_id).order_by(cls.timestamp.asc()).limit(limit).all()
-        history = ""
-        for msg in messages:
-            role = "User" if msg.sender_type == 'user' else "Assistant"
-            history += f"{role}: {msg.text}\n"
-        return history.strip() 
\ No newline at end of file
+        """Retrieve the latest `limit` messages for a user, oldest first."""
+        return cls.format_history(cls.get_recent_turns(user_id, limit))
+
+class WebChatSession(db.Model):
+    """Web chat session shared by all server processes."""
+    id = db.Column(db.String(100), primary_key=True)
+    messages = db.Column(db.Text, nullable=False, default='[]')  # JSON list of recent messages
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    expires_at = db.Column(db.DateTime, nullable=False, index=True)
+
+    def __repr__(self):
+        return f'<WebChatSession {self.id}>'
+
+class Job(db.Model):
+    """A unit of background work in the durable job queue."""
+    id = db.Column(db.Integer, primary_key=True)
+    name = db.Column(db.String(50), nullable=False)
+    payload = db.Column(db.Text, nullable=False, default='{}')  # JSON-encoded handler arguments
+    status = db.Column(db.String(10), nullable=False, default='pending')  # 'pending' or 'running'
+    attempts = db.Column(db.Integer, nullable=False, default=0)
+    run_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+    locked_until = db.Column(db.DateTime, nullable=True)  # Visibility timeout for running jobs
+    last_error = db.Column(db.Text, nullable=True)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+
+    __table_args__ = (
+        db.Index('ix_job_status_run_at', 'status', 'run_at'),
+    )
+
+    def __repr__(self):
+        return f'<Job {self.id} {self.name} ({self.status})>'
+
+class DeadLetterJob(db.Model):
+    """A job that exhausted its retries, kept for inspection."""
+    id = db.Column(db.Integer, primary_key=True)
+    job_id = db.Column(db.Integer, nullable=False)
+    name = db.Column(db.String(50), nullable=False)
+    payload = db.Column(db.Text, nullable=False)
+    attempts = db.Column(db.Integer, nullable=False)
+    last_error = db.Column(db.Text, nullable=True)
+    created_at = db.Column(db.DateTime)
+    failed_at = db.Column(db.DateTime, index=True, default=datetime.utcnow)
+
+    def __repr__(self):
+        return f'<DeadLetterJob {self.job_id} {self.name}>'
+
+class Campaign(db.Model):
+    """A broadcast SMS to an audience of users, sent in resumable chunks."""
+    id = db.Column(db.Integer, primary_key=True)
+    name = db.Column(db.String(100), nullable=False)
+    message = db.Column(db.Text, nullable=False)
+    audience = db.Column(db.Text, nullable=False, default='{}')  # JSON-encoded User filters
+    status = db.Column(db.String(10), nullable=False, default='pending')  # 'pending', 'running', 'paused', 'completed' or 'failed'
+    tps = db.Column(db.Float, nullable=False)  # Recipients per second
+    chunk_size = db.Column(db.Integer, nullable=False)
+    max_user_id = db.Column(db.Integer, nullable=False, default=0)  # Audience is fixed to users that existed at creation
+    cursor = db.Column(db.Integer, nullable=False, default=0)  # Last user id sent to
+    claimed_through = db.Column(db.Integer, nullable=True)  # Last user id of the chunk being sent, if any
+    job_id = db.Column(db.Integer, nullable=True)  # The run_campaign job working on it, if any
+    total = db.Column(db.Integer, nullable=False, default=0)
+    sent = db.Column(db.Integer, nullable=False, default=0)
+    failed = db.Column(db.Integer, nullable=False, default=0)
+    last_error = db.Column(db.Text, nullable=True)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    started_at = db.Column(db.DateTime, nullable=True)
+    updated_at = db.Column(db.DateTime, nullable=True)  # Time the last chunk was recorded
+    completed_at = db.Column(db.DateTime, nullable=True)
+
+    def __repr__(self):
+        return f'<Campaign {self.id} {self.name} ({self.status})>'
+
+class ArchivedMessage(MessagePageMixin, db.Model):
+    """A message moved out of the `message` table by the retention job."""
+    id = db.Column(db.Integer, primary_key=True, autoincrement=False)  # Same id it had in `message`
+    user_id = db.Column(db.Integer, nullable=True)
+    sender_type = db.Column(db.String(10), nullable=False)
+    text = db.Column(db.Text, nullable=False)
+    timestamp = db.Column(db.DateTime, index=True)
+    status = db.Column(db.String(10))
+    link_id = db.Column(db.String(50), nullable=True)
+    provider_message_id = db.Column(db.String(64), nullable=True)
+    session_id = db.Column(db.String(100), nullable=True)
+    inbound_id = db.Column(db.String(64), nullable=True)
+    archived_at = db.Column(db.DateTime, default=datetime.utcnow)
+
+    __table_args__ = (
+        db.Index('ix_archived_message_user_id_timestamp', 'user_id', 'timestamp'),
+        db.Index('ix_archived_message_session_id_timestamp', 'session_id', 'timestamp'),
+    )
+
+    def __repr__(self):
+        return f'<ArchivedMessage from {self.sender_type} at {self.timestamp}>'
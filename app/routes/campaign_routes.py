@@ -0,0 +1,72 @@
+from flask import Blueprint, request, jsonify
+import logging
+from app.models.models import db, Campaign
+from app.services.campaign_service import campaign_service
+
+campaign_bp = Blueprint('campaigns', __name__)
+
+@campaign_bp.route('/campaigns', methods=['POST'])
+def create_campaign():
+    """Create a broadcast campaign.
+
+    Expects {"name": ..., "message": ..., "audience": {...}} with optional
+    "tps" and "chunk_size". Audience filters: active_since, inactive_since,
+    created_after, created_before (ISO 8601) and phone_prefix.
+    """
+    data = request.get_json()
+
+    if not data or not data.get('name') or not data.get('message'):
+        return jsonify({"error": "name and message required"}), 400
+
+    try:
+        campaign = campaign_service.create(
+            data['name'],
+            data['message'],
+            audience=data.get('audience'),
+            tps=data.get('tps'),
+            chunk_size=data.get('chunk_size')
+        )
+    except ValueError as e:
+        db.session.rollback()
+        return jsonify({"error": str(e)}), 400
+
+    return jsonify(campaign_service.progress(campaign)), 201
+
+@campaign_bp.route('/campaigns', methods=['GET'])
+def list_campaigns():
+    """Most recent campaigns with their progress."""
+    limit = request.args.get('limit', 20, type=int)
+    campaigns = Campaign.query.order_by(Campaign.id.desc()).limit(limit).all()
+    return jsonify({"campaigns": [campaign_service.progress(campaign) for campaign in campaigns]})
+
+@campaign_bp.route('/campaigns/<int:campaign_id>', methods=['GET'])
+def campaign_status(campaign_id):
+    """Progress, throughput and completion of a campaign."""
+    campaign = db.session.get(Campaign, campaign_id)
+    if campaign is None:
+        return jsonify({"error": "Campaign not found"}), 404
+    return jsonify(campaign_service.progress(campaign))
+
+@campaign_bp.route('/campaigns/<int:campaign_id>/pause', methods=['POST'])
+def pause_campaign(campaign_id):
+    """Stop a campaign after the chunk being sent."""
+    campaign = db.session.get(Campaign, campaign_id)
+    if campaign is None:
+        return jsonify({"error": "Campaign not found"}), 404
+    if not campaign_service.pause(campaign):
+        return jsonify({"error": f"Campaign is {campaign.status}"}), 409
+
+    logging.info(f"📣 Campaign {campaign_id} paused")
+    return jsonify(campaign_service.progress(campaign))
+
+@campaign_bp.route('/campaigns/<int:campaign_id>/resume', methods=['POST'])
+def resume_campaign(campaign_id):
+    """Continue a paused or failed campaign from where it stopped."""
+    campaign = db.session.get(Campaign, campaign_id)
+    if campaign is None:
+        return jsonify({"error": "Campaign not found"}), 404
+    if not campaign_service.resume(campaign):
+        return jsonify({"error": f"Campaign is {campaign.status}"}), 409
+
+    logging.info(f"📣 Campaign {campaign_id} resumed")
+    return jsonify(campaign_service.progress(campaign))
@@ -1,9 +1,18 @@
-from flask import Blueprint, jsonify, request
+from flask import Blueprint, Response, jsonify, request
 import logging
 from datetime import datetime
-from app.models.models import db
+from app.models.models import db, DeadLetterJob
 from app.services.sms_service import sms_service
 from app.services.ai_service import ai_service
+from app.services.job_queue import job_queue
+from app.services.conversation_cache import conversation_cache
+from app.services.response_cache import response_cache
+from app.services.session_store import session_store
+from app.services.user_lookup import user_lookup
+from app.services.inbound_dedup import inbound_dedup
+from app.services.delivery_reports import delivery_reports
+from app.services.metrics import metrics
+from app.services.traffic_capture import traffic_capture
 
 health_bp = Blueprint('health', __name__)
 
@@ -35,17 +44,52 @@ def health_check():
         "services": {
             "sms": {
                 "status": at_status,
-                "details": at_detailed
+                "details": at_detailed,
+                "delivery_reports": delivery_reports.stats(),
+                "traffic_capture": traffic_capture.stats()
             },
             "ai": {
                 "status": gemini_status,
-                "model": "gemini-2.0-flash" if gemini_status else None
+                "model": "gemini-2.0-flash" if gemini_status else None,
+                "response_cache": response_cache.stats(),
+                "admission": ai_service.admission.stats()
             },
             "database": {
                 "status": db_status
-            }
+            },
+            "conversation_cache": conversation_cache.stats(),
+            "user_lookup": user_lookup.stats(),
+            "inbound_dedup": inbound_dedup.stats(),
+            "web_sessions": session_store.stats()
         },
         "config": {
             "at_username": request.host_url + 'sms_callback'
         }
-    }) 
\ No newline at end of file
+    }) 
+
+@health_bp.route('/metrics', methods=['GET'])
+def prometheus_metrics():
+    """Pipeline stage latencies and service call counters in Prometheus text format."""
+    body, content_type = metrics.render()
+    return Response(body, content_type=content_type)
+
+@health_bp.route('/health/jobs', methods=['GET'])
+def job_queue_status():
+    """Background job queue depth and most recent dead-lettered jobs."""
+    limit = request.args.get('limit', 20, type=int)
+    dead_letters = DeadLetterJob.query.order_by(DeadLetterJob.failed_at.desc()).limit(limit).all()
+    
+    return jsonify({
+        "queue": job_queue.stats(),
+        "dead_letters": [
+            {
+                "job_id": job.job_id,
+                "name": job.name,
+                "payload": job.payload,
+                "attempts": job.attempts,
+                "last_error": job.last_error,
+                "created_at": job.created_at.isoformat() if job.created_at else None,
+                "failed_at": job.failed_at.isoformat() if job.failed_at else None
+            } for job in dead_letters
+        ]
+    })
\ No newline at end of file
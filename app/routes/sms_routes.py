@@ -1,19 +1,25 @@
 from flask import Blueprint, request, Response, jsonify
 import logging
 from datetime import datetime
-from app.models.models import db, User, Message
 from app.services.sms_service import sms_service
-from app.services.ai_service import ai_service
+from app.services.inbound_sms import save_inbound_sms
+from app.services.phone_numbers import phone_normalizer
+from app.services.delivery_reports import delivery_reports
+from app.services.log_pipeline import log_context, log_payload
+from app.services.metrics import metrics
+from app.services.tracing import span
+from app.services.traffic_capture import traffic_capture
 
 sms_bp = Blueprint('sms', __name__)
 
 @sms_bp.route('/sms_callback', methods=['POST'])
+@metrics.timed('webhook')
 def sms_callback():
     """Handle incoming SMS messages from Africa's Talking webhook."""
     
-    # Log raw request data for debugging
-    logging.info(f"Raw SMS callback data: {request.form}")
-    logging.info(f"Request headers: {dict(request.headers)}")
+    # Log raw request data for debugging (sampled)
+    log_payload(lambda: f"SMS callback form={request.form.to_dict()} headers={dict(request.headers)}")
+    traffic_capture.record(request.form.to_dict())
     
     # Validate request
     if not request.form:
@@ -24,80 +30,40 @@ def sms_callback():
     sender_phone = request.form.get('from')
     message_text = request.form.get('text', '').strip()
     link_id = request.form.get('linkId')
-    date = request.form.get('date')
     to = request.form.get('to')  # Your shortcode
     
-    logging.info(f"📱 SMS received:")
-    logging.info(f"   From: {sender_phone}")
-    logging.info(f"   To: {to}")
-    logging.info(f"   Message: '{message_text}'")
-    logging.info(f"   LinkID: {link_id}")
-    logging.info(f"   Date: {date}")
+    log_context(sender=sender_phone, to=to, link_id=link_id, chars=len(message_text))
 
     if not sender_phone or not message_text:
         logging.error("Missing sender phone or message text")
         return Response("Bad Request", status=400)
 
-    try:
-        # Get or create user
-        user = User.query.filter_by(phone_number=sender_phone).first()
-        if not user:
-            user = User(phone_number=sender_phone)
-            db.session.add(user)
-            db.session.commit()
-            logging.info(f"👤 New user created: {sender_phone}")
+    with span('save_sms'):
+        if not save_inbound_sms(sender_phone, message_text, link_id, request.form.get('id')):
+            log_context(duplicate=1)
 
-        # Save incoming message
-        user_message = Message(
-            user_id=user.id, 
-            sender_type='user', 
-            text=message_text,
-            link_id=link_id
-        )
-        db.session.add(user_message)
-        db.session.commit()
-        logging.info(f"💾 User message saved to database")
+    # Always return 200 OK to Africa's Talking
+    return Response("OK", status=200)
 
-        # Get conversation history
-        conversation_history = Message.get_conversation_history(user.id)
-        newline = '\n'
-        logging.info(f"📚 Retrieved conversation history: {len(conversation_history.split(newline))} messages")
-        
-        # Generate AI response
-        logging.info(f"🤖 Generating AI response...")
-        ai_response = ai_service.generate_response(message_text, conversation_history)
-        logging.info(f"🤖 AI Response generated: '{ai_response}'")
-        
-        # Save AI response to database
-        ai_message = Message(
-            user_id=user.id,
-            sender_type='ai',
-            text=ai_response
-        )
-        db.session.add(ai_message)
-        db.session.commit()
-        logging.info(f"💾 AI response saved to database")
+@sms_bp.route('/delivery_report', methods=['POST'])
+def delivery_report():
+    """Africa's Talking delivery report callback.
 
-        # Send SMS reply
-        logging.info(f"📤 Attempting to send SMS reply to {sender_phone}")
-        sms_sent = sms_service.send_sms(sender_phone, ai_response)
-        
-        if sms_sent:
-            logging.info(f"✅ Successfully processed and replied to {sender_phone}")
-        else:
-            logging.error(f"❌ Failed to send SMS reply to {sender_phone}")
+    Reports are buffered and applied to messages in batches, so a burst of
+    callbacks after a broadcast does not become one transaction each.
+    """
+    message_id = request.form.get('id')
+    status = request.form.get('status')
 
-    except Exception as e:
-        logging.error(f"💥 Error processing SMS from {sender_phone}: {e}")
-        db.session.rollback()
-        
-        # Send a simple error message to user
-        try:
-            sms_service.send_sms(sender_phone, "Sorry, I'm having technical difficulties. Please try again.")
-        except:
-            pass
+    if not message_id or not status:
+        logging.error("Delivery report missing id or status")
+        return Response("Bad Request", status=400)
+
+    if not delivery_reports.add(message_id, status):
+        logging.warning(f"Unknown delivery status '{status}' for message {message_id}")
+    elif status in ('Failed', 'Rejected'):
+        logging.warning(f"📬 Message {message_id} to {request.form.get('phoneNumber')} {status.lower()}: {request.form.get('failureReason')}")
 
-    # Always return 200 OK to Africa's Talking
     return Response("OK", status=200)
 
 @sms_bp.route('/send_sms', methods=['POST'])
@@ -116,6 +82,35 @@ def manual_send_sms():
     else:
         return jsonify({"error": "Failed to send SMS"}), 500
 
+@sms_bp.route('/send_bulk', methods=['POST'])
+def manual_send_bulk():
+    """Send SMS to many recipients.
+
+    Accepts either {"message": ..., "phones": [...]} for a broadcast or
+    {"messages": [{"phone": ..., "message": ...}, ...]} for individual texts.
+    """
+    data = request.get_json()
+    
+    if data and 'messages' in data:
+        pairs = [(item['phone'], item['message']) for item in data['messages'] if item.get('phone') and item.get('message')]
+    elif data and 'phones' in data and 'message' in data:
+        phones, invalid = phone_normalizer.normalize_many(data['phones'])
+        pairs = [(phone, data['message']) for phone in phones + invalid]
+    else:
+        return jsonify({"error": "messages, or phones and message, required"}), 400
+    
+    if not pairs:
+        return jsonify({"error": "No recipients"}), 400
+    
+    results = sms_service.send_bulk(pairs)
+    sent = sum(1 for result in results if result.get('status') == 'Success')
+    
+    return jsonify({
+        "sent": sent,
+        "failed": len(results) - sent,
+        "recipients": [dict(result, message=message) for (_, message), result in zip(pairs, results)]
+    })
+
 @sms_bp.route('/test_sms', methods=['POST', 'GET'])
 def test_sms():
     """Test SMS sending functionality."""
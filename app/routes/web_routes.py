@@ -1,14 +1,37 @@
-from flask import Blueprint, request, jsonify, render_template_string, session
+from flask import Blueprint, request, jsonify, render_template_string, session, Response, stream_with_context
+import base64
+import hashlib
+import json
 import logging
 from datetime import datetime
 from app.services.ai_service import ai_service
+from app.services.session_store import session_store
+from app.services.metrics import metrics
+from app.services.tracing import span
+from app.services.log_pipeline import log_context, log_payload
 from app.templates.chat_template import CHAT_TEMPLATE
-from app.models.models import db, Message
+from app.models.models import db, Message, ArchivedMessage
 
 web_bp = Blueprint('web', __name__)
 
-# Store web chat sessions (in production, use Redis or database)
-web_chat_sessions = {}
+# Recent messages included in the AI prompt
+SESSION_HISTORY_MESSAGES = 6
+
+# Largest page /chat_history will return
+MAX_HISTORY_PAGE = 200
+
+def add_session_message(session_id, sender, text):
+    """Append a message to a web chat session and return its recent history."""
+    with span('session_store'):
+        messages = session_store.append(session_id, sender, text)
+    
+    # Generate conversation history
+    history_parts = []
+    for msg in messages[-SESSION_HISTORY_MESSAGES:]:
+        role = "User" if msg['sender'] == 'user' else "Assistant"
+        history_parts.append(f"{role}: {msg['text']}")
+    
+    return "\n".join(history_parts)
 
 @web_bp.route('/')
 def index():
@@ -24,7 +47,21 @@ def chat_interface():
         logging.error(f"Error rendering chat template: {e}")
         return f"Error loading chat interface: {str(e)}", 500
 
+def save_web_chat_message(session_id, sender_type, text):
+    """Persist a /chat message (not linked to a user)."""
+    with span('save_message'):
+        db.session.add(Message(user_id=None, session_id=session_id, sender_type=sender_type, text=text))
+        db.session.commit()
+
+def recent_web_chat_turns(session_id, limit=20):
+    """Latest turns of a /chat session, oldest first; the prompt builder bounds their size."""
+    with metrics.time('history_read'):
+        recent_messages = Message.query.with_entities(Message.sender_type, Message.text).filter_by(session_id=session_id) \
+            .order_by(Message.timestamp.desc(), Message.id.desc()).limit(limit).all()
+    return [(m.sender_type, m.text) for m in reversed(recent_messages)]
+
 @web_bp.route('/chat', methods=['POST'])
+@metrics.timed('chat')
 def chat():
     data = request.get_json()
     message = data.get('message', '').strip()
@@ -33,33 +70,61 @@ def chat():
         return jsonify({'error': 'Message required'}), 400
     try:
         # Save user message
-        user_message = Message(
-            user_id=None,  # Not linked to a user for web chat
-            sender_type='user',
-            text=message
-        )
-        db.session.add(user_message)
-        db.session.commit()
+        save_web_chat_message(session_id, 'user', message)
         # Get conversation history (last 20 messages)
-        conversation_history = Message.query.order_by(Message.timestamp.asc()).limit(20).all()
-        history_text = '\n'.join([m.text for m in conversation_history])
+        conversation_history = recent_web_chat_turns(session_id)
         # Generate AI response
-        ai_response = ai_service.generate_response(message, history_text)
+        ai_response = ai_service.generate_response(message, conversation_history)
         # Save AI response
-        ai_message = Message(
-            user_id=None,
-            sender_type='ai',
-            text=ai_response
-        )
-        db.session.add(ai_message)
-        db.session.commit()
+        save_web_chat_message(session_id, 'ai', ai_response)
         return jsonify({'response': ai_response})
     except Exception as e:
         logging.error(f"Error in /chat: {e}")
         db.session.rollback()
         return jsonify({'error': 'Internal server error'}), 500
 
+@web_bp.route('/chat/stream', methods=['POST'])
+def chat_stream():
+    """Streaming version of /chat using Server-Sent Events.
+
+    Sends `message` events carrying {"text": chunk} as Gemini generates the
+    reply, then a `done` event with the full {"response": ...}.
+    """
+    data = request.get_json() or {}
+    message = data.get('message', '').strip()
+    session_id = data.get('session_id', 'default')
+    if not message:
+        return jsonify({'error': 'Message required'}), 400
+    try:
+        save_web_chat_message(session_id, 'user', message)
+        conversation_history = recent_web_chat_turns(session_id)
+    except Exception as e:
+        logging.error(f"Error in /chat/stream: {e}")
+        db.session.rollback()
+        return jsonify({'error': 'Internal server error'}), 500
+
+    def events():
+        chunks = []
+        try:
+            for chunk in ai_service.generate_response_stream(message, conversation_history):
+                chunks.append(chunk)
+                yield f"data: {json.dumps({'text': chunk})}\n\n"
+            ai_response = ''.join(chunks)
+            save_web_chat_message(session_id, 'ai', ai_response)
+            yield f"event: done\ndata: {json.dumps({'response': ai_response})}\n\n"
+        except Exception as e:
+            logging.error(f"Error in /chat/stream: {e}")
+            db.session.rollback()
+            yield f"event: error\ndata: {json.dumps({'error': 'Internal server error'})}\n\n"
+
+    return Response(
+        stream_with_context(events()),
+        mimetype='text/event-stream',
+        headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'}
+    )
+
 @web_bp.route('/api/chat', methods=['POST'])
+@metrics.timed('chat')
 def api_chat():
     """Handle web chat messages."""
     try:
@@ -74,47 +139,23 @@ def api_chat():
         if not message_text:
             return jsonify({'success': False, 'error': 'Empty message'}), 400
         
-        logging.info(f"Web chat message - Session: {session_id}, Message: '{message_text}'")
-        
-        # Get or create web session
-        if session_id not in web_chat_sessions:
-            web_chat_sessions[session_id] = {
-                'messages': [],
-                'created_at': datetime.utcnow()
-            }
-        
-        session = web_chat_sessions[session_id]
-        
-        # Add user message to session
-        session['messages'].append({
-            'sender': 'user',
-            'text': message_text,
-            'timestamp': datetime.utcnow()
-        })
+        log_context(session=session_id, chars=len(message_text))
+        log_payload("Web chat message session=%s text=%r", session_id, message_text)
         
-        # Keep only last 10 messages for context
-        if len(session['messages']) > 10:
-            session['messages'] = session['messages'][-10:]
-        
-        # Generate conversation history
-        history_parts = []
-        for msg in session['messages'][-6:]:  # Last 6 messages for context
-            role = "User" if msg['sender'] == 'user' else "Assistant"
-            history_parts.append(f"{role}: {msg['text']}")
-        
-        conversation_history = "\n".join(history_parts)
+        conversation_history = add_session_message(session_id, 'user', message_text)
         
         # Generate AI response
-        ai_response = ai_service.generate_response(message_text, conversation_history)
+        ai_response = ai_service.generate_response(
+            message_text,
+            conversation_history,
+            use_cache=not data.get('no_cache', False)
+        )
         
         # Add AI response to session
-        session['messages'].append({
-            'sender': 'ai',
-            'text': ai_response,
-            'timestamp': datetime.utcnow()
-        })
+        add_session_message(session_id, 'ai', ai_response)
         
-        logging.info(f"Web chat response - Session: {session_id}, Response: '{ai_response}'")
+        log_context(response_chars=len(ai_response))
+        log_payload("Web chat response session=%s text=%r", session_id, ai_response)
         
         return jsonify({
             'success': True,
@@ -132,61 +173,102 @@ def api_chat():
 @web_bp.route('/api/chat_history/<session_id>')
 def get_chat_history(session_id):
     """Get chat history for a session."""
-    if session_id in web_chat_sessions:
-        messages = web_chat_sessions[session_id]['messages']
-        return jsonify({
-            'success': True,
-            'messages': [
-                {
-                    'sender': msg['sender'],
-                    'text': msg['text'],
-                    'timestamp': msg['timestamp'].isoformat()
-                }
-                for msg in messages
-            ]
-        })
-    else:
+    session_data = session_store.get(session_id)
+    if session_data is None:
         return jsonify({'success': False, 'error': 'Session not found'}), 404
+    
+    return jsonify({
+        'success': True,
+        'messages': [
+            {
+                'sender': msg['sender'],
+                'text': msg['text'],
+                'timestamp': msg['timestamp']
+            }
+            for msg in session_data['messages']
+        ]
+    })
 
 @web_bp.route('/api/cleanup_sessions', methods=['POST'])
 def cleanup_old_sessions():
-    """Clean up old web chat sessions (call this periodically)."""
+    """Remove expired web chat sessions (also done automatically in the background)."""
     try:
-        current_time = datetime.utcnow()
-        sessions_to_remove = []
-        
-        for session_id, session_data in web_chat_sessions.items():
-            # Remove sessions older than 1 hour
-            if (current_time - session_data['created_at']).seconds > 3600:
-                sessions_to_remove.append(session_id)
-        
-        for session_id in sessions_to_remove:
-            del web_chat_sessions[session_id]
+        cleaned = session_store.cleanup_expired()
         
-        logging.info(f"Cleaned up {len(sessions_to_remove)} old web chat sessions")
+        logging.info(f"Cleaned up {cleaned} expired web chat sessions")
         
         return jsonify({
             'success': True,
-            'cleaned_sessions': len(sessions_to_remove),
-            'active_sessions': len(web_chat_sessions)
+            'cleaned_sessions': cleaned,
+            'active_sessions': session_store.count()
         })
         
     except Exception as e:
         logging.error(f"Error cleaning up sessions: {e}")
         return jsonify({'success': False, 'error': str(e)}), 500
 
+def encode_cursor(message):
+    raw = f"{message.timestamp.isoformat()}|{message.id}"
+    return base64.urlsafe_b64encode(raw.encode('utf-8')).decode('ascii')
+
+def decode_cursor(cursor):
+    """Return the (timestamp, id) in a cursor; raises ValueError if malformed."""
+    timestamp, message_id = base64.urlsafe_b64decode(cursor.encode('ascii')).decode('utf-8').split('|')
+    return datetime.fromisoformat(timestamp), int(message_id)
+
 @web_bp.route('/chat_history', methods=['GET'])
 def chat_history():
-    session_id = request.args.get('session_id') or request.cookies.get('session_id') or request.headers.get('X-Session-Id')
-    if not session_id:
-        session_id = 'default'  # fallback for demo
-    # For demo, just return the last 50 messages (in real app, filter by session_id or user)
-    messages = Message.query.order_by(Message.timestamp.asc()).limit(50).all()
-    messages_json = [
-        {
-            'text': m.text,
-            'sender_type': m.sender_type,
-            'timestamp': m.timestamp.isoformat() if m.timestamp else datetime.utcnow().isoformat()
-        } for m in messages
-    ]
-    return jsonify({'messages': messages_json}) 
\ No newline at end of file
+    """Newest-first page of a web chat session's (or SMS user's) messages.
+
+    Pass `before` (the previous response's `next_cursor`) for older pages.
+    Responses carry an ETag that changes only when a message is added or the
+    retention job archives some of the scope's messages, so an unchanged
+    history costs two index lookups and a 304.
+    Pass `archived=1` to continue into messages moved out by the retention job.
+    """
+    user_id = request.args.get('user_id', type=int)
+    if user_id is not None:
+        scope = {'user_id': user_id}
+    else:
+        session_id = request.args.get('session_id') or request.cookies.get('session_id') or request.headers.get('X-Session-Id')
+        if not session_id:
+            session_id = 'default'  # fallback for demo
+        scope = {'session_id': session_id}
+
+    limit = min(max(request.args.get('limit', 50, type=int), 1), MAX_HISTORY_PAGE)
+    cursor = request.args.get('before')
+    include_archived = request.args.get('archived', '0').lower() in ('1', 'true')
+    try:
+        before = decode_cursor(cursor) if cursor else None
+    except ValueError:
+        return jsonify({'error': 'Invalid cursor'}), 400
+
+    # Older pages change only when the retention job archives messages out of
+    # them; the newest page also changes when a message is added
+    version = cursor or Message.get_latest_id(**scope)
+    archived_version = ArchivedMessage.get_latest_id(**scope)
+    etag = hashlib.sha1(f"{sorted(scope.items())}|{limit}|{version}|{archived_version}|{include_archived}".encode('utf-8')).hexdigest()
+    if etag in request.if_none_match:
+        response = Response(status=304)
+    else:
+        messages = Message.get_page(before, limit + 1, **scope)
+        if include_archived and len(messages) <= limit:
+            # Archived messages are all older than live ones; continue the keyset there
+            archive_before = (messages[-1].timestamp, messages[-1].id) if messages else before
+            messages += ArchivedMessage.get_page(archive_before, limit + 1 - len(messages), **scope)
+        has_more = len(messages) > limit
+        messages = messages[:limit]
+        response = jsonify({
+            'messages': [
+                {
+                    'text': m.text,
+                    'sender_type': m.sender_type,
+                    'timestamp': m.timestamp.isoformat() if m.timestamp else datetime.utcnow().isoformat()
+                } for m in messages
+            ],
+            'next_cursor': encode_cursor(messages[-1]) if has_more else None
+        })
+
+    response.set_etag(etag)
+    response.headers['Cache-Control'] = 'private, no-cache'
+    return response
@@ -0,0 +1,147 @@
+import asyncio
+import threading
+from collections import deque
+
+class _Waiter:
+    """A queued caller: a thread blocked on `event`, or a task awaiting `future` on `loop`."""
+    __slots__ = ('event', 'loop', 'future', 'granted')
+
+    def __init__(self, loop=None):
+        self.loop = loop
+        self.event = None if loop else threading.Event()
+        self.future = loop.create_future() if loop else None
+        self.granted = False
+
+def _resolve(future):
+    if not future.done():
+        future.set_result(True)
+
+class AdmissionController:
+    """Caps concurrent calls to a backend and sheds load beyond a bounded queue.
+
+    Up to `max_in_flight` callers are admitted at once. Up to `max_queue` more
+    wait at most `queue_timeout` seconds for a slot; everyone else is rejected
+    immediately so they can fall back to a cheap reply. Threads and asyncio
+    tasks wait in one FIFO queue, and a released slot is handed straight to
+    the oldest waiter, so neither kind can overtake the other.
+    """
+
+    def __init__(self, max_in_flight=16, max_queue=64, queue_timeout=5.0):
+        self.max_in_flight = max_in_flight
+        self.max_queue = max_queue
+        self.queue_timeout = queue_timeout
+        self.in_flight = 0
+        self.admitted = 0
+        self.queued = 0
+        self.rejected_full = 0
+        self.rejected_timeout = 0
+        self.peak_in_flight = 0
+        self._waiters = deque()
+        self._lock = threading.Lock()
+
+    @property
+    def waiting(self):
+        return len(self._waiters)
+
+    def configure(self, max_in_flight, max_queue, queue_timeout):
+        with self._lock:
+            self.max_in_flight = max_in_flight
+            self.max_queue = max_queue
+            self.queue_timeout = queue_timeout
+            self._grant_waiters()
+
+    def try_acquire(self):
+        """Take a slot if one is free and nobody is queued, without waiting."""
+        with self._lock:
+            if self.in_flight < self.max_in_flight and not self._waiters:
+                self._admit()
+                return True
+            return False
+
+    def acquire(self):
+        """Take a slot, waiting in the bounded queue if necessary. Returns False if shed."""
+        waiter = self._enqueue(None)
+        if isinstance(waiter, bool):
+            return waiter
+        waiter.event.wait(self.queue_timeout)
+        return self._finish_wait(waiter)
+
+    async def acquire_async(self):
+        """Async version of `acquire` that waits on the event loop without holding a thread."""
+        waiter = self._enqueue(asyncio.get_running_loop())
+        if isinstance(waiter, bool):
+            return waiter
+        try:
+            await asyncio.wait_for(asyncio.shield(waiter.future), self.queue_timeout)
+        except asyncio.TimeoutError:
+            pass
+        except BaseException:
+            # Cancelled while queued: give back a slot granted in the meantime
+            if self._finish_wait(waiter):
+                self.release()
+            raise
+        return self._finish_wait(waiter)
+
+    def release(self):
+        with self._lock:
+            self.in_flight -= 1
+            self._grant_waiters()
+
+    def _enqueue(self, loop):
+        """Admit now (True), shed (False), or return a queued _Waiter."""
+        with self._lock:
+            if self.in_flight < self.max_in_flight and not self._waiters:
+                self._admit()
+                return True
+            if len(self._waiters) >= self.max_queue:
+                self.rejected_full += 1
+                return False
+            waiter = _Waiter(loop)
+            self._waiters.append(waiter)
+            self.queued += 1
+            return waiter
+
+    def _finish_wait(self, waiter):
+        """Return True if `waiter` was handed a slot, else leave the queue as timed out."""
+        with self._lock:
+            if waiter.granted:
+                return True
+            self._waiters.remove(waiter)
+            self.rejected_timeout += 1
+            return False
+
+    def _grant_waiters(self):
+        # Hand free slots to the oldest waiters; called with the lock held
+        while self._waiters and self.in_flight < self.max_in_flight:
+            waiter = self._waiters.popleft()
+            if waiter.loop is None:
+                waiter.granted = True
+                self._admit()
+                waiter.event.set()
+                continue
+            try:
+                waiter.loop.call_soon_threadsafe(_resolve, waiter.future)
+            except RuntimeError:
+                continue  # Its event loop has closed; nobody is waiting any more
+            waiter.granted = True
+            self._admit()
+
+    def _admit(self):
+        self.in_flight += 1
+        self.admitted += 1
+        self.peak_in_flight = max(self.peak_in_flight, self.in_flight)
+
+    def stats(self):
+        """Return current load and admission counters."""
+        with self._lock:
+            return {
+                "max_in_flight": self.max_in_flight,
+                "max_queue": self.max_queue,
+                "in_flight": self.in_flight,
+                "waiting": len(self._waiters),
+                "peak_in_flight": self.peak_in_flight,
+                "admitted": self.admitted,
+                "queued": self.queued,
+                "rejected_full": self.rejected_full,
+                "rejected_timeout": self.rejected_timeout
+            }
@@ -1,17 +1,45 @@
+import asyncio
+import time
 import google.generativeai as genai
 import logging
 from flask import current_app
+from app.services.http_client import http_client
+from app.services.gemini_client import gemini_client
+from app.services.response_cache import response_cache
+from app.services.prompt_builder import prompt_builder
+from app.services.admission import AdmissionController
+from app.services.log_pipeline import log_payload
+from app.services.metrics import metrics
+from app.services.tracing import span
+
+UNAVAILABLE_REPLY = "Sorry, I'm currently unavailable. Please try again later."
+EMPTY_REPLY = "I'm having trouble understanding. Could you rephrase?"
+ERROR_REPLY = "Technical error. Please try again."
 
 class AIService:
     def __init__(self):
         self.model = None
+        self.api_key = None
+        self.degraded_reply = None
+        self.admission = AdmissionController()
         self.initialized = False
 
     def initialize(self):
         """Initialize Gemini AI service."""
+        config = current_app.config
+        self.admission.configure(
+            config['AI_MAX_IN_FLIGHT'],
+            config['AI_MAX_QUEUE'],
+            config['AI_QUEUE_TIMEOUT']
+        )
+        self.degraded_reply = config['AI_DEGRADED_REPLY']
+
         try:
-            genai.configure(api_key=current_app.config['GEMINI_API_KEY'])
+            self.api_key = config['GEMINI_API_KEY']
+            # Use the REST transport so requests go through the shared keep-alive pool
+            genai.configure(api_key=self.api_key, transport='rest')
             self.model = genai.GenerativeModel('gemini-2.0-flash')
+            gemini_client.attach_pool(self.model, http_client)
             self.initialized = True
             logging.info("Gemini Model Initialized successfully.")
             return True
@@ -19,50 +47,199 @@ class AIService:
             logging.error(f"Failed to initialize Gemini Model: {e}")
             return False
 
-    def generate_response(self, message_text, conversation_history):
-        """Generate AI response using Gemini."""
+    def generate_response(self, message_text, conversation_history, use_cache=True):
+        """Generate AI response using Gemini.
+
+        Answers are served from the response cache when enabled; pass
+        `use_cache=False` to always ask the model.
+        """
+        if not self.initialized:
+            logging.error("AI model not initialized")
+            return UNAVAILABLE_REPLY
+
+        with span('response_cache'):
+            cache_key, cached = self._check_cache(message_text, conversation_history, use_cache)
+        if cached is not None:
+            return cached
+
+        with span('admission'):
+            admitted = self.admission.acquire()
+        if not admitted:
+            logging.warning("🤖 Gemini at capacity, sending degraded reply")
+            metrics.count('gemini', 'rejected')
+            return self.degraded_reply
+
+        try:
+            with span('prompt_build'):
+                prompt = prompt_builder.build(message_text, conversation_history)
+
+            logging.debug(f"🤖 Sending prompt to Gemini...")
+
+            with metrics.time('gemini'):
+                response = self.model.generate_content(prompt)
+
+            ai_text = self._response_text(response)
+            if ai_text is None:
+                return EMPTY_REPLY
+            if cache_key:
+                with span('response_cache'):
+                    response_cache.put(cache_key, message_text, ai_text)
+            return ai_text
+
+        except Exception as e:
+            logging.error(f"Error generating AI response: {e}")
+            metrics.count('gemini', 'failure')
+            return ERROR_REPLY
+        finally:
+            self.admission.release()
+
+    async def generate_response_async(self, message_text, conversation_history, use_cache=True):
+        """Async version of `generate_response` for use on an event loop.
+
+        Gemini is called through the SDK's asyncio gRPC client, so many calls can
+        be in flight at once without holding a thread each.
+        """
+        if not self.initialized:
+            logging.error("AI model not initialized")
+            return UNAVAILABLE_REPLY
+
+        cache_key, cached = await asyncio.to_thread(self._check_cache, message_text, conversation_history, use_cache)
+        if cached is not None:
+            return cached
+
+        if not await self.admission.acquire_async():
+            logging.warning("🤖 Gemini at capacity, sending degraded reply")
+            metrics.count('gemini', 'rejected')
+            return self.degraded_reply
+
+        try:
+            prompt = prompt_builder.build(message_text, conversation_history)
+
+            logging.debug(f"🤖 Sending prompt to Gemini (async)...")
+
+            gemini_client.ensure_async_client(self.model, self.api_key)
+            with metrics.time('gemini'):
+                response = await self.model.generate_content_async(prompt)
+
+            ai_text = self._response_text(response)
+            if ai_text is None:
+                return EMPTY_REPLY
+            if cache_key:
+                await asyncio.to_thread(response_cache.put, cache_key, message_text, ai_text)
+            return ai_text
+
+        except Exception as e:
+            logging.error(f"Error generating AI response: {e}")
+            metrics.count('gemini', 'failure')
+            return ERROR_REPLY
+        finally:
+            self.admission.release()
+
+    def generate_response_stream(self, message_text, conversation_history, use_cache=True):
+        """Generate an AI response, yielding text chunks as Gemini produces them.
+
+        The concatenated chunks equal what `generate_response` would return,
+        including the SMS-length cut-off.
+        """
         if not self.initialized:
             logging.error("AI model not initialized")
-            return "Sorry, I'm currently unavailable. Please try again later."
+            yield UNAVAILABLE_REPLY
+            return
+
+        cache_key, cached = self._check_cache(message_text, conversation_history, use_cache)
+        if cached is not None:
+            yield cached
+            return
 
+        if not self.admission.acquire():
+            logging.warning("🤖 Gemini at capacity, sending degraded reply")
+            metrics.count('gemini', 'rejected')
+            yield self.degraded_reply
+            return
+
+        full_text = ''
+        emitted = 0
+        started = time.perf_counter()
         try:
-            prompt = f"""You are an AI SMS Learning Tutor for skilled artisans and workers in Nairobi, Kenya.
-
-Your role:
-- Help with work-related questions, business advice, and skill development
-- Provide practical solutions for craftspeople, technicians, and small business owners
-- Keep responses SHORT (under 160 characters for SMS)
-- Be encouraging, supportive, and culturally aware
-- Focus on actionable advice that works in Nairobi context
-- Use simple, clear language
-
-Conversation history:
-{conversation_history}
-
-Current message: {message_text}
-
-Provide a helpful, concise SMS response (max 160 characters):"""
-
-            logging.info(f"🤖 Sending prompt to Gemini...")
-            
-            response = self.model.generate_content(prompt)
-            
-            if response.candidates and response.candidates[0].content.parts:
-                ai_text = response.candidates[0].content.parts[0].text.strip()
-                
-                # Ensure response is SMS-friendly
+            prompt = prompt_builder.build(message_text, conversation_history)
+
+            logging.debug(f"🤖 Sending prompt to Gemini (streaming)...")
+
+            response = self.model.generate_content(prompt, stream=True)
+            for chunk in response:
+                if not (chunk.candidates and chunk.candidates[0].content.parts):
+                    continue
+                full_text = (full_text + chunk.candidates[0].content.parts[0].text).lstrip()
+                ai_text = full_text.rstrip()
+
+                # Ensure response is SMS-friendly; hold back the last 3 characters
+                # until we know whether they will be replaced by "..."
                 if len(ai_text) > 160:
-                    ai_text = ai_text[:157] + "..."
-                
-                logging.info(f"🤖 Generated response ({len(ai_text)} chars): {ai_text}")
-                return ai_text
-            else:
+                    yield ai_text[emitted:157] + "..."
+                    emitted = 160
+                    full_text = ai_text[:157] + "..."
+                    break
+                ready = min(len(ai_text), 157)
+                if ready > emitted:
+                    yield ai_text[emitted:ready]
+                    emitted = ready
+
+            metrics.observe('gemini', time.perf_counter() - started)
+            ai_text = full_text.strip()
+            if not ai_text:
                 logging.warning("Empty Gemini response")
-                return "I'm having trouble understanding. Could you rephrase?"
-                
+                metrics.count('gemini', 'empty')
+                yield EMPTY_REPLY
+                return
+            if len(ai_text) > emitted:
+                yield ai_text[emitted:]
+                emitted = len(ai_text)
+
+            logging.info(f"🤖 Streamed response ({len(ai_text)} chars)")
+            log_payload("Gemini response: %s", ai_text)
+            metrics.count('gemini', 'success')
+            if cache_key:
+                response_cache.put(cache_key, message_text, ai_text)
+
         except Exception as e:
-            logging.error(f"Error generating AI response: {e}")
-            return "Technical error. Please try again."
+            logging.error(f"Error streaming AI response: {e}")
+            metrics.count('gemini', 'failure')
+            if not emitted:
+                yield ERROR_REPLY
+        finally:
+            self.admission.release()
+
+    def _check_cache(self, message_text, conversation_history, use_cache):
+        """Return (cache_key, cached_response); cache_key is None when not caching."""
+        if not response_cache.enabled:
+            return None, None
+        if not use_cache:
+            response_cache.bypass()
+            return None, None
+
+        cache_key = response_cache.make_key(message_text, conversation_history)
+        cached = response_cache.get(cache_key)
+        if cached is not None:
+            logging.info(f"🤖 Served cached response ({len(cached)} chars)")
+        return cache_key, cached
+
+    def _response_text(self, response):
+        """Extract an SMS-sized reply from a Gemini response, or None if it is empty."""
+        if response.candidates and response.candidates[0].content.parts:
+            ai_text = response.candidates[0].content.parts[0].text.strip()
+
+            # Ensure response is SMS-friendly
+            if len(ai_text) > 160:
+                ai_text = ai_text[:157] + "..."
+
+            logging.info(f"🤖 Generated response ({len(ai_text)} chars)")
+            log_payload("Gemini response: %s", ai_text)
+            metrics.count('gemini', 'success')
+            return ai_text
+
+        logging.warning("Empty Gemini response")
+        metrics.count('gemini', 'empty')
+        return None
 
 # Create a singleton instance
-ai_service = AIService() 
\ No newline at end of file
+ai_service = AIService()
@@ -0,0 +1,384 @@
+import json
+import logging
+import time
+from datetime import datetime
+from flask import current_app
+from sqlalchemy import case, func, insert
+from app.models.models import db, User, Message, Campaign, Job
+from app.services.sms_service import sms_service
+from app.services.job_queue import job_queue
+from app.services.conversation_cache import conversation_cache
+
+RUN_CAMPAIGN = 'run_campaign'
+
+# Audience filters accepted by `create`, and whether their value is a datetime
+AUDIENCE_FILTERS = {
+    'active_since': True,
+    'inactive_since': True,
+    'created_after': True,
+    'created_before': True,
+    'phone_prefix': False
+}
+
+class CampaignService:
+    """Sends a message to every user matching an audience filter.
+
+    A campaign runs as one background job. Users are read in chunks ordered
+    by id and each chunk goes out as multi-recipient Africa's Talking
+    requests, paced to the campaign's TPS. Each chunk is claimed (recorded in
+    `claimed_through`) before it is sent, so a re-claimed job or a second
+    runner never sends a chunk twice. If a worker dies mid-send, the next run
+    counts the claimed chunk as failed, since some of it may have gone out,
+    and carries on after it. `job_id` points at the job working on the
+    campaign, and is only cleared together with that job's completion.
+    """
+
+    def __init__(self):
+        self.default_tps = 50.0
+        self.default_chunk_size = 500
+        self.initialized = False
+
+    def initialize(self):
+        """Load campaign defaults from the application config."""
+        config = current_app.config
+        self.default_tps = config['CAMPAIGN_TPS']
+        self.default_chunk_size = config['CAMPAIGN_CHUNK_SIZE']
+        self.initialized = True
+        logging.info(f"Campaign service initialized ({self.default_tps} TPS, chunks of {self.default_chunk_size})")
+        return True
+
+    def create(self, name, message, audience=None, tps=None, chunk_size=None):
+        """Create a campaign and queue it. Raises ValueError for a bad audience or settings."""
+        audience = audience or {}
+        query = self.audience_query(audience)
+        tps = float(tps or self.default_tps)
+        chunk_size = int(chunk_size or self.default_chunk_size)
+        if tps <= 0 or chunk_size <= 0:
+            raise ValueError("tps and chunk_size must be positive")
+        # A chunk must finish well inside the job's visibility timeout, or the
+        # job is handed to another worker while the chunk is still being paced
+        max_chunk_seconds = job_queue.visibility_timeout / 2
+        if chunk_size / tps > max_chunk_seconds:
+            raise ValueError(f"chunk_size / tps must be at most {max_chunk_seconds:g} seconds; lower chunk_size or raise tps")
+
+        max_user_id = db.session.query(func.max(User.id)).scalar() or 0
+        campaign = Campaign(
+            name=name,
+            message=message,
+            audience=json.dumps(audience),
+            tps=tps,
+            chunk_size=chunk_size,
+            max_user_id=max_user_id,
+            total=query.filter(User.id <= max_user_id).count()
+        )
+        db.session.add(campaign)
+        db.session.flush()
+
+        # The campaign and its job are committed together
+        job = job_queue.enqueue(RUN_CAMPAIGN, {'campaign_id': campaign.id}, commit=False)
+        db.session.flush()
+        campaign.job_id = job.id
+        db.session.commit()
+        job_queue.dispatch(job)
+        logging.info(f"📣 Campaign {campaign.id} '{name}' queued for {campaign.total} users")
+        return campaign
+
+    def audience_query(self, audience):
+        """Build the User query for an audience filter dict."""
+        unknown = set(audience) - set(AUDIENCE_FILTERS)
+        if unknown:
+            raise ValueError(f"Unknown audience filters: {', '.join(sorted(unknown))}")
+
+        values = {}
+        for key, value in audience.items():
+            if AUDIENCE_FILTERS[key]:
+                try:
+                    values[key] = datetime.fromisoformat(value)
+                except (TypeError, ValueError):
+                    raise ValueError(f"{key} must be an ISO 8601 datetime")
+            else:
+                values[key] = str(value)
+
+        query = User.query
+        if 'active_since' in values:
+            query = query.filter(User.last_active >= values['active_since'])
+        if 'inactive_since' in values:
+            query = query.filter(User.last_active < values['inactive_since'])
+        if 'created_after' in values:
+            query = query.filter(User.created_at >= values['created_after'])
+        if 'created_before' in values:
+            query = query.filter(User.created_at < values['created_before'])
+        if 'phone_prefix' in values:
+            # Numbers are stored in E.164, e.g. "+2547" for Kenyan mobiles
+            query = query.filter(User.phone_number.startswith(values['phone_prefix']))
+        return query
+
+    def run(self, payload):
+        """Job handler: send the remaining chunks of a campaign."""
+        campaign = db.session.get(Campaign, payload['campaign_id'])
+        if campaign is None:
+            return
+        if campaign.status not in ('pending', 'running') and self._release(campaign.id):
+            return
+
+        if not sms_service.initialized:
+            # Raise so the job is retried rather than marking every recipient failed
+            raise RuntimeError("SMS service not initialized")
+
+        campaign_id = campaign.id
+        message = campaign.message
+        tps = campaign.tps
+        chunk_size = campaign.chunk_size
+        query = self.audience_query(json.loads(campaign.audience)) \
+            .filter(User.id <= campaign.max_user_id) \
+            .with_entities(User.id, User.phone_number) \
+            .order_by(User.id)
+
+        if campaign.status == 'pending':
+            campaign.status = 'running'
+            campaign.started_at = datetime.utcnow()
+            db.session.commit()
+            logging.info(f"📣 Campaign {campaign_id} started")
+        else:
+            logging.info(f"📣 Campaign {campaign_id} resuming after user {campaign.cursor}")
+
+        if campaign.claimed_through is not None and not self._recover_chunk(campaign, query):
+            return
+
+        cursor = campaign.cursor
+        next_send_at = time.monotonic()
+        while True:
+            rows = query.filter(User.id > cursor).limit(chunk_size).all()
+            if not rows:
+                if self._finish(campaign):
+                    return
+                continue  # Paused as it finished, then resumed
+            last_id = rows[-1][0]
+
+            # Claim the chunk, with the job heartbeat, before pacing and sending it.
+            # The check stops a second runner of the same campaign (e.g. a job
+            # re-claimed after its worker stalled) from sending a chunk twice.
+            claimed = Campaign.query.filter(
+                Campaign.id == campaign_id,
+                Campaign.cursor == cursor,
+                Campaign.claimed_through.is_(None)
+            ).update({Campaign.claimed_through: last_id}, synchronize_session=False)
+            if not claimed:
+                db.session.rollback()
+                logging.warning(f"📣 Campaign {campaign_id} advanced past user {cursor} by another worker, stopping")
+                return
+            job_queue.heartbeat()
+            db.session.commit()
+
+            # Pace chunks so recipients go out at no more than `tps` per second
+            delay = next_send_at - time.monotonic()
+            if delay > 0:
+                time.sleep(delay)
+            next_send_at = max(next_send_at, time.monotonic()) + len(rows) / tps
+
+            results = sms_service.send_bulk([(phone, message) for _, phone in rows], chunk_size=len(rows))
+            sent = 0
+            message_rows = []
+            for (user_id, _), result in zip(rows, results):
+                succeeded = result.get('status') == 'Success'
+                sent += succeeded
+                message_rows.append({
+                    'user_id': user_id,
+                    'sender_type': 'ai',
+                    'text': message,
+                    'status': 'sent' if succeeded else 'failed',
+                    'provider_message_id': result.get('messageId')
+                })
+
+            # Record the chunk's results, its messages and the job heartbeat in one commit
+            recorded = Campaign.query.filter(
+                Campaign.id == campaign_id,
+                Campaign.claimed_through == last_id
+            ).update({
+                Campaign.cursor: last_id,
+                Campaign.claimed_through: None,
+                Campaign.sent: Campaign.sent + sent,
+                Campaign.failed: Campaign.failed + (len(rows) - sent),
+                Campaign.updated_at: datetime.utcnow()
+            }, synchronize_session=False)
+            if not recorded:
+                db.session.rollback()
+                logging.warning(f"📣 Campaign {campaign_id} chunk through user {last_id} was already counted by another worker, stopping")
+                return
+            db.session.execute(insert(Message), message_rows)
+            job_queue.heartbeat()
+            db.session.commit()
+            cursor = last_id
+
+            for user_id, _ in rows:
+                conversation_cache.append(user_id, 'ai', message)
+
+            # Reloaded after the commit, so a pause from another request is seen here
+            if campaign.status != 'running' and self._release(campaign_id):
+                logging.info(f"📣 Campaign {campaign_id} {campaign.status} after user {cursor}")
+                return
+
+    def _recover_chunk(self, campaign, query):
+        """Count a chunk claimed by a worker that died mid-send as failed.
+
+        Some of it may have been sent, so it is not sent again. Returns False
+        if another worker recovered it first.
+        """
+        cursor, claimed_through = campaign.cursor, campaign.claimed_through
+        lost = query.filter(User.id > cursor, User.id <= claimed_through).count()
+        error = f"Worker stopped while sending to users {cursor + 1}-{claimed_through}; {lost} recipients counted as failed"
+        recovered = Campaign.query.filter(
+            Campaign.id == campaign.id,
+            Campaign.cursor == cursor,
+            Campaign.claimed_through == claimed_through
+        ).update({
+            Campaign.cursor: claimed_through,
+            Campaign.claimed_through: None,
+            Campaign.failed: Campaign.failed + lost,
+            Campaign.last_error: error,
+            Campaign.updated_at: datetime.utcnow()
+        }, synchronize_session=False)
+        if not recovered:
+            db.session.rollback()
+            logging.warning(f"📣 Campaign {campaign.id} in-flight chunk was recovered by another worker, stopping")
+            return False
+        job_queue.heartbeat()
+        db.session.commit()
+        logging.warning(f"📣 Campaign {campaign.id}: {error}")
+        return True
+
+    def _finish(self, campaign):
+        """Complete a campaign whose audience is exhausted, with its job.
+
+        It is only marked completed if every recipient was counted as sent or
+        failed; otherwise (e.g. users left the audience while it ran) it is
+        marked failed with the shortfall. Returns False if it was paused and
+        then resumed in the meantime.
+        """
+        processed = campaign.sent + campaign.failed
+        values = {Campaign.job_id: None, Campaign.completed_at: datetime.utcnow()}
+        if processed == campaign.total:
+            values[Campaign.status] = 'completed'
+        else:
+            values[Campaign.status] = 'failed'
+            values[Campaign.last_error] = f"Audience exhausted after {processed} of {campaign.total} recipients"
+        finished = Campaign.query.filter(Campaign.id == campaign.id, Campaign.status == 'running') \
+            .update(values, synchronize_session=False)
+        if not finished:
+            db.session.rollback()
+            return self._release(campaign.id)
+        job_queue.complete_current()
+        db.session.commit()
+        if campaign.status == 'completed':
+            logging.info(f"📣 Campaign {campaign.id} completed: {campaign.sent} sent, {campaign.failed} failed")
+        else:
+            logging.error(f"📣 Campaign {campaign.id} failed: {campaign.last_error}")
+        return True
+
+    def _release(self, campaign_id):
+        """Detach and complete this job if the campaign is no longer running.
+
+        Checked in one conditional UPDATE, so a concurrent `resume` either sees
+        the job as live (and this returns False so the runner carries on) or
+        sees it gone and queues a new one.
+        """
+        released = Campaign.query.filter(Campaign.id == campaign_id, Campaign.status.notin_(['pending', 'running'])) \
+            .update({Campaign.job_id: None}, synchronize_session=False)
+        if released:
+            job_queue.complete_current()
+        db.session.commit()
+        return bool(released)
+
+    def pause(self, campaign):
+        """Stop a campaign after its current chunk."""
+        if campaign.status not in ('pending', 'running'):
+            return False
+        Campaign.query.filter(Campaign.id == campaign.id, Campaign.status.in_(['pending', 'running'])) \
+            .update({Campaign.status: 'paused'}, synchronize_session=False)
+        db.session.commit()
+        return True
+
+    def resume(self, campaign):
+        """Continue a paused or failed campaign from its cursor.
+
+        While the campaign's job is still live (e.g. finishing the chunk it was
+        paused in) it simply carries on and no second job is queued. Each case
+        is decided by one conditional UPDATE, so a job exiting on the pause at
+        the same moment cannot leave the campaign running without a job.
+        """
+        def live_job(*criteria):
+            return db.session.query(Job.id).filter(Job.id == Campaign.job_id, Job.name == RUN_CAMPAIGN, *criteria).exists()
+
+        values = {
+            Campaign.status: case((Campaign.started_at.is_(None), 'pending'), else_='running'),
+            Campaign.last_error: None
+        }
+
+        carried_on = Campaign.query.filter(Campaign.id == campaign.id, Campaign.status.in_(['paused', 'failed']), live_job()) \
+            .update(values, synchronize_session=False)
+        if carried_on:
+            db.session.commit()
+            return True
+
+        # No live job (or a running campaign whose job has gone): queue a new one
+        job = job_queue.enqueue(RUN_CAMPAIGN, {'campaign_id': campaign.id}, commit=False)
+        db.session.flush()
+        # The new job may reuse the id of a vanished one the campaign still points at
+        queued = Campaign.query.filter(Campaign.id == campaign.id, Campaign.status != 'completed', ~live_job(Job.id != job.id)) \
+            .update({**values, Campaign.job_id: job.id}, synchronize_session=False)
+        if not queued:
+            db.session.rollback()
+            return False
+        db.session.commit()
+        job_queue.dispatch(job)
+        return True
+
+    def progress(self, campaign):
+        """Return a campaign's counts, completion and throughput."""
+        processed = campaign.sent + campaign.failed
+        elapsed = None
+        throughput = None
+        eta = None
+        if campaign.started_at:
+            end = campaign.completed_at or campaign.updated_at or campaign.started_at
+            elapsed = (end - campaign.started_at).total_seconds()
+            if elapsed > 0:
+                throughput = processed / elapsed
+                if campaign.status == 'running':
+                    eta = (campaign.total - processed) / throughput if throughput else None
+
+        return {
+            "id": campaign.id,
+            "name": campaign.name,
+            "status": campaign.status,
+            "audience": json.loads(campaign.audience),
+            "tps": campaign.tps,
+            "chunk_size": campaign.chunk_size,
+            "total": campaign.total,
+            "sent": campaign.sent,
+            "failed": campaign.failed,
+            "processed": processed,
+            "completion": round(processed / campaign.total, 4) if campaign.total else 1.0,
+            "elapsed_seconds": round(elapsed, 1) if elapsed is not None else None,
+            "throughput_per_second": round(throughput, 2) if throughput else None,
+            "eta_seconds": round(eta) if eta is not None else None,
+            "last_error": campaign.last_error,
+            "created_at": campaign.created_at.isoformat() if campaign.created_at else None,
+            "started_at": campaign.started_at.isoformat() if campaign.started_at else None,
+            "completed_at": campaign.completed_at.isoformat() if campaign.completed_at else None
+        }
+
+def mark_campaign_failed(payload, error):
+    """Record the error once a campaign job is dead-lettered."""
+    campaign = db.session.get(Campaign, payload['campaign_id'])
+    if campaign is not None:
+        campaign.status = 'failed'
+        campaign.last_error = str(error)
+        campaign.job_id = None
+        db.session.commit()
+    logging.error(f"📣 Campaign {payload['campaign_id']} failed: {error}")
+
+# Create a singleton instance
+campaign_service = CampaignService()
+
+job_queue.register(RUN_CAMPAIGN, campaign_service.run, on_failure=mark_campaign_failed)
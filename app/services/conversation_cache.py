@@ -0,0 +1,103 @@
+import logging
+import threading
+import time
+from collections import OrderedDict, deque
+from flask import current_app
+from app.models.models import Message
+
+class ConversationCache:
+    """Bounded LRU cache of each user's most recent conversation turns.
+
+    Entries are loaded from the database on a miss and kept current by writing
+    new turns through as messages are saved. Each server process has its own
+    cache, so entries expire after a TTL to bound staleness across workers.
+    """
+
+    def __init__(self):
+        self.max_users = 0
+        self.max_turns = 10
+        self.ttl = 300
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.initialized = False
+        self._entries = OrderedDict()  # user_id -> (deque of turns, expires_at)
+        self._lock = threading.Lock()
+
+    def initialize(self):
+        """Load cache limits from the application config."""
+        config = current_app.config
+        self.max_users = config['CONVERSATION_CACHE_SIZE']
+        self.max_turns = config['CONVERSATION_HISTORY_LIMIT']
+        self.ttl = config['CONVERSATION_CACHE_TTL']
+        self.clear()
+        self.initialized = True
+        logging.info(f"Conversation cache initialized ({self.max_users} users, {self.max_turns} turns, {self.ttl}s TTL)")
+        return True
+
+    def get_history(self, user_id):
+        """Return the user's recent history as a prompt transcript."""
+        turns = self.get(user_id)
+        if turns is None:
+            turns = Message.get_recent_turns(user_id, self.max_turns)
+            self.load(user_id, turns)
+        return Message.format_history(turns)
+
+    def get(self, user_id):
+        """Return a copy of the cached turns for a user, or None on a miss."""
+        with self._lock:
+            entry = self._entries.get(user_id)
+            if entry is not None and entry[1] < time.monotonic():
+                del self._entries[user_id]
+                entry = None
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(user_id)
+            self.hits += 1
+            return list(entry[0])
+
+    def load(self, user_id, turns):
+        """Cache turns read from the database for a user."""
+        if self.max_users <= 0 or user_id is None:
+            return
+        with self._lock:
+            self._entries[user_id] = (deque(turns, maxlen=self.max_turns), time.monotonic() + self.ttl)
+            self._entries.move_to_end(user_id)
+            while len(self._entries) > self.max_users:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def append(self, user_id, sender_type, text):
+        """Write a newly saved turn through to a cached conversation.
+
+        Users without an entry are left alone; their next read loads from the
+        database, which already contains the turn.
+        """
+        with self._lock:
+            entry = self._entries.get(user_id)
+            if entry is not None:
+                entry[0].append((sender_type, text))
+
+    def invalidate(self, user_id):
+        with self._lock:
+            self._entries.pop(user_id, None)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self):
+        """Return cache size and hit/miss counters."""
+        lookups = self.hits + self.misses
+        return {
+            "users": len(self._entries),
+            "max_users": self.max_users,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hit_rate": round(self.hits / lookups, 3) if lookups else None
+        }
+
+# Create a singleton instance
+conversation_cache = ConversationCache()
@@ -0,0 +1,55 @@
+import logging
+from sqlalchemy import event
+from sqlalchemy.engine import make_url
+
+def is_sqlite(uri):
+    return make_url(uri).get_backend_name() == 'sqlite'
+
+def is_sqlite_memory(uri):
+    url = make_url(uri)
+    return url.get_backend_name() == 'sqlite' and url.database in (None, '', ':memory:')
+
+def engine_options(config):
+    """SQLAlchemy engine options for the configured database.
+
+    SQLite gets per-connection pragmas instead (see sqlite_pragmas); other
+    databases get a bounded, pre-pinged and recycled connection pool.
+    """
+    if is_sqlite(config['SQLALCHEMY_DATABASE_URI']):
+        return {}
+    return {
+        'pool_size': config['DB_POOL_SIZE'],
+        'max_overflow': config['DB_MAX_OVERFLOW'],
+        'pool_timeout': config['DB_POOL_TIMEOUT'],
+        'pool_recycle': config['DB_POOL_RECYCLE'],
+        'pool_pre_ping': config['DB_POOL_PRE_PING']
+    }
+
+def sqlite_pragmas(config):
+    """PRAGMA statements run on every new SQLite connection."""
+    pragmas = [
+        f"PRAGMA busy_timeout={config['SQLITE_BUSY_TIMEOUT']}",
+        f"PRAGMA synchronous={config['SQLITE_SYNCHRONOUS']}",
+        f"PRAGMA cache_size={config['SQLITE_CACHE_SIZE']}",
+        f"PRAGMA mmap_size={config['SQLITE_MMAP_SIZE']}",
+        "PRAGMA temp_store=MEMORY"
+    ]
+    # An in-memory database has no journal file to switch to WAL
+    if not is_sqlite_memory(config['SQLALCHEMY_DATABASE_URI']):
+        pragmas.insert(0, f"PRAGMA journal_mode={config['SQLITE_JOURNAL_MODE']}")
+    return pragmas
+
+def configure_engine(engine, config):
+    """Apply the SQLite performance profile to every connection the engine opens."""
+    if engine.dialect.name != 'sqlite':
+        return
+    pragmas = sqlite_pragmas(config)
+
+    @event.listens_for(engine, 'connect')
+    def apply_pragmas(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        for pragma in pragmas:
+            cursor.execute(pragma)
+        cursor.close()
+
+    logging.info(f"SQLite profile: journal_mode={config['SQLITE_JOURNAL_MODE']}, synchronous={config['SQLITE_SYNCHRONOUS']}, busy_timeout={config['SQLITE_BUSY_TIMEOUT']}ms")
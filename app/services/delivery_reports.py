@@ -0,0 +1,150 @@
+import logging
+import os
+import threading
+from flask import current_app
+from sqlalchemy import update
+from app.models.models import db, Message
+
+# Africa's Talking delivery statuses mapped to Message.status
+DELIVERY_STATUSES = {
+    'Sent': 'sent',
+    'Submitted': 'sent',
+    'Buffered': 'buffered',
+    'Success': 'delivered',
+    'Rejected': 'rejected',
+    'Failed': 'failed'
+}
+
+# Final statuses win over intermediate ones reported out of order
+FINAL_STATUSES = {'delivered', 'rejected', 'failed'}
+
+class DeliveryReportBuffer:
+    """Write-behind buffer applying delivery reports to messages in batches.
+
+    Reports are coalesced per provider message id in memory and written by a
+    background thread every DELIVERY_REPORT_FLUSH_INTERVAL milliseconds (or
+    sooner once DELIVERY_REPORT_MAX_BATCH are waiting), with one UPDATE per
+    status in a single transaction. `stop()` flushes what is still buffered;
+    reports buffered when a process dies without stopping are lost, leaving
+    those messages at their previous status.
+    """
+
+    def __init__(self):
+        self.flush_interval = 0.5
+        self.max_batch = 1000
+        self.received = 0
+        self.applied = 0
+        self.batches = 0
+        self.initialized = False
+        self._pending = {}  # provider_message_id -> status
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._stop = threading.Event()
+        self._thread = None
+        self._pid = None
+
+    def initialize(self):
+        """Load batching settings from the application config."""
+        config = current_app.config
+        self.flush_interval = config['DELIVERY_REPORT_FLUSH_INTERVAL'] / 1000
+        self.max_batch = config['DELIVERY_REPORT_MAX_BATCH']
+        self.initialized = True
+        logging.info(f"Delivery report buffer initialized (flush every {config['DELIVERY_REPORT_FLUSH_INTERVAL']}ms)")
+        return True
+
+    def start(self, app):
+        """Start the background flusher for this process (safe to call repeatedly)."""
+        if not self.initialized or self.flush_interval <= 0:
+            return
+        with self._lock:
+            if self._pid == os.getpid():
+                return
+            self._pid = os.getpid()
+            self._stop = threading.Event()
+            self._thread = threading.Thread(target=self._flush_loop, args=(app, self._stop), name="delivery-report-flusher", daemon=True)
+            self._thread.start()
+
+    def stop(self, timeout=10):
+        """Stop the flusher after it writes the reports still buffered."""
+        with self._lock:
+            thread, self._thread = self._thread, None
+            self._pid = None
+            self._stop.set()
+        self._wakeup.set()
+        if thread is not None and thread.is_alive():
+            thread.join(timeout)
+
+    def add(self, provider_message_id, provider_status):
+        """Buffer a delivery report. Returns False for an unknown status."""
+        status = DELIVERY_STATUSES.get(provider_status)
+        if status is None:
+            return False
+        with self._lock:
+            self.received += 1
+            current = self._pending.get(provider_message_id)
+            if current not in FINAL_STATUSES or status in FINAL_STATUSES:
+                self._pending[provider_message_id] = status
+            full = len(self._pending) >= self.max_batch
+        if full:
+            self._wakeup.set()
+        return True
+
+    def flush(self):
+        """Write buffered reports to the database. Returns how many were applied."""
+        with self._flush_lock:
+            with self._lock:
+                pending, self._pending = self._pending, {}
+            if not pending:
+                return 0
+
+            by_status = {}
+            for provider_message_id, status in pending.items():
+                by_status.setdefault(status, []).append(provider_message_id)
+
+            try:
+                for status, ids in by_status.items():
+                    for start in range(0, len(ids), self.max_batch):
+                        stmt = update(Message).where(Message.provider_message_id.in_(ids[start:start + self.max_batch]))
+                        if status not in FINAL_STATUSES:
+                            # Don't let a late intermediate report undo an applied final one
+                            stmt = stmt.where(Message.status.notin_(FINAL_STATUSES))
+                        db.session.execute(stmt.values(status=status), execution_options={'synchronize_session': False})
+                db.session.commit()
+            except Exception:
+                db.session.rollback()
+                # Put the batch back unless newer reports arrived for the same messages
+                with self._lock:
+                    for provider_message_id, status in pending.items():
+                        self._pending.setdefault(provider_message_id, status)
+                raise
+
+            self.applied += len(pending)
+            self.batches += 1
+            return len(pending)
+
+    def _flush_loop(self, app, stop):
+        while True:
+            self._wakeup.wait(self.flush_interval)
+            self._wakeup.clear()
+            try:
+                with app.app_context():
+                    applied = self.flush()
+                if applied:
+                    logging.info(f"📬 Applied {applied} delivery reports")
+            except Exception as e:
+                logging.error(f"Error applying delivery reports: {e}")
+            if stop.is_set():
+                return
+
+    def stats(self):
+        """Return buffer depth and batching counters."""
+        return {
+            "pending": len(self._pending),
+            "received": self.received,
+            "applied": self.applied,
+            "batches": self.batches
+        }
+
+# Create a singleton instance
+delivery_reports = DeliveryReportBuffer()
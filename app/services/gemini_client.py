@@ -0,0 +1,56 @@
+import logging
+import requests
+from google.generativeai import client as genai_client
+import google.ai.generativelanguage as glm
+
+class GeminiClientAdapter:
+    """Wires a GenerativeModel to our connection pool through SDK internals.
+
+    google-generativeai has no public hook for the HTTP session or the async
+    client, so this reaches into private attributes (`model._client`,
+    `_client._transport._session`, `model._async_client`). Each is checked
+    first; if an SDK upgrade has renamed them, the model keeps the SDK's own
+    clients and a warning is logged instead of failing initialization.
+    """
+
+    def __init__(self):
+        self.pooled = False
+        self._warned_async = False
+
+    def attach_pool(self, model, http_client):
+        """Send `model`'s REST calls through the shared pool. Returns True if pooled."""
+        self.pooled = False
+        try:
+            client = genai_client.get_default_generative_client()
+            session = client._transport._session
+        except AttributeError as e:
+            return self._fallback(f"REST transport has no session ({e})")
+        if not hasattr(model, '_client'):
+            return self._fallback("GenerativeModel has no _client")
+        if not isinstance(session, requests.Session):
+            return self._fallback(f"transport session is a {type(session).__name__}, not a requests.Session")
+
+        model._client = client
+        http_client.mount(session)
+        self.pooled = True
+        return True
+
+    def ensure_async_client(self, model, api_key):
+        """Create `model`'s async gRPC client on the running event loop, if the SDK lets us."""
+        if not hasattr(model, '_async_client'):
+            if not self._warned_async:
+                logging.warning("⚠️ GenerativeModel has no _async_client; using the SDK's default async client")
+                self._warned_async = True
+            return
+        if model._async_client is None:
+            # Created lazily so the gRPC channel binds to the running event loop
+            model._async_client = glm.GenerativeServiceAsyncClient(
+                client_options={'api_key': api_key}
+            )
+
+    def _fallback(self, reason):
+        logging.warning(f"⚠️ Gemini connection pooling disabled, using the SDK's default client: {reason}")
+        return False
+
+# Create a singleton instance
+gemini_client = GeminiClientAdapter()
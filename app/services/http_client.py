@@ -0,0 +1,52 @@
+import logging
+import requests
+from requests.adapters import HTTPAdapter
+from flask import current_app
+
+class TimeoutHTTPAdapter(HTTPAdapter):
+    """HTTP adapter that applies default (connect, read) timeouts to every request."""
+
+    def __init__(self, timeout=None, **kwargs):
+        self.timeout = timeout
+        super().__init__(**kwargs)
+
+    def send(self, request, **kwargs):
+        if kwargs.get('timeout') is None:
+            kwargs['timeout'] = self.timeout
+        return super().send(request, **kwargs)
+
+class HTTPClient:
+    """Shared keep-alive connection pool used by the outbound service clients."""
+
+    def __init__(self):
+        self.session = None
+        self.adapter = None
+        self.timeout = None
+        self.initialized = False
+
+    def initialize(self):
+        """Create the pooled session from the application config."""
+        config = current_app.config
+        self.timeout = (config['HTTP_CONNECT_TIMEOUT'], config['HTTP_READ_TIMEOUT'])
+        self.adapter = TimeoutHTTPAdapter(
+            timeout=self.timeout,
+            pool_connections=config['HTTP_POOL_CONNECTIONS'],
+            pool_maxsize=config['HTTP_POOL_MAXSIZE'],
+            pool_block=config['HTTP_POOL_BLOCK'],
+            max_retries=config['HTTP_MAX_RETRIES']
+        )
+        self.session = requests.Session()
+        self.mount(self.session)
+        self.initialized = True
+        logging.info(f"HTTP connection pool initialized (maxsize={config['HTTP_POOL_MAXSIZE']}, timeout={self.timeout})")
+        return True
+
+    def mount(self, session):
+        """Route a requests session's HTTPS traffic through the shared pool settings."""
+        session.mount('https://', self.adapter)
+        session.mount('http://', self.adapter)
+        session.headers['Connection'] = 'keep-alive'
+        return session
+
+# Create a singleton instance
+http_client = HTTPClient()
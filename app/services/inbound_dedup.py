@@ -0,0 +1,67 @@
+import logging
+import threading
+import time
+from collections import OrderedDict
+from flask import current_app
+
+class RecentInboundIds:
+    """Bounded LRU of recently ingested inbound SMS ids, per process.
+
+    Africa's Talking retries a callback it thinks timed out; a retry of an
+    id seen within DEDUP_CACHE_TTL seconds is dropped here without touching
+    the database. Retries this process has not seen (another worker took the
+    original, or it was evicted) are caught by the unique index on
+    Message.inbound_id instead.
+    """
+
+    def __init__(self):
+        self.max_entries = 0
+        self.ttl = 3600
+        self.hits = 0
+        self.misses = 0
+        self.initialized = False
+        self._entries = OrderedDict()  # inbound_id -> expires_at
+        self._lock = threading.Lock()
+
+    def initialize(self):
+        """Load cache limits from the application config."""
+        config = current_app.config
+        self.max_entries = config['DEDUP_CACHE_SIZE']
+        self.ttl = config['DEDUP_CACHE_TTL']
+        with self._lock:
+            self._entries.clear()
+        self.initialized = True
+        logging.info(f"Inbound dedup filter initialized ({self.max_entries} ids, {self.ttl}s TTL)")
+        return True
+
+    def seen(self, inbound_id):
+        """Return True if `inbound_id` was ingested recently by this process."""
+        with self._lock:
+            expires_at = self._entries.get(inbound_id)
+            if expires_at is None or expires_at < time.monotonic():
+                self.misses += 1
+                return False
+            self.hits += 1
+            return True
+
+    def add(self, inbound_id):
+        """Remember a committed (or already stored) inbound id."""
+        if self.max_entries <= 0:
+            return
+        with self._lock:
+            self._entries[inbound_id] = time.monotonic() + self.ttl
+            self._entries.move_to_end(inbound_id)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def stats(self):
+        """Return filter size and hit/miss counters."""
+        return {
+            "ids": len(self._entries),
+            "max_ids": self.max_entries,
+            "duplicates_dropped": self.hits,
+            "misses": self.misses
+        }
+
+# Create a singleton instance
+inbound_dedup = RecentInboundIds()
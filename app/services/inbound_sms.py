@@ -0,0 +1,180 @@
+import asyncio
+import logging
+from sqlalchemy.exc import IntegrityError
+from app.models.models import db, User, Message
+from app.services.sms_service import sms_service
+from app.services.ai_service import ai_service
+from app.services.job_queue import job_queue
+from app.services.conversation_cache import conversation_cache
+from app.services.user_lookup import user_lookup, MISS
+from app.services.inbound_dedup import inbound_dedup
+from app.services.phone_numbers import phone_normalizer
+from app.services.metrics import metrics
+
+PROCESS_INBOUND_SMS = 'process_inbound_sms'
+
+APOLOGY_REPLY = "Sorry, I'm having technical difficulties. Please try again."
+
+def save_inbound_sms(sender_phone, message_text, link_id=None, inbound_id=None):
+    """Persist an inbound SMS and queue its reply. Returns False if it was a dropped retry.
+
+    The user upsert, the message and its job are written in one transaction.
+    `inbound_id` (Africa's Talking's id for the message, else `link_id`) is
+    unique, so a retry of a stored callback is dropped before any AI or SMS work.
+    """
+    inbound_id = inbound_id or link_id
+    if inbound_id and inbound_dedup.seen(inbound_id):
+        _drop_duplicate(inbound_id, sender_phone)
+        return False
+
+    # Store one form per number so "0712..." and "+254712..." are the same user
+    sender_phone = phone_normalizer.normalize(sender_phone) or sender_phone.strip()
+    try:
+        # Get or create user; known numbers skip the database. last_active is
+        # refreshed whenever the cache entry expires and the user is upserted again.
+        user_id = user_lookup.get(sender_phone)
+        cached = user_id not in (MISS, None)
+        if not cached:
+            user_id, created = User.upsert(sender_phone)
+            if created:
+                logging.info(f"👤 New user created: {sender_phone}")
+
+        # Save incoming message
+        user_message = Message(
+            user_id=user_id,
+            sender_type='user',
+            text=message_text,
+            link_id=link_id,
+            inbound_id=inbound_id
+        )
+        db.session.add(user_message)
+        db.session.flush()
+
+        # Queue the reply; the message and job are committed together
+        job = job_queue.enqueue(PROCESS_INBOUND_SMS, {
+            'message_id': user_message.id,
+            'phone': sender_phone
+        }, commit=False)
+        db.session.commit()
+        if not cached:
+            user_lookup.put(sender_phone, user_id)
+        conversation_cache.append(user_id, 'user', message_text)
+        job_queue.dispatch(job)
+        if inbound_id:
+            inbound_dedup.add(inbound_id)
+        metrics.count('database', 'success')
+        logging.debug(f"💾 User message saved and queued for processing")
+        return True
+
+    except Exception as e:
+        db.session.rollback()
+        if isinstance(e, IntegrityError) and inbound_id and _is_stored(inbound_id):
+            # The original callback was stored by another request or process
+            inbound_dedup.add(inbound_id)
+            _drop_duplicate(inbound_id, sender_phone)
+            return False
+
+        logging.error(f"💥 Error saving SMS from {sender_phone}: {e}")
+        metrics.count('database', 'failure')
+
+        # Send a simple error message to user
+        try:
+            sms_service.send_sms(sender_phone, APOLOGY_REPLY)
+        except:
+            pass
+        return True
+
+def _is_stored(inbound_id):
+    return db.session.query(Message.id).filter_by(inbound_id=inbound_id).first() is not None
+
+def _drop_duplicate(inbound_id, sender_phone):
+    logging.info(f"🔁 Dropped retried callback {inbound_id} from {sender_phone}")
+    metrics.count('webhook', 'duplicate')
+
+@metrics.timed('sms_reply')
+def process_inbound_sms(payload):
+    """Generate and send the AI reply for a saved inbound SMS."""
+    inbound = _load_inbound(payload)
+    if inbound is None:
+        return
+    user_id, message_text, conversation_history = inbound
+
+    # Generate AI response
+    logging.debug(f"🤖 Generating AI response...")
+    ai_response = ai_service.generate_response(message_text, conversation_history)
+
+    _save_and_send_reply(user_id, payload['phone'], ai_response)
+
+async def process_inbound_sms_async(payload):
+    """Async version of `process_inbound_sms`.
+
+    Database and SMS work run in worker threads; only the Gemini call is awaited
+    on the event loop. Must run inside an app context.
+    """
+    with metrics.time('sms_reply'):
+        inbound = await asyncio.to_thread(_load_inbound, payload)
+        if inbound is None:
+            return
+        user_id, message_text, conversation_history = inbound
+
+        logging.debug(f"🤖 Generating AI response (async)...")
+        ai_response = await ai_service.generate_response_async(message_text, conversation_history)
+
+        await asyncio.to_thread(_save_and_send_reply, user_id, payload['phone'], ai_response)
+
+def _load_inbound(payload):
+    """Return (user_id, text, conversation_history) for a queued message, or None."""
+    user_message = db.session.get(Message, payload['message_id'])
+    if user_message is None:
+        logging.warning(f"Inbound message {payload['message_id']} no longer exists, skipping")
+        return None
+
+    user_id = user_message.user_id
+
+    # Get conversation history
+    with metrics.time('history_read'):
+        conversation_history = conversation_cache.get_history(user_id)
+    newline = '\n'
+    logging.debug(f"📚 Retrieved conversation history: {len(conversation_history.split(newline))} messages")
+
+    return user_id, user_message.text, conversation_history
+
+def _save_and_send_reply(user_id, sender_phone, ai_response):
+    # Send first so the saved reply carries Africa's Talking's messageId for delivery reports
+    logging.debug(f"📤 Attempting to send SMS reply to {sender_phone}")
+    result = sms_service.send(sender_phone, ai_response)
+    sms_sent = result.get('status') == 'Success'
+
+    # Save AI response to database, finishing the job in the same transaction
+    ai_message = Message(
+        user_id=user_id,
+        sender_type='ai',
+        text=ai_response,
+        status='sent' if sms_sent else 'failed',
+        provider_message_id=result.get('messageId')
+    )
+    db.session.add(ai_message)
+    job_queue.complete_current()
+    db.session.commit()
+    conversation_cache.append(user_id, 'ai', ai_response)
+    logging.debug(f"💾 AI response saved to database")
+
+    if sms_sent:
+        logging.info(f"✅ Successfully processed and replied to {sender_phone}")
+    else:
+        logging.error(f"❌ Failed to send SMS reply to {sender_phone}")
+
+def notify_processing_failure(payload, error):
+    """Send a simple error message once an inbound SMS job is dead-lettered."""
+    logging.error(f"💥 Error processing SMS from {payload['phone']}: {error}")
+    try:
+        sms_service.send_sms(payload['phone'], APOLOGY_REPLY)
+    except:
+        pass
+
+job_queue.register(
+    PROCESS_INBOUND_SMS,
+    process_inbound_sms,
+    on_failure=notify_processing_failure,
+    async_handler=process_inbound_sms_async
+)
@@ -0,0 +1,397 @@
+import asyncio
+import contextvars
+import json
+import logging
+import os
+import queue
+import threading
+from datetime import datetime, timedelta
+from flask import current_app
+from sqlalchemy import and_, or_
+from app.models.models import db, Job, DeadLetterJob
+
+# The job being run by the current handler: {'id': job_id, 'completed': bool}
+_current_job = contextvars.ContextVar('current_job', default=None)
+
+class JobQueue:
+    """Durable, database-backed job queue drained by a pool of worker threads.
+
+    Under the ASGI entry point the queue is instead drained by an asyncio
+    consumer that runs async handlers concurrently on the event loop.
+    """
+
+    def __init__(self):
+        self.handlers = {}
+        self.async_handlers = {}
+        self.failure_handlers = {}
+        self.workers = []
+        self.num_workers = 0
+        self.poll_interval = 1.0
+        self.visibility_timeout = 120
+        self.max_attempts = 5
+        self.retry_delay = 5.0
+        self.async_concurrency = 100
+        self.ready_queue_size = 100
+        self.initialized = False
+        self.async_mode = False
+        self._pid = None
+        self._lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._stop = threading.Event()
+        self._loop = None
+        self._async_wakeup = None
+        self._ready = queue.SimpleQueue()  # Jobs claimed at enqueue: (job_id, name, payload, locked_until)
+
+    def initialize(self):
+        """Load queue settings from the application config."""
+        config = current_app.config
+        self.num_workers = config['JOB_WORKERS']
+        self.poll_interval = config['JOB_POLL_INTERVAL']
+        self.visibility_timeout = config['JOB_VISIBILITY_TIMEOUT']
+        self.max_attempts = config['JOB_MAX_ATTEMPTS']
+        self.retry_delay = config['JOB_RETRY_DELAY']
+        self.async_concurrency = config['ASYNC_JOB_CONCURRENCY']
+        self.ready_queue_size = config['JOB_READY_QUEUE_SIZE']
+        self.initialized = True
+        logging.info(f"Job queue initialized with {self.num_workers} workers.")
+        return True
+
+    def register(self, name, handler, on_failure=None, async_handler=None):
+        """Register a handler for jobs called `name`.
+
+        `handler(payload)` runs inside an app context; raising retries the job.
+        `on_failure(payload, error)` runs once the job is moved to the dead-letter table.
+        `async_handler(payload)` is an optional coroutine used by the asyncio consumer.
+        """
+        self.handlers[name] = handler
+        if on_failure:
+            self.failure_handlers[name] = on_failure
+        if async_handler:
+            self.async_handlers[name] = async_handler
+
+    def start(self, app):
+        """Start the worker pool for this process (safe to call repeatedly)."""
+        if not self.initialized or self.num_workers <= 0 or self.async_mode:
+            return
+        with self._lock:
+            # Worker threads do not survive a fork, so track the owning process
+            if self._pid == os.getpid():
+                return
+            self._pid = os.getpid()
+            self._stop.clear()
+            self.workers = []
+            for i in range(self.num_workers):
+                worker = threading.Thread(
+                    target=self._worker_loop,
+                    args=(app,),
+                    name=f"job-worker-{i}",
+                    daemon=True
+                )
+                worker.start()
+                self.workers.append(worker)
+        logging.info(f"Started {self.num_workers} job workers (pid {self._pid})")
+
+    def stop(self):
+        """Signal workers to exit after their current job."""
+        self._stop.set()
+        self.notify()
+
+    def enqueue(self, name, payload=None, delay=0, commit=True):
+        """Add a job to the queue.
+
+        Any pending changes in the session are committed together with the job,
+        so callers can persist their data and the job atomically.
+
+        When this process is running consumers and fewer than
+        JOB_READY_QUEUE_SIZE jobs are waiting for them, an immediate job is
+        inserted already claimed and handed straight to them, saving the claim
+        commit; otherwise it is left pending for any worker to claim. If the
+        process dies first, the job becomes visible to other workers after the
+        visibility timeout. With `commit=False`, call `dispatch(job)` after
+        committing.
+        """
+        now = datetime.utcnow()
+        job = Job(
+            name=name,
+            payload=json.dumps(payload or {}),
+            run_at=now + timedelta(seconds=delay)
+        )
+        if delay <= 0 and self._has_local_consumer() and self._ready.qsize() < self.ready_queue_size:
+            job.status = 'running'
+            job.attempts = 1
+            job.locked_until = now + timedelta(seconds=self.visibility_timeout)
+        db.session.add(job)
+        if commit:
+            db.session.commit()
+            self.dispatch(job)
+        return job
+
+    def dispatch(self, job):
+        """Hand a committed job to this process's consumers."""
+        if job.status == 'running':
+            self._ready.put((job.id, job.name, json.loads(job.payload), job.locked_until))
+        self.notify()
+
+    def complete_current(self):
+        """Delete the running job as part of the handler's own transaction.
+
+        Handlers call this before their final commit so finishing the job does
+        not cost a separate commit. Does nothing outside a job handler.
+        """
+        current = _current_job.get()
+        if current is None or current['completed']:
+            return
+        db.session.query(Job).filter(Job.id == current['id']).delete(synchronize_session=False)
+        current['completed'] = True
+
+    def heartbeat(self):
+        """Extend the running job's visibility timeout, with the caller's next commit.
+
+        Long-running handlers call this as they make progress so the job is not
+        handed to another worker while still running. Does nothing outside a job handler.
+        """
+        current = _current_job.get()
+        if current is None or current['completed']:
+            return
+        db.session.query(Job).filter(Job.id == current['id']).update({
+            Job.locked_until: datetime.utcnow() + timedelta(seconds=self.visibility_timeout)
+        }, synchronize_session=False)
+
+    def _has_local_consumer(self):
+        if self._loop is not None:
+            return True
+        return self._pid == os.getpid() and not self._stop.is_set()
+
+    def notify(self):
+        """Wake idle workers in this process."""
+        self._wakeup.set()
+        if self._loop is not None:
+            self._loop.call_soon_threadsafe(self._async_wakeup.set)
+
+    def _worker_loop(self, app):
+        while not self._stop.is_set():
+            processed = False
+            try:
+                with app.app_context():
+                    processed = self.run_once()
+            except Exception as e:
+                logging.error(f"Job worker error: {e}")
+            if not processed:
+                self._wakeup.wait(self.poll_interval)
+                self._wakeup.clear()
+
+    def _claimable(self, now):
+        return or_(
+            and_(Job.status == 'pending', Job.run_at <= now),
+            and_(Job.status == 'running', Job.locked_until < now)
+        )
+
+    def claim(self):
+        """Atomically claim the next runnable job, or return None."""
+        for _ in range(3):
+            now = datetime.utcnow()
+            job_id = db.session.query(Job.id).filter(self._claimable(now)) \
+                .order_by(Job.run_at.asc()).limit(1).scalar()
+            if job_id is None:
+                db.session.rollback()
+                return None
+
+            # Conditional update so only one worker (in any process) wins the job
+            claimed = db.session.query(Job).filter(Job.id == job_id, self._claimable(now)).update({
+                Job.status: 'running',
+                Job.locked_until: now + timedelta(seconds=self.visibility_timeout),
+                Job.attempts: Job.attempts + 1
+            }, synchronize_session=False)
+            db.session.commit()
+            if claimed:
+                return db.session.get(Job, job_id)
+        return None
+
+    def run_once(self):
+        """Claim and run a single job. Returns True if a job was processed."""
+        job = self._next_job()
+        if job is None:
+            return False
+
+        job_id, name, payload = job
+        current = {'id': job_id, 'completed': False}
+        token = _current_job.set(current)
+        try:
+            self.handlers[name](payload)
+        except Exception as e:
+            self._handle_failure(job_id, name, payload, e)
+        else:
+            self._complete(current)
+        finally:
+            _current_job.reset(token)
+        return True
+
+    async def run_async(self, app):
+        """Drain the queue on the running event loop until `stop()` is called.
+
+        Up to ASYNC_JOB_CONCURRENCY jobs run at once. Jobs without an async
+        handler run their sync handler in a worker thread.
+        """
+        self.async_mode = True
+        self._loop = asyncio.get_running_loop()
+        self._async_wakeup = asyncio.Event()
+        self._stop.clear()
+        slots = asyncio.Semaphore(self.async_concurrency)
+        tasks = set()
+        logging.info(f"Started async job consumer ({self.async_concurrency} concurrent jobs, pid {os.getpid()})")
+
+        while not self._stop.is_set():
+            await slots.acquire()
+            try:
+                with app.app_context():
+                    job = await asyncio.to_thread(self._next_job)
+            except Exception as e:
+                logging.error(f"Async job consumer error: {e}")
+                job = None
+
+            if job is None:
+                slots.release()
+                try:
+                    await asyncio.wait_for(self._async_wakeup.wait(), self.poll_interval)
+                except asyncio.TimeoutError:
+                    pass
+                self._async_wakeup.clear()
+                continue
+
+            task = asyncio.create_task(self._run_job_async(app, job, slots))
+            tasks.add(task)
+            task.add_done_callback(tasks.discard)
+
+        if tasks:
+            await asyncio.gather(*tasks, return_exceptions=True)
+        self._loop = None
+
+    async def _run_job_async(self, app, job, slots):
+        job_id, name, payload = job
+        current = {'id': job_id, 'completed': False}
+        _current_job.set(current)  # Tasks run in their own context copy
+        try:
+            with app.app_context():
+                try:
+                    if name in self.async_handlers:
+                        await self.async_handlers[name](payload)
+                    else:
+                        await asyncio.to_thread(self.handlers[name], payload)
+                except Exception as e:
+                    await asyncio.to_thread(self._handle_failure, job_id, name, payload, e)
+                else:
+                    await asyncio.to_thread(self._complete, current)
+        except Exception as e:
+            logging.error(f"Async job {job_id} ({name}) error: {e}")
+        finally:
+            slots.release()
+
+    def _next_job(self):
+        """Claim the next job that has a handler and attempts left.
+
+        Jobs handed over at enqueue are taken first. Returns
+        (job_id, name, payload), or None when the queue is empty.
+        """
+        job = self._take_ready()
+        if job is not None:
+            return job
+
+        while True:
+            job = self.claim()
+            if job is None:
+                return None
+
+            payload = json.loads(job.payload)
+            if job.name not in self.handlers:
+                self._fail(job, payload, f"No handler registered for job '{job.name}'")
+            elif job.attempts > self.max_attempts:
+                # A worker died holding this job until its visibility timeout expired
+                self._fail(job, payload, job.last_error or "Visibility timeout exceeded")
+            else:
+                return job.id, job.name, payload
+
+    def _take_ready(self):
+        """Pop a job claimed at enqueue that this process still holds.
+
+        The lock was taken when the job was enqueued. A job that waited long
+        enough for its lock to run low is renewed with a conditional UPDATE,
+        and skipped if another worker has re-claimed it in the meantime.
+        """
+        while True:
+            try:
+                job_id, name, payload, locked_until = self._ready.get_nowait()
+            except queue.Empty:
+                return None
+
+            now = datetime.utcnow()
+            if locked_until - now > timedelta(seconds=self.visibility_timeout / 2):
+                return job_id, name, payload
+
+            renewed = db.session.query(Job).filter(
+                Job.id == job_id,
+                Job.status == 'running',
+                Job.locked_until == locked_until
+            ).update({
+                Job.locked_until: now + timedelta(seconds=self.visibility_timeout)
+            }, synchronize_session=False)
+            db.session.commit()
+            if renewed:
+                return job_id, name, payload
+            logging.warning(f"Job {job_id} ({name}) was re-claimed by another worker before it ran; skipping")
+
+    def _complete(self, current):
+        if current['completed']:
+            return
+        db.session.query(Job).filter(Job.id == current['id']).delete(synchronize_session=False)
+        db.session.commit()
+
+    def _handle_failure(self, job_id, name, payload, error):
+        db.session.rollback()
+        job = db.session.get(Job, job_id)
+        logging.error(f"Job {job_id} ({name}) failed on attempt {job.attempts}: {error}")
+        if job.attempts >= self.max_attempts:
+            self._fail(job, payload, str(error))
+        else:
+            self._retry(job, str(error))
+
+    def _retry(self, job, error):
+        backoff = self.retry_delay * (2 ** (job.attempts - 1))
+        job.status = 'pending'
+        job.locked_until = None
+        job.run_at = datetime.utcnow() + timedelta(seconds=backoff)
+        job.last_error = error
+        db.session.commit()
+
+    def _fail(self, job, payload, error):
+        """Move a job to the dead-letter table."""
+        job_id, name = job.id, job.name
+        db.session.add(DeadLetterJob(
+            job_id=job.id,
+            name=job.name,
+            payload=job.payload,
+            attempts=job.attempts,
+            last_error=error,
+            created_at=job.created_at
+        ))
+        db.session.delete(job)
+        db.session.commit()
+        logging.error(f"Job {job_id} ({name}) moved to dead-letter queue: {error}")
+
+        on_failure = self.failure_handlers.get(name)
+        if on_failure:
+            try:
+                on_failure(payload, error)
+            except Exception as e:
+                logging.error(f"Failure handler for job {job_id} raised: {e}")
+
+    def stats(self):
+        """Return queue depth and dead-letter counts."""
+        return {
+            "workers": len([w for w in self.workers if w.is_alive()]),
+            "pending": Job.query.filter_by(status='pending').count(),
+            "running": Job.query.filter_by(status='running').count(),
+            "dead_letter": DeadLetterJob.query.count()
+        }
+
+# Create a singleton instance
+job_queue = JobQueue()
@@ -0,0 +1,123 @@
+import atexit
+import logging
+import logging.handlers
+import os
+import queue
+import random
+import time
+from flask import current_app, g, request
+
+LOG_FORMAT = '%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+
+# Raw webhook payloads, headers and provider responses
+payload_logger = logging.getLogger('payload')
+# One line per HTTP request
+request_logger = logging.getLogger('request')
+
+def log_payload(message, *args):
+    """Log a verbose payload, for a sampled fraction of calls only.
+
+    `message` is a %-format string for `args`, formatted by the log writer
+    thread, or a callable returning the message. Nothing is built for calls
+    that are not sampled.
+    """
+    if not payload_logger.isEnabledFor(logging.DEBUG) or random.random() >= log_pipeline.payload_sample_rate:
+        return
+    if callable(message):
+        message = message()
+    payload_logger.debug(message, *args)
+
+def log_context(**fields):
+    """Add fields to the current request's log line."""
+    g.setdefault('log_fields', {}).update(fields)
+
+def log_request(method, path, status, started, fields=None):
+    """Write one request's key=value line to the `request` logger."""
+    if not request_logger.isEnabledFor(logging.INFO):
+        return
+    line = {
+        'method': method,
+        'path': path,
+        'status': status,
+        'ms': f"{(time.perf_counter() - started) * 1000:.1f}"
+    }
+    line.update(fields or {})
+    request_logger.info(' '.join(f"{key}={value}" for key, value in line.items()))
+
+class LogPipeline:
+    """Moves log I/O off request threads.
+
+    The root logger gets a QueueHandler; a QueueListener thread writes the
+    records to stderr. Each request is summarized in one key=value line on
+    the `request` logger, and payload dumps are sampled at
+    LOG_PAYLOAD_SAMPLE_RATE on the `payload` logger.
+    """
+
+    def __init__(self):
+        self.payload_sample_rate = 0.0
+        self.handler = None
+        self.listener = None
+        self._target = None
+        self.initialized = False
+
+    def initialize(self):
+        """Route the root logger through a queue (safe to call repeatedly)."""
+        config = current_app.config
+        self.payload_sample_rate = config['LOG_PAYLOAD_SAMPLE_RATE']
+
+        root = logging.getLogger()
+        for handler in list(root.handlers):
+            root.removeHandler(handler)
+        self.stop()
+
+        self._target = logging.StreamHandler()
+        self._target.setFormatter(logging.Formatter(LOG_FORMAT))
+        if config['LOG_ASYNC']:
+            self.handler = logging.handlers.QueueHandler(queue.SimpleQueue())
+            self._start_listener()
+        else:
+            self.handler = self._target
+        root.addHandler(self.handler)
+        root.setLevel(config['LOG_LEVEL'].upper())
+        payload_logger.setLevel(config['LOG_PAYLOAD_LEVEL'].upper())
+
+        self.initialized = True
+        logging.info(f"Logging initialized (level={config['LOG_LEVEL']}, async={config['LOG_ASYNC']}, payload sample rate={self.payload_sample_rate})")
+        return True
+
+    def _start_listener(self):
+        self.listener = logging.handlers.QueueListener(self.handler.queue, self._target, respect_handler_level=True)
+        self.listener.start()
+
+    def _after_fork(self):
+        # The parent's listener thread does not survive fork; give the child its own
+        if self.listener is not None:
+            self.handler.queue = queue.SimpleQueue()
+            self._start_listener()
+
+    def stop(self):
+        """Flush queued records and stop the listener thread."""
+        if self.listener is not None:
+            listener, self.listener = self.listener, None
+            if listener._thread is not None:
+                listener.stop()
+
+    def register(self, app):
+        """Log one line per request to the `request` logger."""
+
+        @app.before_request
+        def start_request_timer():
+            g.request_started = time.perf_counter()
+
+        @app.after_request
+        def write_request_line(response):
+            started = g.pop('request_started', None)
+            if started is not None:
+                log_request(request.method, request.path, response.status_code, started, g.pop('log_fields', {}))
+            return response
+
+# Create a singleton instance
+log_pipeline = LogPipeline()
+
+os.register_at_fork(after_in_child=log_pipeline._after_fork)
+atexit.register(log_pipeline.stop)
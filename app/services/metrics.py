@@ -0,0 +1,74 @@
+import functools
+import os
+import time
+from contextlib import contextmanager
+from app.services.tracing import span
+from prometheus_client import (
+    CONTENT_TYPE_LATEST, REGISTRY, CollectorRegistry, Counter, Histogram, generate_latest, multiprocess
+)
+
+# Stages: history_read, gemini, sms_send, sms_send_bulk, webhook, sms_reply, chat
+STAGE_SECONDS = Histogram(
+    'pipeline_stage_duration_seconds',
+    'Time spent in each stage of the SMS and chat pipelines',
+    ['stage'],
+    buckets=(0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30)
+)
+
+# Services: database, gemini, africastalking, webhook. Outcomes: success, failure,
+# plus rejected/empty for gemini and duplicate (dropped retries) for webhook
+SERVICE_CALLS = Counter(
+    'service_calls_total',
+    'Calls to backing services by outcome',
+    ['service', 'outcome']
+)
+
+class Metrics:
+    """Prometheus metrics for the reply pipelines.
+
+    Under gunicorn set PROMETHEUS_MULTIPROC_DIR (gunicorn.conf.py does) so
+    every worker writes its samples to shared files and /metrics reports the
+    sum over all workers instead of whichever worker served the scrape.
+    """
+
+    @contextmanager
+    def time(self, stage):
+        """Record how long the block takes, including when it raises.
+
+        Inside a request the block is also a tracing span.
+        """
+        start = time.perf_counter()
+        try:
+            with span(stage):
+                yield
+        finally:
+            STAGE_SECONDS.labels(stage).observe(time.perf_counter() - start)
+
+    def timed(self, stage):
+        """Decorator form of `time`."""
+        def decorator(func):
+            @functools.wraps(func)
+            def wrapper(*args, **kwargs):
+                with self.time(stage):
+                    return func(*args, **kwargs)
+            return wrapper
+        return decorator
+
+    def observe(self, stage, seconds):
+        STAGE_SECONDS.labels(stage).observe(seconds)
+
+    def count(self, service, outcome, amount=1):
+        if amount:
+            SERVICE_CALLS.labels(service, outcome).inc(amount)
+
+    def render(self):
+        """Return (body, content type) of the Prometheus text exposition."""
+        if os.environ.get('PROMETHEUS_MULTIPROC_DIR'):
+            registry = CollectorRegistry()
+            multiprocess.MultiProcessCollector(registry)
+        else:
+            registry = REGISTRY
+        return generate_latest(registry), CONTENT_TYPE_LATEST
+
+# Create a singleton instance
+metrics = Metrics()
@@ -0,0 +1,112 @@
+import logging
+import re
+from functools import lru_cache
+from flask import current_app
+
+# National significant number patterns for the Africa's Talking markets, keyed by calling code
+COUNTRY_RULES = {
+    '254': r'[17]\d{8}',     # Kenya
+    '255': r'[67]\d{8}',     # Tanzania
+    '256': r'[237]\d{8}',    # Uganda
+    '250': r'7\d{8}',        # Rwanda
+    '251': r'[79]\d{8}',     # Ethiopia
+    '260': r'[79]\d{8}',     # Zambia
+    '265': r'[89]\d{8}',     # Malawi
+    '233': r'[25]\d{8}',     # Ghana
+    '234': r'[789]\d{9}',    # Nigeria
+    '27': r'[6-8]\d{8}'      # South Africa
+}
+
+# Calling codes are prefix-free, so one alternation validates every supported country
+_INTERNATIONAL = re.compile(
+    '^(?:' + '|'.join(f'{code}{pattern}' for code, pattern in COUNTRY_RULES.items()) + ')$'
+)
+_KNOWN_CODE = re.compile('^(?:' + '|'.join(COUNTRY_RULES) + ')')
+# Numbers in other countries are accepted if they are plausible E.164
+_E164_DIGITS = re.compile(r'^[1-9]\d{6,14}$')
+_SEPARATORS = re.compile(r'[\s\-().]')
+
+def _normalize(phone_number, default_country):
+    number = _SEPARATORS.sub('', phone_number)
+    if number.startswith('+'):
+        digits = number[1:]
+    elif number.startswith('00'):
+        digits = number[2:]
+    elif number.startswith(default_country) and _INTERNATIONAL.match(number):
+        digits = number
+    elif number.startswith('0'):
+        digits = default_country + number[1:]
+    else:
+        digits = default_country + number
+
+    if _INTERNATIONAL.match(digits):
+        return '+' + digits
+    if not _KNOWN_CODE.match(digits) and _E164_DIGITS.match(digits):
+        return '+' + digits
+    return None
+
+class PhoneNumberNormalizer:
+    """Converts phone numbers to E.164 (+254712345678).
+
+    Local formats ("0712 345 678", "712345678", "254712345678") are read as
+    numbers in DEFAULT_COUNTRY_CODE. Numbers in a supported country must match
+    that country's number plan; other international numbers only need to look
+    like E.164. Results are memoized, so repeat senders cost a dict lookup.
+    """
+
+    def __init__(self):
+        self.default_country = '254'
+        self._cached = lru_cache(maxsize=65536)(_normalize)
+        self.initialized = False
+
+    def initialize(self):
+        """Load the default country from the application config."""
+        default_country = current_app.config['DEFAULT_COUNTRY_CODE'].lstrip('+')
+        if default_country not in COUNTRY_RULES:
+            logging.warning(f"No number plan for country code {default_country}; local numbers are checked as E.164 only")
+        self.default_country = default_country
+        self._cached = lru_cache(maxsize=current_app.config['PHONE_CACHE_SIZE'])(_normalize)
+        self.initialized = True
+        logging.info(f"Phone number normalizer initialized (default +{self.default_country})")
+        return True
+
+    def normalize(self, phone_number):
+        """Return the E.164 form of a phone number, or None if it is not valid."""
+        if not phone_number:
+            return None
+        return self._cached(phone_number.strip(), self.default_country)
+
+    def normalize_many(self, phone_numbers):
+        """Normalize, validate and deduplicate a list of numbers in one pass.
+
+        Returns (numbers, invalid): the distinct E.164 numbers in first-seen
+        order, and the inputs that could not be normalized. Repeated inputs
+        are memoized for the pass only, so a large list does not evict the
+        senders held in the shared cache.
+        """
+        normalize = _normalize
+        default_country = self.default_country
+        memo = {}
+        seen = {}
+        invalid = []
+        for phone_number in phone_numbers:
+            if phone_number in memo:
+                number = memo[phone_number]
+            else:
+                number = normalize(phone_number.strip(), default_country) if phone_number else None
+                memo[phone_number] = number
+            if number is None:
+                invalid.append(phone_number)
+            else:
+                seen[number] = None
+        return list(seen), invalid
+
+    def cache_clear(self):
+        self._cached.cache_clear()
+
+    def cache_info(self):
+        info = self._cached.cache_info()
+        return {"hits": info.hits, "misses": info.misses, "size": info.currsize, "max_size": info.maxsize}
+
+# Create a singleton instance
+phone_normalizer = PhoneNumberNormalizer()
@@ -0,0 +1,114 @@
+import logging
+from flask import current_app
+
+# Rough average for English text with Gemini's tokenizer
+CHARS_PER_TOKEN = 4
+
+SYSTEM_PROMPT = """You are an AI SMS Learning Tutor for skilled artisans and workers in Nairobi, Kenya.
+
+Your role:
+- Help with work-related questions, business advice, and skill development
+- Provide practical solutions for craftspeople, technicians, and small business owners
+- Keep responses SHORT (under 160 characters for SMS)
+- Be encouraging, supportive, and culturally aware
+- Focus on actionable advice that works in Nairobi context
+- Use simple, clear language"""
+
+PROMPT_TEMPLATE = """{system}
+
+Conversation history:
+{history}
+
+Current message: {message}
+
+Provide a helpful, concise SMS response (max 160 characters):"""
+
+ELLIPSIS = "..."
+
+# Don't bother including a partially trimmed turn shorter than this
+MIN_PARTIAL_TURN_CHARS = 40
+
+class PromptBuilder:
+    """Assembles Gemini prompts within a fixed size budget.
+
+    The system instructions and current message are always kept. History turns
+    are added newest first until the budget is spent, so the oldest turns are
+    the ones trimmed or dropped.
+    """
+
+    def __init__(self):
+        self.max_chars = 4000
+        self.max_turn_chars = 600
+        self.max_message_chars = 1000
+
+    def initialize(self):
+        """Load the prompt budget from the application config."""
+        config = current_app.config
+        if config['PROMPT_MAX_TOKENS']:
+            self.max_chars = config['PROMPT_MAX_TOKENS'] * CHARS_PER_TOKEN
+        else:
+            self.max_chars = config['PROMPT_MAX_CHARS']
+        self.max_turn_chars = config['PROMPT_MAX_TURN_CHARS']
+        self.max_message_chars = config['PROMPT_MAX_MESSAGE_CHARS']
+        logging.info(f"Prompt builder initialized with a {self.max_chars} character budget")
+        return True
+
+    def build(self, message_text, conversation_history):
+        """Build the prompt for a message.
+
+        `conversation_history` is either a transcript with one "Role: text" turn
+        per line or a list of (sender_type, text) turns, oldest first.
+        """
+        message_text = self._truncate_end(message_text.strip(), self.max_message_chars)
+        fixed = len(PROMPT_TEMPLATE.format(system=SYSTEM_PROMPT, history='', message=message_text))
+        budget = self.max_chars - fixed
+
+        kept = []
+        turns = self._turns(conversation_history)
+        for index, turn in enumerate(reversed(turns)):
+            turn = self._truncate_turn(turn, self.max_turn_chars)
+            separator = 1 if kept else 0
+            if len(turn) + separator > budget:
+                # Keep the most recent part of the oldest turn that still fits
+                if budget - separator >= MIN_PARTIAL_TURN_CHARS:
+                    kept.append(self._truncate_turn(turn, budget - separator))
+                    index += 1
+                logging.debug(f"Prompt budget reached, dropped {len(turns) - index} of {len(turns)} history turns")
+                break
+            kept.append(turn)
+            budget -= len(turn) + separator
+
+        history = "\n".join(reversed(kept))
+        return PROMPT_TEMPLATE.format(system=SYSTEM_PROMPT, history=history, message=message_text)
+
+    def _turns(self, conversation_history):
+        if not conversation_history:
+            return []
+        if isinstance(conversation_history, str):
+            return [line for line in conversation_history.splitlines() if line.strip()]
+        return [
+            f"{'User' if sender_type == 'user' else 'Assistant'}: {text}"
+            for sender_type, text in conversation_history
+        ]
+
+    def _truncate_turn(self, turn, limit):
+        """Keep the role label and the end of a turn, marking removed content."""
+        if len(turn) <= limit:
+            return turn
+        role, separator, text = turn.partition(': ')
+        if not separator or len(role) > len('Assistant'):
+            role, separator, text = '', '', turn
+        prefix = role + separator + ELLIPSIS
+        keep = limit - len(prefix)
+        if keep <= 0:
+            return turn[:limit]
+        return prefix + text[-keep:]
+
+    def _truncate_end(self, text, limit):
+        """Keep the start of `text`, marking removed trailing content."""
+        if len(text) <= limit:
+            return text
+        return text[:limit - len(ELLIPSIS)] + ELLIPSIS
+
+# Create a singleton instance
+prompt_builder = PromptBuilder()
@@ -0,0 +1,203 @@
+import hashlib
+import logging
+import os
+import sqlite3
+import threading
+import time
+import unicodedata
+from flask import current_app
+
+# Trimmed from the ends of words only; operators, %, currency signs and
+# punctuation inside a word ("2+2", "5%", "3.5", "don't") stay significant
+_SENTENCE_PUNCTUATION = '.,!?;:\'"“”‘’«»()[]{}¿¡'
+
+# Enforce the size bound every N stores rather than on every write
+EVICTION_INTERVAL = 100
+
+def normalize_question(text):
+    """Fold case, sentence punctuation and whitespace so equivalent questions share a key."""
+    text = unicodedata.normalize('NFKC', text or '').casefold()
+    words = (word.strip(_SENTENCE_PUNCTUATION) for word in text.split())
+    return ' '.join(word for word in words if word)
+
+def is_first_turn(conversation_history):
+    """A conversation is on its first turn until the assistant has replied.
+
+    Accepts a "Role: text" transcript or a list of (sender_type, text) turns.
+    """
+    if not conversation_history:
+        return True
+    if isinstance(conversation_history, str):
+        return 'Assistant:' not in conversation_history
+    return all(sender_type == 'user' for sender_type, _ in conversation_history)
+
+def _history_text(conversation_history):
+    if not conversation_history or isinstance(conversation_history, str):
+        return conversation_history or ''
+    return '\n'.join(f"{sender_type}: {text}" for sender_type, text in conversation_history)
+
+class ResponseCache:
+    """SQLite-backed cache of AI responses keyed on normalized questions.
+
+    Entries live in their own database file so they survive restarts and are
+    shared by every server process, without touching the app's transactions.
+    """
+
+    def __init__(self):
+        self.enabled = False
+        self.path = None
+        self.ttl = 0
+        self.max_entries = 0
+        self.touch_interval = 300
+        self.first_turn_history_independent = True
+        self.hits = 0
+        self.misses = 0
+        self.bypassed = 0
+        self.stores = 0
+        self._local = threading.local()
+        self._lock = threading.Lock()
+
+    def initialize(self):
+        """Open the cache database using the application config."""
+        config = current_app.config
+        self.enabled = config['RESPONSE_CACHE_ENABLED']
+        if not self.enabled:
+            logging.info("AI response cache disabled.")
+            return False
+
+        self.path = config['RESPONSE_CACHE_PATH'] or os.path.join(current_app.instance_path, 'response_cache.db')
+        self.ttl = config['RESPONSE_CACHE_TTL']
+        self.max_entries = config['RESPONSE_CACHE_MAX_ENTRIES']
+        self.touch_interval = config['RESPONSE_CACHE_TOUCH_INTERVAL']
+        self.first_turn_history_independent = config['RESPONSE_CACHE_FIRST_TURN_HISTORY_INDEPENDENT']
+        self._local = threading.local()
+
+        try:
+            os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+            conn = self._connection()
+            conn.execute('''
+                CREATE TABLE IF NOT EXISTS response_cache (
+                    key TEXT PRIMARY KEY,
+                    question TEXT NOT NULL,
+                    response TEXT NOT NULL,
+                    created_at REAL NOT NULL,
+                    last_used REAL NOT NULL,
+                    hits INTEGER NOT NULL DEFAULT 0
+                )
+            ''')
+            conn.execute('CREATE INDEX IF NOT EXISTS ix_response_cache_last_used ON response_cache (last_used)')
+            conn.commit()
+            logging.info(f"AI response cache initialized at {self.path}")
+            return True
+        except Exception as e:
+            logging.error(f"Failed to initialize AI response cache: {e}")
+            self.enabled = False
+            return False
+
+    def _connection(self):
+        # sqlite3 connections cannot be shared between threads
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=5)
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute('PRAGMA synchronous=NORMAL')
+            self._local.conn = conn
+        return conn
+
+    def make_key(self, message_text, conversation_history):
+        """Build the cache key for a question in the context of its conversation."""
+        question = normalize_question(message_text)
+        if self.first_turn_history_independent and is_first_turn(conversation_history):
+            material = question
+        else:
+            material = question + '\x00' + normalize_question(_history_text(conversation_history))
+        return hashlib.sha256(material.encode('utf-8')).hexdigest()
+
+    def get(self, key):
+        """Return the cached response for a key, or None.
+
+        A hit is a read only: an entry's last_used (and hits) is refreshed at
+        most once per RESPONSE_CACHE_TOUCH_INTERVAL, which is precise enough
+        for LRU eviction and keeps hot entries from costing a commit each.
+        """
+        now = time.time()
+        try:
+            conn = self._connection()
+            row = conn.execute('SELECT response, created_at, last_used FROM response_cache WHERE key = ?', (key,)).fetchone()
+            if row and now - row[1] > self.ttl:
+                conn.execute('DELETE FROM response_cache WHERE key = ?', (key,))
+                conn.commit()
+                row = None
+            if row is None:
+                self._count('misses')
+                return None
+            if now - row[2] >= self.touch_interval:
+                # Conditional, so processes refreshing the same entry at once write it once
+                conn.execute('UPDATE response_cache SET hits = hits + 1, last_used = ? WHERE key = ? AND last_used = ?',
+                             (now, key, row[2]))
+                conn.commit()
+            self._count('hits')
+            return row[0]
+        except Exception as e:
+            logging.warning(f"AI response cache lookup failed: {e}")
+            return None
+
+    def put(self, key, message_text, response):
+        """Store a response, evicting the least recently used entries past the size bound."""
+        now = time.time()
+        try:
+            conn = self._connection()
+            conn.execute(
+                'INSERT OR REPLACE INTO response_cache (key, question, response, created_at, last_used, hits) '
+                'VALUES (?, ?, ?, ?, ?, 0)',
+                (key, normalize_question(message_text), response, now, now)
+            )
+            conn.commit()
+            if self._count('stores') % EVICTION_INTERVAL == 0:
+                self.evict()
+        except Exception as e:
+            logging.warning(f"AI response cache store failed: {e}")
+
+    def evict(self):
+        """Drop expired entries and trim the cache to its maximum size."""
+        conn = self._connection()
+        conn.execute('DELETE FROM response_cache WHERE created_at < ?', (time.time() - self.ttl,))
+        conn.execute('''
+            DELETE FROM response_cache WHERE key IN (
+                SELECT key FROM response_cache ORDER BY last_used ASC
+                LIMIT MAX((SELECT COUNT(*) FROM response_cache) - ?, 0)
+            )
+        ''', (self.max_entries,))
+        conn.commit()
+
+    def bypass(self):
+        """Record a request that skipped the cache."""
+        self._count('bypassed')
+
+    def _count(self, counter):
+        with self._lock:
+            value = getattr(self, counter) + 1
+            setattr(self, counter, value)
+        return value
+
+    def stats(self):
+        """Return hit-rate statistics for this process and the shared entry count."""
+        lookups = self.hits + self.misses
+        entries = None
+        if self.enabled:
+            try:
+                entries = self._connection().execute('SELECT COUNT(*) FROM response_cache').fetchone()[0]
+            except Exception:
+                pass
+        return {
+            "enabled": self.enabled,
+            "entries": entries,
+            "hits": self.hits,
+            "misses": self.misses,
+            "bypassed": self.bypassed,
+            "stores": self.stores,
+            "hit_rate": round(self.hits / lookups, 3) if lookups else None
+        }
+
+# Create a singleton instance
+response_cache = ResponseCache()
@@ -0,0 +1,95 @@
+import logging
+import time
+from datetime import datetime, timedelta
+from flask import current_app
+from sqlalchemy import delete, func, insert, select
+from app.models.models import db, Message, ArchivedMessage
+
+# Columns copied from `message` to `archived_message`
+ARCHIVED_COLUMNS = [
+    'id', 'user_id', 'sender_type', 'text', 'timestamp',
+    'status', 'link_id', 'provider_message_id', 'session_id', 'inbound_id'
+]
+
+class MessageArchiver:
+    """Moves old messages from the hot `message` table to `archived_message`.
+
+    Messages older than MESSAGE_RETENTION_DAYS are moved oldest first in
+    batches of ARCHIVE_BATCH_SIZE, each in its own short transaction, pausing
+    ARCHIVE_BATCH_PAUSE seconds between batches so webhook writes are never
+    blocked for long.
+    """
+
+    def __init__(self):
+        self.retention_days = 90
+        self.batch_size = 1000
+        self.batch_pause = 0.1
+        self.initialized = False
+
+    def initialize(self):
+        """Load retention settings from the application config."""
+        config = current_app.config
+        self.retention_days = config['MESSAGE_RETENTION_DAYS']
+        self.batch_size = config['ARCHIVE_BATCH_SIZE']
+        self.batch_pause = config['ARCHIVE_BATCH_PAUSE']
+        self.initialized = True
+        logging.info(f"Message archiver initialized ({self.retention_days} day retention)")
+        return True
+
+    def archive(self, retention_days=None, batch_size=None, max_batches=None):
+        """Archive messages older than the retention period. Returns how many were moved."""
+        retention_days = self.retention_days if retention_days is None else retention_days
+        batch_size = batch_size or self.batch_size
+        if retention_days <= 0:
+            logging.info("Message retention disabled, nothing archived")
+            return 0
+
+        cutoff = datetime.utcnow() - timedelta(days=retention_days)
+        # The newest row always stays: SQLite reuses the highest rowid once it is deleted,
+        # which would let a new message collide with an archived id
+        newest_id = db.session.query(func.max(Message.id)).scalar()
+        if newest_id is None:
+            return 0
+
+        moved = 0
+        batches = 0
+        while max_batches is None or batches < max_batches:
+            count = self.archive_batch(cutoff, newest_id, batch_size)
+            if not count:
+                break
+            moved += count
+            batches += 1
+            logging.info(f"🗄️ Archived {count} messages ({moved} so far)")
+            if count < batch_size:
+                break
+            time.sleep(self.batch_pause)
+
+        logging.info(f"🗄️ Archived {moved} messages older than {cutoff.isoformat()}")
+        return moved
+
+    def archive_batch(self, cutoff, newest_id, batch_size):
+        """Move one batch of messages older than `cutoff` in a single transaction."""
+        try:
+            ids = db.session.execute(
+                select(Message.id)
+                .where(Message.timestamp < cutoff, Message.id < newest_id)
+                .order_by(Message.timestamp, Message.id)
+                .limit(batch_size)
+            ).scalars().all()
+            if not ids:
+                db.session.rollback()
+                return 0
+
+            columns = [getattr(Message, name) for name in ARCHIVED_COLUMNS]
+            db.session.execute(
+                insert(ArchivedMessage).from_select(ARCHIVED_COLUMNS, select(*columns).where(Message.id.in_(ids)))
+            )
+            db.session.execute(delete(Message).where(Message.id.in_(ids)))
+            db.session.commit()
+            return len(ids)
+        except Exception:
+            db.session.rollback()
+            raise
+
+# Create a singleton instance
+message_archiver = MessageArchiver()
@@ -0,0 +1,203 @@
+import heapq
+import json
+import logging
+import os
+import threading
+from datetime import datetime, timedelta
+from flask import current_app
+from sqlalchemy.exc import IntegrityError
+from app.models.models import db, WebChatSession
+
+class MemorySessionStore:
+    """Per-process session store with heap-ordered expiry.
+
+    Sessions expire `lifetime` seconds after their last message. Expiry times
+    are pushed onto a min-heap, so eviction only touches expired sessions;
+    stale heap entries left by later activity are skipped as they surface.
+    """
+
+    def __init__(self, lifetime, max_messages):
+        self.lifetime = lifetime
+        self.max_messages = max_messages
+        self._sessions = {}
+        self._expiry_heap = []  # (expires_at, session_id)
+        self._lock = threading.Lock()
+
+    def append(self, session_id, sender, text):
+        now = datetime.utcnow()
+        with self._lock:
+            session = self._sessions.get(session_id)
+            if session is None or session['expires_at'] <= now:
+                session = {'messages': [], 'created_at': now}
+                self._sessions[session_id] = session
+            session['messages'].append({'sender': sender, 'text': text, 'timestamp': now.isoformat()})
+            session['messages'] = session['messages'][-self.max_messages:]
+            session['expires_at'] = now + timedelta(seconds=self.lifetime)
+            heapq.heappush(self._expiry_heap, (session['expires_at'], session_id))
+            return list(session['messages'])
+
+    def get(self, session_id):
+        with self._lock:
+            session = self._sessions.get(session_id)
+            if session is None or session['expires_at'] <= datetime.utcnow():
+                return None
+            return {'messages': list(session['messages']), 'created_at': session['created_at']}
+
+    def delete(self, session_id):
+        with self._lock:
+            self._sessions.pop(session_id, None)
+
+    def cleanup_expired(self):
+        now = datetime.utcnow()
+        removed = 0
+        with self._lock:
+            while self._expiry_heap and self._expiry_heap[0][0] <= now:
+                expires_at, session_id = heapq.heappop(self._expiry_heap)
+                session = self._sessions.get(session_id)
+                if session is not None and session['expires_at'] == expires_at:
+                    del self._sessions[session_id]
+                    removed += 1
+        return removed
+
+    def count(self):
+        return len(self._sessions)
+
+class DatabaseSessionStore:
+    """Session store backed by the `web_chat_session` table.
+
+    Every server process sees the same sessions. Expired rows are found
+    through the index on `expires_at`.
+    """
+
+    def __init__(self, lifetime, max_messages):
+        self.lifetime = lifetime
+        self.max_messages = max_messages
+
+    def append(self, session_id, sender, text):
+        for attempt in range(2):
+            now = datetime.utcnow()
+            session = db.session.get(WebChatSession, session_id)
+            if session is None or session.expires_at <= now:
+                if session is None:
+                    session = WebChatSession(id=session_id)
+                    db.session.add(session)
+                session.messages = '[]'
+                session.created_at = now
+
+            messages = json.loads(session.messages)
+            messages.append({'sender': sender, 'text': text, 'timestamp': now.isoformat()})
+            messages = messages[-self.max_messages:]
+            session.messages = json.dumps(messages)
+            session.expires_at = now + timedelta(seconds=self.lifetime)
+            try:
+                db.session.commit()
+                return messages
+            except IntegrityError:
+                # Another process created the same session concurrently; retry as an update
+                db.session.rollback()
+                if attempt:
+                    raise
+
+    def get(self, session_id):
+        session = db.session.get(WebChatSession, session_id)
+        if session is None or session.expires_at <= datetime.utcnow():
+            return None
+        return {'messages': json.loads(session.messages), 'created_at': session.created_at}
+
+    def delete(self, session_id):
+        WebChatSession.query.filter_by(id=session_id).delete()
+        db.session.commit()
+
+    def cleanup_expired(self):
+        removed = WebChatSession.query.filter(WebChatSession.expires_at <= datetime.utcnow()).delete()
+        db.session.commit()
+        return removed
+
+    def count(self):
+        return WebChatSession.query.filter(WebChatSession.expires_at > datetime.utcnow()).count()
+
+class SessionStore:
+    """Web chat session store with automatic background eviction.
+
+    SESSION_STORE selects the backend: 'database' shares sessions across server
+    processes, 'memory' keeps them in this process only.
+    """
+
+    BACKENDS = {
+        'memory': MemorySessionStore,
+        'database': DatabaseSessionStore
+    }
+
+    def __init__(self):
+        self.backend = None
+        self.backend_name = None
+        self.cleanup_interval = 300
+        self.initialized = False
+        self._pid = None
+        self._stop = threading.Event()
+        self._lock = threading.Lock()
+
+    def initialize(self):
+        """Create the configured backend."""
+        config = current_app.config
+        backend = self.BACKENDS[config['SESSION_STORE']]
+        self.backend = backend(config['SESSION_LIFETIME'], config['SESSION_MAX_MESSAGES'])
+        self.backend_name = config['SESSION_STORE']
+        self.cleanup_interval = config['SESSION_CLEANUP_INTERVAL']
+        self.initialized = True
+        logging.info(f"Web chat session store initialized ({config['SESSION_STORE']})")
+        return True
+
+    def start(self, app):
+        """Start the background eviction thread for this process (safe to call repeatedly)."""
+        if not self.initialized or self.cleanup_interval <= 0:
+            return
+        with self._lock:
+            if self._pid == os.getpid():
+                return
+            self._pid = os.getpid()
+            self._stop = threading.Event()
+            threading.Thread(target=self._cleanup_loop, args=(app, self._stop), name="session-cleanup", daemon=True).start()
+
+    def stop(self):
+        """Stop the eviction thread."""
+        with self._lock:
+            self._pid = None
+            self._stop.set()
+
+    def _cleanup_loop(self, app, stop):
+        while not stop.wait(self.cleanup_interval):
+            try:
+                with app.app_context():
+                    removed = self.cleanup_expired()
+                if removed:
+                    logging.info(f"Evicted {removed} expired web chat sessions")
+            except Exception as e:
+                logging.error(f"Error evicting web chat sessions: {e}")
+
+    def append(self, session_id, sender, text):
+        """Add a message to a session, creating it if needed. Returns its messages."""
+        return self.backend.append(session_id, sender, text)
+
+    def get(self, session_id):
+        """Return {'messages', 'created_at'} for a live session, or None."""
+        return self.backend.get(session_id)
+
+    def delete(self, session_id):
+        self.backend.delete(session_id)
+
+    def cleanup_expired(self):
+        """Remove expired sessions and return how many were removed."""
+        return self.backend.cleanup_expired()
+
+    def count(self):
+        return self.backend.count()
+
+    def stats(self):
+        return {
+            "backend": self.backend_name,
+            "active_sessions": self.count()
+        }
+
+# Create a singleton instance
+session_store = SessionStore()
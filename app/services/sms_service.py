@@ -1,6 +1,34 @@
 import africastalking
 import logging
+from africastalking.Service import AfricasTalkingException
 from flask import current_app
+from app.services.http_client import http_client
+from app.services.phone_numbers import phone_normalizer
+from app.services.log_pipeline import log_payload
+from app.services.metrics import metrics
+
+class PooledSMSClient(africastalking.SMSService):
+    """Africa's Talking SMS client that sends over the shared keep-alive session.
+
+    The SDK issues every call through module-level `requests.post`, which opens a
+    new TCP+TLS connection per request.
+    """
+
+    def __init__(self, username, api_key, session):
+        self._session = session
+        super().__init__(username, api_key)
+
+    def _make_request(self, url, method, headers, data, params, callback=None):
+        if callback is not None:
+            raise AfricasTalkingException("Callbacks are not supported by the pooled client")
+
+        res = self._session.request(method.upper(), url, headers=headers, data=data, params=params)
+
+        if 200 <= res.status_code < 300:
+            if res.headers.get("content-type") == "application/json":
+                return res.json()
+            return res.text
+        raise AfricasTalkingException(res.text)
 
 class SMSService:
     def __init__(self):
@@ -10,11 +38,11 @@ class SMSService:
     def initialize(self):
         """Initialize Africa's Talking service."""
         try:
-            africastalking.initialize(
+            self.sms_service = PooledSMSClient(
                 current_app.config['AT_USERNAME'],
-                current_app.config['AT_API_KEY']
+                current_app.config['AT_API_KEY'],
+                http_client.session
             )
-            self.sms_service = africastalking.SMS
             self.initialized = True
             logging.info("Africa's Talking SDK Initialized successfully.")
             return True
@@ -24,45 +52,117 @@ class SMSService:
 
     def send_sms(self, phone_number, message):
         """Send SMS using Africa's Talking API."""
+        return self.send(phone_number, message).get('status') == 'Success'
+
+    def send(self, phone_number, message):
+        """Send one SMS and return its recipient result (status, messageId, cost, statusCode)."""
         if not self.initialized:
             logging.error("SMS service not initialized")
-            return False
+            return self._failed_result(phone_number)
 
-        # Format phone number
-        if not phone_number.startswith('+'):
-            if phone_number.startswith('254'):
-                phone_number = '+' + phone_number
-            elif phone_number.startswith('0'):
-                phone_number = '+254' + phone_number[1:]
-            else:
-                phone_number = '+254' + phone_number
+        formatted = phone_normalizer.normalize(phone_number)
+        if formatted is None:
+            logging.error(f"❌ Invalid phone number: {phone_number}")
+            return self._failed_result(phone_number, 'InvalidPhoneNumber')
+        phone_number = formatted
 
         try:
-            response = self.sms_service.send(
-                message=message,
-                recipients=[phone_number]
-            )
+            with metrics.time('sms_send'):
+                response = self.sms_service.send(
+                    message=message,
+                    recipients=[phone_number]
+                )
 
-            logging.info(f"SMS API Response: {response}")
+            log_payload("SMS API Response: %s", response)
 
             if response and 'SMSMessageData' in response:
                 recipients = response['SMSMessageData'].get('Recipients', [])
                 for recipient in recipients:
                     if recipient.get('status') == 'Success':
-                        logging.info(f"✅ SMS sent successfully to {recipient.get('number')}")
-                        return True
+                        logging.debug(f"✅ SMS sent successfully to {recipient.get('number')}")
+                        metrics.count('africastalking', 'success')
                     else:
                         logging.error(f"❌ SMS failed to {recipient.get('number')}: {recipient.get('status')}")
-                        return False
+                        metrics.count('africastalking', 'failure')
+                    return recipient
             else:
                 logging.error(f"Invalid AT response structure: {response}")
-                return False
 
         except Exception as e:
             logging.error(f"Exception sending SMS to {phone_number}: {e}")
-            return False
 
-        return False
+        metrics.count('africastalking', 'failure')
+        return self._failed_result(phone_number)
+
+    def send_bulk(self, messages, chunk_size=None):
+        """Send many SMS using as few Africa's Talking requests as possible.
+
+        `messages` is an iterable of (phone_number, message) pairs. Recipients of
+        identical messages are grouped into multi-recipient requests of at most
+        `chunk_size` numbers. Returns a list with one per-recipient result
+        (number, status, messageId, cost, statusCode) for each input pair, in
+        input order; a pair repeated in the input is sent once and shares its result.
+        """
+        messages = list(messages)
+        if not self.initialized:
+            logging.error("SMS service not initialized")
+            return [self._failed_result(phone_number) for phone_number, _ in messages]
+
+        chunk_size = chunk_size or current_app.config['AT_BULK_CHUNK_SIZE']
+        results = [None] * len(messages)
+
+        # Group recipients by message text, preserving order and sending each number a
+        # given message once. The SDK rejects a whole request if any number is invalid,
+        # so filter those out first.
+        groups = {}  # message -> {formatted number: indexes of its input pairs}
+        for index, (phone_number, message) in enumerate(messages):
+            formatted = phone_normalizer.normalize(phone_number)
+            if formatted is None:
+                results[index] = self._failed_result(phone_number, 'InvalidPhoneNumber')
+                continue
+            groups.setdefault(message, {}).setdefault(formatted, []).append(index)
+
+        requests_made = 0
+        for message, recipients in groups.items():
+            numbers = list(recipients)
+            for start in range(0, len(numbers), chunk_size):
+                chunk = numbers[start:start + chunk_size]
+                requests_made += 1
+                try:
+                    with metrics.time('sms_send_bulk'):
+                        response = self.sms_service.send(message=message, recipients=chunk)
+                    chunk_results = self._parse_recipients(response)
+                except Exception as e:
+                    logging.error(f"Exception sending bulk SMS chunk of {len(chunk)}: {e}")
+                    chunk_results = {}
+
+                for phone_number in chunk:
+                    result = chunk_results.get(phone_number) or self._failed_result(phone_number)
+                    for index in recipients[phone_number]:
+                        results[index] = result
+
+        sent = sum(1 for result in results if result.get('status') == 'Success')
+        metrics.count('africastalking', 'success', sent)
+        metrics.count('africastalking', 'failure', len(results) - sent)
+        logging.info(f"📤 Bulk SMS: {sent}/{len(results)} sent in {requests_made} requests")
+        return results
+
+    def _parse_recipients(self, response):
+        """Map each recipient number in an AT send response to its result."""
+        if not response or 'SMSMessageData' not in response:
+            logging.error(f"Invalid AT response structure: {response}")
+            return {}
+        recipients = response['SMSMessageData'].get('Recipients', [])
+        return {recipient.get('number'): recipient for recipient in recipients}
+
+    def _failed_result(self, phone_number, status='Failed'):
+        return {
+            'number': phone_number,
+            'status': status,
+            'messageId': None,
+            'cost': None,
+            'statusCode': None
+        }
 
 # Create a singleton instance
 sms_service = SMSService() 
\ No newline at end of file
@@ -0,0 +1,115 @@
+import cProfile
+import logging
+import os
+import random
+import re
+import time
+from contextlib import contextmanager
+from datetime import datetime
+from flask import current_app, g, has_request_context, request
+
+@contextmanager
+def span(name):
+    """Time a stage of the current request; spans nest.
+
+    Outside a request (job workers, CLI commands) this does nothing.
+    """
+    if not has_request_context() or 'spans' not in g:
+        yield
+        return
+    g.span_stack.append(name)
+    path = '.'.join(g.span_stack)
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        g.spans.append((path, (time.perf_counter() - start) * 1000))
+        g.span_stack.pop()
+
+class Tracer:
+    """Per-request span timings, Server-Timing headers, slow request logs and sampled profiles.
+
+    Spans are summed by name into a `Server-Timing` header (nested spans are
+    named parent.child, so DevTools shows the breakdown). Requests slower than
+    SLOW_REQUEST_MS are logged with their spans. PROFILE_SAMPLE_RATE of
+    requests run under cProfile and are dumped to PROFILE_DIR for `pstats`
+    or snakeviz.
+    """
+
+    def __init__(self):
+        self.server_timing = True
+        self.slow_request_ms = 1000
+        self.profile_sample_rate = 0.0
+        self.profile_dir = None
+        self.profiles_written = 0
+        self.initialized = False
+
+    def initialize(self):
+        """Load tracing settings from the application config."""
+        config = current_app.config
+        self.server_timing = config['SERVER_TIMING_ENABLED']
+        self.slow_request_ms = config['SLOW_REQUEST_MS']
+        self.profile_sample_rate = config['PROFILE_SAMPLE_RATE']
+        self.profile_dir = config['PROFILE_DIR'] or os.path.join(current_app.instance_path, 'profiles')
+        if self.profile_sample_rate > 0:
+            os.makedirs(self.profile_dir, exist_ok=True)
+        self.initialized = True
+        logging.info(f"Request tracing initialized (slow > {self.slow_request_ms}ms, profiling {self.profile_sample_rate:.0%} of requests)")
+        return True
+
+    def register(self, app):
+        """Start and finish a trace around every request."""
+
+        @app.before_request
+        def start_trace():
+            g.spans = []
+            g.span_stack = []
+            g.trace_started = time.perf_counter()
+            g.profiler = None
+            if self.profile_sample_rate > 0 and random.random() < self.profile_sample_rate:
+                profiler = cProfile.Profile()
+                try:
+                    profiler.enable()
+                    g.profiler = profiler
+                except ValueError:
+                    pass  # Another request's profiler is active on this interpreter
+
+        @app.after_request
+        def finish_trace(response):
+            started = g.pop('trace_started', None)
+            if started is None:
+                return response
+            total = (time.perf_counter() - started) * 1000
+            profiler = g.pop('profiler', None)
+            if profiler is not None:
+                profiler.disable()
+                self._write_profile(profiler, total)
+
+            timings = self._summarize(g.spans)
+            if self.server_timing:
+                entries = [f"{name};dur={ms:.1f}" for name, ms in timings.items()]
+                entries.append(f"total;dur={total:.1f}")
+                response.headers['Server-Timing'] = ', '.join(entries)
+            if self.slow_request_ms and total >= self.slow_request_ms:
+                breakdown = ', '.join(f"{name}={ms:.1f}ms" for name, ms in timings.items()) or 'no spans'
+                logging.warning(f"🐢 Slow request {request.method} {request.path} {response.status_code} took {total:.1f}ms: {breakdown}")
+            return response
+
+    def _summarize(self, spans):
+        """Sum span durations by name, outermost spans first."""
+        timings = {}
+        for path, ms in sorted(spans, key=lambda item: item[0].count('.')):
+            timings[path] = timings.get(path, 0) + ms
+        return timings
+
+    def _write_profile(self, profiler, total):
+        name = re.sub(r'[^A-Za-z0-9]+', '_', request.path).strip('_') or 'root'
+        filename = f"{datetime.utcnow():%Y%m%dT%H%M%S%f}-{request.method}-{name}-{total:.0f}ms.prof"
+        try:
+            profiler.dump_stats(os.path.join(self.profile_dir, filename))
+            self.profiles_written += 1
+        except OSError as e:
+            logging.error(f"Could not write profile {filename}: {e}")
+
+# Create a singleton instance
+tracer = Tracer()
@@ -0,0 +1,81 @@
+import json
+import logging
+import os
+import time
+from calendar import timegm
+from flask import current_app
+
+class TrafficCapture:
+    """Append-only recording of inbound /sms_callback payloads.
+
+    With TRAFFIC_CAPTURE_PATH set, every callback's form fields are appended
+    to that file as one compact JSON line, {"t": unix time, "form": {...}},
+    for replay with `python -m benchmarks.replay`. The file is opened with
+    O_APPEND and each line is a single write, so several server processes
+    can share it. Captures contain phone numbers and message text.
+    """
+
+    def __init__(self):
+        self.path = None
+        self.enabled = False
+        self.recorded = 0
+        self._fd = None
+
+    def initialize(self):
+        """Open the capture file if capture is configured."""
+        self.close()
+        self.path = current_app.config['TRAFFIC_CAPTURE_PATH']
+        self.enabled = bool(self.path)
+        if not self.enabled:
+            return False
+        try:
+            self._fd = os.open(self.path, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o600)
+        except OSError as e:
+            logging.error(f"Failed to open traffic capture file {self.path}: {e}")
+            self.enabled = False
+            return False
+        logging.info(f"📼 Capturing /sms_callback traffic to {self.path}")
+        return True
+
+    def record(self, form, received_at=None):
+        """Append one callback's form fields."""
+        if not self.enabled:
+            return
+        self._write({'t': round(received_at or time.time(), 6), 'form': dict(form)})
+
+    def _write(self, event):
+        line = json.dumps(event, ensure_ascii=False, separators=(',', ':')) + '\n'
+        try:
+            os.write(self._fd, line.encode('utf-8'))
+            self.recorded += 1
+        except OSError as e:
+            logging.error(f"Failed to write traffic capture: {e}")
+
+    def export_messages(self, output, messages):
+        """Write (phone, text, link_id, timestamp) rows to `output` in capture format. Returns the count."""
+        count = 0
+        for phone, text, link_id, timestamp in messages:
+            event = {
+                't': timegm(timestamp.timetuple()) + timestamp.microsecond / 1e6,
+                'form': {
+                    'from': phone,
+                    'text': text,
+                    'linkId': link_id,
+                    'date': timestamp.strftime('%Y-%m-%d %H:%M:%S')
+                }
+            }
+            output.write(json.dumps(event, ensure_ascii=False, separators=(',', ':')) + '\n')
+            count += 1
+        return count
+
+    def close(self):
+        if self._fd is not None:
+            os.close(self._fd)
+            self._fd = None
+        self.enabled = False
+
+    def stats(self):
+        return {"enabled": self.enabled, "path": self.path, "recorded": self.recorded}
+
+# Create a singleton instance
+traffic_capture = TrafficCapture()
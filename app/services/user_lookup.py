@@ -0,0 +1,108 @@
+import logging
+import threading
+import time
+from collections import OrderedDict
+from flask import current_app
+from sqlalchemy import event
+from app.models.models import db, User
+
+# Returned by `get` when a phone number has no cache entry
+MISS = object()
+
+class UserLookupCache:
+    """Bounded LRU mapping of phone number to user id.
+
+    Unknown numbers are cached as None for a shorter TTL, so repeated lookups
+    of numbers without a user do not reach the database either. Entries are
+    per process: users created elsewhere are picked up once a negative entry
+    expires, and deletes through the ORM invalidate the entry in this process.
+    """
+
+    def __init__(self):
+        self.max_entries = 0
+        self.ttl = 300
+        self.negative_ttl = 30
+        self.hits = 0
+        self.negative_hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.initialized = False
+        self._entries = OrderedDict()  # phone_number -> (user_id or None, expires_at)
+        self._lock = threading.Lock()
+
+    def initialize(self):
+        """Load cache limits from the application config."""
+        config = current_app.config
+        self.max_entries = config['USER_CACHE_SIZE']
+        self.ttl = config['USER_CACHE_TTL']
+        self.negative_ttl = config['USER_CACHE_NEGATIVE_TTL']
+        self.clear()
+        self.initialized = True
+        logging.info(f"User lookup cache initialized ({self.max_entries} numbers, {self.ttl}s TTL)")
+        return True
+
+    def lookup(self, phone_number):
+        """Return the user id for a phone number, or None if there is no such user."""
+        user_id = self.get(phone_number)
+        if user_id is MISS:
+            user_id = db.session.query(User.id).filter_by(phone_number=phone_number).scalar()
+            self.put(phone_number, user_id)
+        return user_id
+
+    def get(self, phone_number):
+        """Return the cached user id (None if known absent), or MISS."""
+        with self._lock:
+            entry = self._entries.get(phone_number)
+            if entry is not None and entry[1] < time.monotonic():
+                del self._entries[phone_number]
+                entry = None
+            if entry is None:
+                self.misses += 1
+                return MISS
+            self._entries.move_to_end(phone_number)
+            if entry[0] is None:
+                self.negative_hits += 1
+            else:
+                self.hits += 1
+            return entry[0]
+
+    def put(self, phone_number, user_id):
+        """Cache a committed user id, or None for a number with no user."""
+        if self.max_entries <= 0:
+            return
+        ttl = self.ttl if user_id is not None else self.negative_ttl
+        with self._lock:
+            self._entries[phone_number] = (user_id, time.monotonic() + ttl)
+            self._entries.move_to_end(phone_number)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def invalidate(self, phone_number):
+        with self._lock:
+            self._entries.pop(phone_number, None)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self):
+        """Return cache size and hit/miss counters."""
+        lookups = self.hits + self.negative_hits + self.misses
+        return {
+            "numbers": len(self._entries),
+            "max_numbers": self.max_entries,
+            "hits": self.hits,
+            "negative_hits": self.negative_hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hit_rate": round((self.hits + self.negative_hits) / lookups, 3) if lookups else None
+        }
+
+# Create a singleton instance
+user_lookup = UserLookupCache()
+
+@event.listens_for(User, 'after_delete')
+def _invalidate_deleted_user(mapper, connection, target):
+    # Bulk query.delete() bypasses this; such deletes are picked up at TTL expiry
+    user_lookup.invalidate(target.phone_number)
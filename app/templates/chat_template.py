@@ -287,8 +287,13 @@ CHAT_TEMPLATE = '''
     </div>
 
     <script>
-        // Generate a unique session ID
-        const sessionId = 'session_' + Math.random().toString(36).substr(2, 9);
+        // Reuse this browser's session ID so history survives page reloads
+        let sessionId = localStorage.getItem('chatSessionId');
+        if (!sessionId) {
+            sessionId = 'session_' + Math.random().toString(36).substr(2, 9);
+            localStorage.setItem('chatSessionId', sessionId);
+        }
+        let historyEtag = null;
         
         // DOM Elements
         const messagesContainer = document.getElementById('messages');
@@ -303,13 +308,21 @@ CHAT_TEMPLATE = '''
             sendButton.disabled = !this.value.trim();
         });
         
-        // Load chat history
+        // Load chat history (newest page); unchanged history comes back as 304
         async function loadChatHistory() {
             try {
-                const response = await fetch('/chat_history');
+                const headers = historyEtag ? { 'If-None-Match': historyEtag } : {};
+                const response = await fetch('/chat_history?session_id=' + encodeURIComponent(sessionId), {
+                    headers: headers,
+                    cache: 'no-store'
+                });
+                if (response.status === 304) return;
+                
                 const data = await response.json();
+                historyEtag = response.headers.get('ETag');
                 
-                data.messages.forEach(msg => {
+                messagesContainer.innerHTML = '';
+                data.messages.slice().reverse().forEach(msg => {
                     addMessageToUI(msg.text, msg.sender_type, msg.timestamp);
                 });
                 
@@ -337,6 +350,7 @@ CHAT_TEMPLATE = '''
             messagesContainer.appendChild(messageDiv);
             
             scrollToBottom();
+            return messageText;
         }
         
         // Send message
@@ -355,8 +369,9 @@ CHAT_TEMPLATE = '''
             // Show loading indicator
             loadingIndicator.classList.add('active');
             
+            let aiText = null;
             try {
-                const response = await fetch('/chat', {
+                const response = await fetch('/chat/stream', {
                     method: 'POST',
                     headers: {
                         'Content-Type': 'application/json',
@@ -367,10 +382,39 @@ CHAT_TEMPLATE = '''
                     })
                 });
                 
-                const data = await response.json();
+                if (!response.ok || !response.body) {
+                    throw new Error(`HTTP ${response.status}`);
+                }
                 
-                // Add AI response to UI
-                addMessageToUI(data.response, 'ai', new Date().toISOString());
+                // Read Server-Sent Events and render the reply as it arrives
+                const reader = response.body.getReader();
+                const decoder = new TextDecoder();
+                let buffer = '';
+                
+                while (true) {
+                    const { value, done } = await reader.read();
+                    if (done) break;
+                    buffer += decoder.decode(value, { stream: true });
+                    
+                    let boundary;
+                    while ((boundary = buffer.indexOf('\\n\\n')) !== -1) {
+                        const event = parseEvent(buffer.slice(0, boundary));
+                        buffer = buffer.slice(boundary + 2);
+                        
+                        if (event.type === 'message') {
+                            if (!aiText) {
+                                loadingIndicator.classList.remove('active');
+                                aiText = addMessageToUI('', 'ai', new Date().toISOString());
+                            }
+                            aiText.textContent += event.data.text;
+                            scrollToBottom();
+                        } else if (event.type === 'done' && !aiText) {
+                            aiText = addMessageToUI(event.data.response, 'ai', new Date().toISOString());
+                        } else if (event.type === 'error') {
+                            throw new Error(event.data.error);
+                        }
+                    }
+                }
             } catch (error) {
                 console.error('Error sending message:', error);
                 addMessageToUI('Sorry, I encountered an error. Please try again.', 'ai', new Date().toISOString());
@@ -379,6 +423,17 @@ CHAT_TEMPLATE = '''
             }
         }
         
+        // Parse one Server-Sent Event block into {type, data}
+        function parseEvent(block) {
+            let type = 'message';
+            const dataLines = [];
+            block.split('\\n').forEach(line => {
+                if (line.startsWith('event: ')) type = line.slice(7);
+                else if (line.startsWith('data: ')) dataLines.push(line.slice(6));
+            });
+            return { type: type, data: JSON.parse(dataLines.join('\\n') || 'null') };
+        }
+        
         // Event listeners
         sendButton.addEventListener('click', sendMessage);
         
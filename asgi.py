@@ -0,0 +1,8 @@
+from app import create_app
+from app.asgi import create_asgi_app
+
+flask_app = create_app()
+app = create_asgi_app(flask_app)
+
+# Run with an ASGI server, e.g.:
+#   uvicorn asgi:app --host 0.0.0.0 --port 5000 --workers 2
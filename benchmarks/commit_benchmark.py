@@ -0,0 +1,80 @@
+"""Count database commits per inbound SMS on the webhook-to-reply path.
+
+Run from the project root:
+
+    python -m benchmarks.commit_benchmark
+
+Posts SMS to /sms_callback against a file-backed SQLite database (so every
+commit pays for an fsync) with one job worker, and counts the commits until
+every reply has been saved. Gemini and Africa's Talking are replaced by
+instant fakes. Expect 2 commits per SMS for new and returning users alike:
+one for the user upsert, message and job, one for the reply and job removal.
+"""
+import argparse
+import logging
+import os
+import tempfile
+import time
+
+DB_DIR = tempfile.mkdtemp(prefix='commit-benchmark-')
+os.environ['DATABASE_URL'] = f"sqlite:///{os.path.join(DB_DIR, 'benchmark.db')}"
+os.environ['JOB_WORKERS'] = '1'
+os.environ['RESPONSE_CACHE_ENABLED'] = 'False'
+os.environ['SESSION_CLEANUP_INTERVAL'] = '0'
+
+from sqlalchemy import event
+from app import create_app
+from app.models.models import db, Message, Job
+from app.services.ai_service import ai_service
+from app.services.sms_service import sms_service
+
+class CommitCounter:
+    def __init__(self, engine):
+        self.count = 0
+        event.listen(engine, 'commit', self._on_commit)
+
+    def _on_commit(self, conn):
+        self.count += 1
+
+def wait_for_replies(expected, timeout=60):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        db.session.rollback()
+        if Message.query.filter_by(sender_type='ai').count() >= expected and Job.query.count() == 0:
+            return
+        time.sleep(0.01)
+    raise RuntimeError(f"Timed out waiting for {expected} replies")
+
+def run(client, counter, phones, label, replies_before):
+    counter.count = 0
+    start = time.perf_counter()
+    for n, phone in enumerate(phones):
+        client.post('/sms_callback', data={'from': phone, 'text': f'question {n}', 'linkId': f'link-{label}-{n}'})
+    wait_for_replies(replies_before + len(phones))
+    elapsed = time.perf_counter() - start
+    commits = counter.count
+    print(f"{label:>10} {len(phones):>6} {commits:>8} {commits / len(phones):>12.2f} {elapsed / len(phones) * 1000:>10.2f}")
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--messages', type=int, default=200, help='SMS per phase')
+    args = parser.parse_args()
+
+    app = create_app('production')
+    logging.getLogger().setLevel(logging.WARNING)
+    ai_service.initialized = True
+    ai_service.generate_response = lambda message_text, conversation_history, use_cache=True: f"Answer to {message_text}"
+    sms_service.send = lambda phone_number, message: {'number': phone_number, 'status': 'Success', 'messageId': None}
+
+    client = app.test_client()
+    with app.app_context():
+        counter = CommitCounter(db.engine)
+        phones = [f'+2547100{n:05d}' for n in range(args.messages)]
+
+        print(f"Database: {os.environ['DATABASE_URL']}")
+        print(f"{'users':>10} {'sms':>6} {'commits':>8} {'commits/sms':>12} {'ms/sms':>10}")
+        run(client, counter, phones, 'new', 0)
+        run(client, counter, phones, 'returning', args.messages)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,135 @@
+"""Local stand-ins for Gemini and Africa's Talking.
+
+    from benchmarks.fakes import install
+    install(ai_latency='lognormal:0.8,0.4', ai_error_rate=0.01, sms_latency='uniform:0.05,0.2')
+
+replaces the Gemini model behind `ai_service` and the Africa's Talking SDK
+client behind `sms_service`, so everything else (prompt building, admission
+control, phone normalization, response parsing, metrics) runs as in
+production. Latencies are distribution specs (seconds):
+
+    fixed:0.2            always 0.2
+    uniform:0.1,0.5      uniform between 0.1 and 0.5
+    normal:0.3,0.05      mean 0.3, standard deviation 0.05 (clipped at 0)
+    lognormal:0.8,0.4    median 0.8, sigma 0.4 (long right tail, like real LLM calls)
+"""
+import asyncio
+import itertools
+import math
+import random
+import threading
+import time
+from types import SimpleNamespace
+
+WORDS = (
+    "add your material cost labour and transport then put a margin of about thirty percent "
+    "keep a simple daily book of sales and expenses ask for a deposit before starting the job "
+    "use good quality timber glue and clamp overnight register on eCitizen and file with KRA "
+    "post photos of finished work on WhatsApp status and ask happy customers to refer friends"
+).split()
+
+class Latency:
+    """Samples delays from a distribution spec such as 'lognormal:0.8,0.4'."""
+
+    def __init__(self, spec):
+        self.spec = spec
+        kind, _, params = spec.partition(':')
+        values = [float(value) for value in params.split(',')] if params else []
+        if kind == 'fixed' and len(values) == 1:
+            self._sample = lambda: values[0]
+        elif kind == 'uniform' and len(values) == 2:
+            self._sample = lambda: random.uniform(*values)
+        elif kind == 'normal' and len(values) == 2:
+            self._sample = lambda: max(0.0, random.gauss(*values))
+        elif kind == 'lognormal' and len(values) == 2:
+            self._sample = lambda: random.lognormvariate(math.log(values[0]), values[1])
+        else:
+            raise ValueError(f"Invalid latency spec '{spec}'")
+
+    def sample(self):
+        return self._sample()
+
+class FakeBackendError(Exception):
+    pass
+
+def _reply_text():
+    # Around the tutor's 160-character SMS target, sometimes over it
+    return ' '.join(random.choice(WORDS) for _ in range(random.randint(12, 36))).capitalize() + '.'
+
+def _response(text):
+    part = SimpleNamespace(text=text)
+    return SimpleNamespace(candidates=[SimpleNamespace(content=SimpleNamespace(parts=[part]))])
+
+class FakeGeminiModel:
+    """Mimics the parts of genai.GenerativeModel that AIService uses."""
+
+    def __init__(self, latency='lognormal:0.8,0.4', error_rate=0.0):
+        self.latency = Latency(latency)
+        self.error_rate = error_rate
+        self.calls = 0
+        self._async_client = object()  # Keeps AIService from creating a real gRPC client
+
+    def _next(self):
+        self.calls += 1
+        if random.random() < self.error_rate:
+            raise FakeBackendError("429 Resource has been exhausted (fake)")
+        return self.latency.sample(), _reply_text()
+
+    def generate_content(self, prompt, stream=False):
+        delay, text = self._next()
+        if not stream:
+            time.sleep(delay)
+            return _response(text)
+        return self._stream(delay, text)
+
+    def _stream(self, delay, text):
+        words = text.split(' ')
+        chunks = [' '.join(words[i:i + 5]) + ' ' for i in range(0, len(words), 5)]
+        for chunk in chunks:
+            time.sleep(delay / len(chunks))
+            yield _response(chunk)
+
+    async def generate_content_async(self, prompt):
+        delay, text = self._next()
+        await asyncio.sleep(delay)
+        return _response(text)
+
+class FakeAfricasTalkingSMS:
+    """Mimics africastalking.SMS.send; failed recipients get status 'Failed'."""
+
+    def __init__(self, latency='uniform:0.05,0.2', error_rate=0.0):
+        self.latency = Latency(latency)
+        self.error_rate = error_rate
+        self.requests = 0
+        self.recipients = 0
+        self._ids = itertools.count(1)
+        self._lock = threading.Lock()
+
+    def send(self, message, recipients, sender_id=None, enqueue=False):
+        time.sleep(self.latency.sample())
+        results = []
+        with self._lock:
+            self.requests += 1
+            self.recipients += len(recipients)
+            for number in recipients:
+                if random.random() < self.error_rate:
+                    results.append({'number': number, 'status': 'Failed', 'statusCode': 500,
+                                    'messageId': 'None', 'cost': '0'})
+                else:
+                    results.append({'number': number, 'status': 'Success', 'statusCode': 101,
+                                    'messageId': f'ATXid_fake_{next(self._ids)}', 'cost': 'KES 0.8000'})
+        sent = sum(1 for result in results if result['status'] == 'Success')
+        return {'SMSMessageData': {'Message': f'Sent to {sent}/{len(recipients)}', 'Recipients': results}}
+
+def install(ai_latency='lognormal:0.8,0.4', ai_error_rate=0.0, sms_latency='uniform:0.05,0.2', sms_error_rate=0.0):
+    """Point ai_service and sms_service at the fakes. Returns (gemini, sms)."""
+    from app.services.ai_service import ai_service
+    from app.services.sms_service import sms_service
+
+    gemini = FakeGeminiModel(ai_latency, ai_error_rate)
+    sms = FakeAfricasTalkingSMS(sms_latency, sms_error_rate)
+    ai_service.model = gemini
+    ai_service.initialized = True
+    sms_service.sms_service = sms
+    sms_service.initialized = True
+    return gemini, sms
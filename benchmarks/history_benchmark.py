@@ -0,0 +1,80 @@
+"""Benchmark Message.get_conversation_history as one user's history grows.
+
+Run from the project root:
+
+    python -m benchmarks.history_benchmark
+
+The latest-N query walks the (user_id, timestamp) index backwards, so its cost
+should stay flat from a few hundred to 100k rows for the user.
+"""
+import argparse
+import logging
+import time
+from datetime import datetime, timedelta
+from sqlalchemy import insert, text
+from app import create_app
+from app.models.models import db, User, Message
+
+SIZES = [100, 1000, 10000, 100000]
+OTHER_USERS = 50
+OTHER_USER_MESSAGES = 200
+
+def seed(user_id, start, count, base_time):
+    rows = [
+        {
+            'user_id': user_id,
+            'sender_type': 'user' if i % 2 == 0 else 'ai',
+            'text': f'message {i}',
+            'timestamp': base_time + timedelta(seconds=i)
+        }
+        for i in range(start, start + count)
+    ]
+    db.session.execute(insert(Message), rows)
+    db.session.commit()
+
+def time_history(user_id, repeat):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        Message.get_conversation_history(user_id)
+    return (time.perf_counter() - start) / repeat * 1000
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--repeat', type=int, default=200, help='history reads per measurement')
+    args = parser.parse_args()
+
+    app = create_app('testing')
+    logging.getLogger().setLevel(logging.WARNING)
+
+    with app.app_context():
+        base_time = datetime.utcnow() - timedelta(days=365)
+
+        # Background traffic from other users so the index has to discriminate
+        for n in range(OTHER_USERS):
+            other = User(phone_number=f'+2547000{n:05d}')
+            db.session.add(other)
+            db.session.commit()
+            seed(other.id, 0, OTHER_USER_MESSAGES, base_time)
+
+        user = User(phone_number='+254799999999')
+        db.session.add(user)
+        db.session.commit()
+
+        plan = db.session.execute(text(
+            "EXPLAIN QUERY PLAN SELECT * FROM message WHERE user_id = :user_id "
+            "ORDER BY timestamp DESC, id DESC LIMIT 10"
+        ), {'user_id': user.id}).fetchall()
+        print("Query plan:", '; '.join(row[-1] for row in plan))
+
+        print(f"{'user rows':>10} {'ms/read':>10}")
+        seeded = 0
+        for size in SIZES:
+            seed(user.id, seeded, size - seeded, base_time)
+            seeded = size
+            print(f"{size:>10} {time_history(user.id, args.repeat):>10.3f}")
+
+        latest = Message.get_conversation_history(user.id).splitlines()[-1]
+        print(f"Latest turn returned: {latest!r}")
+
+if __name__ == '__main__':
+    main()
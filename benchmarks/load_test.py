@@ -0,0 +1,237 @@
+"""Open-loop load test of /sms_callback and /api/chat.
+
+Run from the project root:
+
+    python -m benchmarks.load_test --rate 50 --duration 30
+
+By default the app is served in-process (threaded Werkzeug server, file-backed
+SQLite in a temporary directory, production config) with Gemini and Africa's
+Talking replaced by the fakes in benchmarks/fakes.py. Pass --url to load an
+already running deployment instead; the fake backend options then do nothing.
+
+Requests arrive as a Poisson process at --rate per second regardless of how
+fast earlier ones complete, and latency is measured from each request's
+scheduled time, so a stalled server shows up as tail latency instead of a
+lower request rate. The report gives throughput and p50/p95/p99 per endpoint.
+Save it with --json and gate a deploy on it with --baseline:
+
+    python -m benchmarks.load_test --json baseline.json
+    python -m benchmarks.load_test --baseline baseline.json --max-regression 0.25
+"""
+import argparse
+import json
+import math
+import os
+import random
+import sys
+import tempfile
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+import requests
+
+# Short SMS-style questions like those the tutor's artisan and small-business users send
+QUESTIONS = [
+    "How do I price a 3 seater sofa if materials cost 18000?",
+    "Best way to keep records for my tailoring shop?",
+    "Jinsi ya kupata leseni ya biashara Nairobi",
+    "How can I get customers for my welding business?",
+    "Which glue is best for joining mahogany?",
+    "Customer hataki kulipa balance, nifanye nini?",
+    "How do I register for KRA PIN and file nil returns?",
+    "My grinder sparks a lot, is it safe?",
+    "How much should I charge to wire a 2 bedroom house?",
+    "Tips to sell shoes on WhatsApp",
+    "How do I apply for a Hustler Fund loan?",
+    "What size cable for a 3kW water heater?",
+    "Nawezaje kuongeza bei bila kupoteza wateja?",
+    "How to mix cement for a strong floor slab",
+    "Is it better to buy timber in bulk or per job?"
+]
+
+ENDPOINTS = ('sms_callback', 'api_chat')
+
+def start_local_server(args):
+    """Serve the app with fake backends on a free local port. Returns (url, app, fakes)."""
+    db_dir = tempfile.mkdtemp(prefix='load-test-')
+    os.environ['DATABASE_URL'] = f"sqlite:///{os.path.join(db_dir, 'load_test.db')}"
+    os.environ.setdefault('RESPONSE_CACHE_ENABLED', 'False')  # Every question reaches the fake Gemini
+    os.environ.setdefault('LOG_LEVEL', 'WARNING')
+    os.environ.setdefault('LOG_PAYLOAD_LEVEL', 'WARNING')
+    os.environ.setdefault('SERVER_TIMING_ENABLED', 'False')
+
+    from werkzeug.serving import make_server
+    from app import create_app
+    from benchmarks.fakes import install
+
+    app = create_app('production')
+    fakes = install(args.ai_latency, args.ai_error_rate, args.sms_latency, args.sms_error_rate)
+    server = make_server('127.0.0.1', 0, app, threaded=True)
+    threading.Thread(target=server.serve_forever, name='load-test-server', daemon=True).start()
+    print(f"Serving in-process on port {server.server_port}, database {os.environ['DATABASE_URL']}")
+    return f"http://127.0.0.1:{server.server_port}", app, fakes
+
+def phone_number(n):
+    # Mix local and international forms, as Africa's Talking users type them
+    return f"07{n:08d}" if n % 3 == 0 else f"+2547{n:08d}"
+
+class LoadGenerator:
+    def __init__(self, url, users, timeout):
+        self.url = url.rstrip('/')
+        self.users = users
+        self.timeout = timeout
+        self.results = {endpoint: [] for endpoint in ENDPOINTS}  # (latency seconds, ok)
+        self._lock = threading.Lock()
+        self._local = threading.local()
+
+    def _session(self):
+        session = getattr(self._local, 'session', None)
+        if session is None:
+            session = self._local.session = requests.Session()
+        return session
+
+    def fire(self, endpoint, scheduled):
+        user = random.randrange(self.users)
+        try:
+            if endpoint == 'sms_callback':
+                response = self._session().post(f"{self.url}/sms_callback", data={
+                    'from': phone_number(user),
+                    'to': '12345',
+                    'text': random.choice(QUESTIONS),
+                    'linkId': str(uuid.uuid4()),
+                    'date': time.strftime('%Y-%m-%d %H:%M:%S'),
+                    'id': str(uuid.uuid4())
+                }, timeout=self.timeout)
+            else:
+                response = self._session().post(f"{self.url}/api/chat", json={
+                    'message': random.choice(QUESTIONS),
+                    'session_id': f"load_{user}"
+                }, timeout=self.timeout)
+            ok = 200 <= response.status_code < 300
+        except requests.RequestException:
+            ok = False
+        latency = time.perf_counter() - scheduled
+        with self._lock:
+            self.results[endpoint].append((latency, ok))
+
+    def run(self, rate, duration, chat_ratio, concurrency):
+        """Fire requests for `duration` seconds; returns the elapsed wall time."""
+        start = time.perf_counter()
+        next_at = start
+        with ThreadPoolExecutor(max_workers=concurrency) as pool:
+            while True:
+                next_at += random.expovariate(rate)
+                if next_at - start >= duration:
+                    break
+                delay = next_at - time.perf_counter()
+                if delay > 0:
+                    time.sleep(delay)
+                endpoint = 'api_chat' if random.random() < chat_ratio else 'sms_callback'
+                pool.submit(self.fire, endpoint, next_at)
+        return time.perf_counter() - start
+
+def percentile(values, fraction):
+    """Nearest-rank percentile of a sorted list."""
+    return values[max(0, math.ceil(fraction * len(values)) - 1)]
+
+def summarize(results, elapsed):
+    report = {}
+    for endpoint, samples in results.items():
+        if not samples:
+            continue
+        latencies = sorted(latency for latency, ok in samples)
+        report[endpoint] = {
+            'requests': len(samples),
+            'errors': sum(1 for latency, ok in samples if not ok),
+            'throughput': len(samples) / elapsed,
+            'p50_ms': percentile(latencies, 0.50) * 1000,
+            'p95_ms': percentile(latencies, 0.95) * 1000,
+            'p99_ms': percentile(latencies, 0.99) * 1000,
+            'max_ms': latencies[-1] * 1000
+        }
+    return report
+
+def print_report(report):
+    print(f"{'endpoint':>14} {'requests':>9} {'errors':>7} {'req/s':>8} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} {'max ms':>9}")
+    for endpoint, row in report.items():
+        print(f"{endpoint:>14} {row['requests']:>9} {row['errors']:>7} {row['throughput']:>8.1f} "
+              f"{row['p50_ms']:>9.1f} {row['p95_ms']:>9.1f} {row['p99_ms']:>9.1f} {row['max_ms']:>9.1f}")
+
+def compare(report, baseline, max_regression):
+    """Return lines describing percentiles more than `max_regression` slower than the baseline."""
+    regressions = []
+    for endpoint, row in report.items():
+        base = baseline.get(endpoint)
+        if not base:
+            continue
+        for key in ('p50_ms', 'p95_ms', 'p99_ms'):
+            if base[key] > 0 and row[key] > base[key] * (1 + max_regression):
+                regressions.append(f"{endpoint} {key}: {row[key]:.1f} vs baseline {base[key]:.1f}")
+    return regressions
+
+def wait_for_replies(app, expected, timeout):
+    """Wait for queued SMS replies to be sent. Returns (replies, seconds waited)."""
+    from app.models.models import db, Message, Job
+
+    start = time.perf_counter()
+    with app.app_context():
+        while True:
+            db.session.rollback()
+            replies = Message.query.filter_by(sender_type='ai').filter(Message.user_id.isnot(None)).count()
+            if (replies >= expected and Job.query.count() == 0) or time.perf_counter() - start > timeout:
+                return replies, time.perf_counter() - start
+            time.sleep(0.2)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--url', help='Load a running server instead of an in-process one')
+    parser.add_argument('--rate', type=float, default=20, help='Requests per second')
+    parser.add_argument('--duration', type=float, default=30, help='Seconds of load')
+    parser.add_argument('--chat-ratio', type=float, default=0.2, help='Fraction of requests to /api/chat')
+    parser.add_argument('--users', type=int, default=1000, help='Distinct phone numbers and chat sessions')
+    parser.add_argument('--concurrency', type=int, default=200, help='Most requests in flight')
+    parser.add_argument('--timeout', type=float, default=30, help='Per-request timeout in seconds')
+    parser.add_argument('--ai-latency', default='lognormal:0.8,0.4', help='Fake Gemini latency spec')
+    parser.add_argument('--ai-error-rate', type=float, default=0.01, help='Fraction of fake Gemini calls that fail')
+    parser.add_argument('--sms-latency', default='uniform:0.05,0.2', help="Fake Africa's Talking latency spec")
+    parser.add_argument('--sms-error-rate', type=float, default=0.01, help='Fraction of fake SMS recipients that fail')
+    parser.add_argument('--drain-timeout', type=float, default=60, help='Seconds to wait for queued SMS replies')
+    parser.add_argument('--json', help='Write the report to this file')
+    parser.add_argument('--baseline', help='Compare against a report written with --json')
+    parser.add_argument('--max-regression', type=float, default=0.25, help='Allowed slowdown per percentile vs the baseline')
+    args = parser.parse_args()
+
+    app = fakes = None
+    url = args.url
+    if not url:
+        url, app, fakes = start_local_server(args)
+
+    print(f"Loading {url} at {args.rate:g} req/s for {args.duration:g}s ({args.chat_ratio:.0%} /api/chat)")
+    generator = LoadGenerator(url, args.users, args.timeout)
+    elapsed = generator.run(args.rate, args.duration, args.chat_ratio, args.concurrency)
+    report = summarize(generator.results, elapsed)
+    print_report(report)
+
+    if app is not None:
+        expected = report.get('sms_callback', {}).get('requests', 0)
+        replies, waited = wait_for_replies(app, expected, args.drain_timeout)
+        gemini, sms = fakes
+        print(f"SMS replies sent: {replies}/{expected} ({waited:.1f}s to drain the queue); "
+              f"fake Gemini calls: {gemini.calls}, fake SMS requests: {sms.requests}")
+
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump(report, f, indent=2)
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            regressions = compare(report, json.load(f), args.max_regression)
+        for line in regressions:
+            print(f"REGRESSION {line}")
+        if regressions:
+            sys.exit(1)
+        print(f"No percentile regressed by more than {args.max_regression:.0%}")
+
+if __name__ == '__main__':
+    main()
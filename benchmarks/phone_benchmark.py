@@ -0,0 +1,71 @@
+"""Benchmark phone number normalization for bulk sends.
+
+Run from the project root:
+
+    python -m benchmarks.phone_benchmark
+
+Normalizes a list of mixed-format numbers (local, international, with
+separators, duplicates and invalid entries) with normalize_many, then the same
+list one number at a time through the memoized scalar path used by the webhook.
+"""
+import argparse
+import logging
+import random
+import time
+from app import create_app
+from app.services.phone_numbers import phone_normalizer
+
+FORMATS = [
+    lambda n: f'07{n:08d}',
+    lambda n: f'+2547{n:08d}',
+    lambda n: f'2547{n:08d}',
+    lambda n: f'07{n // 10000:04d} {n % 10000:04d}',
+    lambda n: f'+254-7{n:08d}'
+]
+
+def make_numbers(count, distinct, invalid_share):
+    rng = random.Random(42)
+    numbers = []
+    for _ in range(count):
+        if rng.random() < invalid_share:
+            numbers.append(f'07{rng.randrange(1000):03d}')
+        else:
+            n = rng.randrange(distinct)
+            numbers.append(rng.choice(FORMATS)(n))
+    return numbers
+
+def time_bulk(numbers):
+    start = time.perf_counter()
+    valid, invalid = phone_normalizer.normalize_many(numbers)
+    return (time.perf_counter() - start) * 1000, valid, invalid
+
+def time_scalar(numbers):
+    start = time.perf_counter()
+    results = [phone_normalizer.normalize(number) for number in numbers]
+    valid = list(dict.fromkeys(number for number in results if number))
+    invalid = [number for number, result in zip(numbers, results) if result is None]
+    return (time.perf_counter() - start) * 1000, valid, invalid
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--count', type=int, default=100000, help='numbers in the list')
+    parser.add_argument('--distinct', type=int, default=60000, help='distinct subscribers behind them')
+    parser.add_argument('--invalid', type=float, default=0.02, help='share of invalid entries')
+    args = parser.parse_args()
+
+    app = create_app('testing')
+    logging.getLogger().setLevel(logging.WARNING)
+
+    with app.app_context():
+        numbers = make_numbers(args.count, args.distinct, args.invalid)
+        phone_normalizer.cache_clear()
+
+        print(f"{'run':>12} {'numbers':>8} {'valid':>8} {'invalid':>8} {'ms':>8} {'us/number':>10}")
+        runs = [('bulk', time_bulk), ('scalar cold', time_scalar), ('scalar warm', time_scalar)]
+        for label, run in runs:
+            elapsed, valid, invalid = run(numbers)
+            print(f"{label:>12} {len(numbers):>8} {len(valid):>8} {len(invalid):>8} {elapsed:>8.1f} {elapsed * 1000 / len(numbers):>10.2f}")
+        print(f"Scalar memo cache: {phone_normalizer.cache_info()}")
+
+if __name__ == '__main__':
+    main()
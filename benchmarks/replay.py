@@ -0,0 +1,144 @@
+"""Replay captured /sms_callback traffic against a running instance.
+
+Run from the project root against a local server:
+
+    python -m benchmarks.replay capture.ndjson --url http://localhost:5000 --speed 1
+
+Capture files come from TRAFFIC_CAPTURE_PATH or `flask --app run.py
+export-traffic` (stored inbound messages with a linkId). Callbacks are sent
+at their recorded spacing divided by --speed (`--speed max` sends them as
+fast as the server takes them). Callbacks from the same sender are never
+in flight at once and keep their recorded order, so conversations replay
+as they happened. The report shows whether the server kept up: achieved vs
+offered rate, how far sends fell behind schedule, and latency percentiles.
+"""
+import argparse
+import json
+import threading
+import time
+import uuid
+from collections import defaultdict, deque
+from concurrent.futures import ThreadPoolExecutor
+import requests
+from benchmarks.load_test import percentile
+
+def load_events(path):
+    """Read capture events in recorded order."""
+    events = []
+    with open(path, encoding='utf-8') as f:
+        for line in f:
+            line = line.strip()
+            if line:
+                events.append(json.loads(line))
+    events.sort(key=lambda event: event['t'])
+    return events
+
+class Replayer:
+    def __init__(self, url, speed, concurrency, timeout, fresh_ids):
+        self.url = url.rstrip('/') + '/sms_callback'
+        self.speed = speed  # None replays at maximum speed
+        self.timeout = timeout
+        self.fresh_ids = fresh_ids
+        self.pool = ThreadPoolExecutor(max_workers=concurrency)
+        self.samples = []  # (lag seconds, latency seconds, ok)
+        self._pending = defaultdict(deque)
+        self._busy = set()
+        self._lock = threading.Lock()
+        self._local = threading.local()
+
+    def _session(self):
+        session = getattr(self._local, 'session', None)
+        if session is None:
+            session = self._local.session = requests.Session()
+        return session
+
+    def run(self, events):
+        """Replay `events`; returns the elapsed wall time."""
+        start = time.perf_counter()
+        first = events[0]['t'] if events else 0
+        for event in events:
+            scheduled = start if self.speed is None else start + (event['t'] - first) / self.speed
+            delay = scheduled - time.perf_counter()
+            if delay > 0:
+                time.sleep(delay)
+            self._dispatch(event, scheduled)
+        self.pool.shutdown(wait=True)
+        return time.perf_counter() - start
+
+    def _dispatch(self, event, scheduled):
+        sender = event['form'].get('from')
+        with self._lock:
+            if sender in self._busy:
+                # Keep per-sender order: sent when the sender's previous callback completes
+                self._pending[sender].append((event, scheduled))
+                return
+            self._busy.add(sender)
+        self.pool.submit(self._send_all, sender, event, scheduled)
+
+    def _send_all(self, sender, event, scheduled):
+        while True:
+            self._send(event, scheduled)
+            with self._lock:
+                if not self._pending[sender]:
+                    self._busy.discard(sender)
+                    del self._pending[sender]
+                    return
+                event, scheduled = self._pending[sender].popleft()
+
+    def _send(self, event, scheduled):
+        form = dict(event['form'])
+        if self.fresh_ids:
+            # New ids so the server treats replayed callbacks as new messages
+            form['linkId'] = uuid.uuid4().hex
+            if 'id' in form:
+                form['id'] = uuid.uuid4().hex
+        sent = time.perf_counter()
+        try:
+            response = self._session().post(self.url, data=form, timeout=self.timeout)
+            ok = 200 <= response.status_code < 300
+        except requests.RequestException:
+            ok = False
+        done = time.perf_counter()
+        with self._lock:
+            self.samples.append((sent - scheduled, done - sent, ok))
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('capture', help='NDJSON capture file')
+    parser.add_argument('--url', default='http://localhost:5000', help='Server to replay against')
+    parser.add_argument('--speed', default='1', help="Multiple of recorded speed, or 'max'")
+    parser.add_argument('--concurrency', type=int, default=64, help='Most callbacks in flight')
+    parser.add_argument('--timeout', type=float, default=30, help='Per-request timeout in seconds')
+    parser.add_argument('--fresh-ids', action='store_true', help='Give each replayed callback a new linkId (and id) so it is stored as a new message')
+    parser.add_argument('--limit', type=int, help='Replay only the first N callbacks')
+    args = parser.parse_args()
+
+    speed = None if args.speed == 'max' else float(args.speed)
+    events = load_events(args.capture)[:args.limit]
+    if not events:
+        parser.error(f"No events in {args.capture}")
+    recorded = events[-1]['t'] - events[0]['t']
+    senders = len({event['form'].get('from') for event in events})
+    target = 'max speed' if speed is None else f"{speed:g}x ({recorded / speed:.1f}s)"
+    print(f"Replaying {len(events)} callbacks from {senders} senders, recorded over {recorded:.1f}s, at {target} against {args.url}")
+
+    replayer = Replayer(args.url, speed, args.concurrency, args.timeout, args.fresh_ids)
+    elapsed = replayer.run(events)
+
+    lags = sorted(lag for lag, latency, ok in replayer.samples)
+    latencies = sorted(latency for lag, latency, ok in replayer.samples)
+    errors = sum(1 for lag, latency, ok in replayer.samples if not ok)
+    offered = len(events) / (recorded / speed) if speed and recorded > 0 else None
+    print(f"{'callbacks':>10} {'errors':>7} {'elapsed s':>10} {'offered/s':>10} {'achieved/s':>11}")
+    print(f"{len(events):>10} {errors:>7} {elapsed:>10.1f} {(f'{offered:.1f}' if offered else '-'):>10} {len(events) / elapsed:>11.1f}")
+    print(f"{'':>10} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} {'max ms':>9}")
+    for label, values in (('latency', latencies), ('behind', lags)):
+        print(f"{label:>10} {percentile(values, 0.50) * 1000:>9.1f} {percentile(values, 0.95) * 1000:>9.1f} "
+              f"{percentile(values, 0.99) * 1000:>9.1f} {values[-1] * 1000:>9.1f}")
+    if speed is not None:
+        kept_up = lags[-1] < 1.0
+        print("Server kept up with the recorded pace" if kept_up else
+              f"Server fell behind: the last sends were up to {lags[-1]:.1f}s late")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,104 @@
+"""Concurrent webhook write throughput under SQLite's default and tuned profiles.
+
+Run from the project root:
+
+    python -m benchmarks.sqlite_benchmark
+
+Each profile runs in a fresh process against a new file-backed SQLite
+database: several threads post SMS to /sms_callback at once (each SMS writes
+the user, the message and the reply job in one transaction) and the script
+reports throughput, latency percentiles and failed requests. Job workers are
+off, so only the webhook writes are measured.
+"""
+import argparse
+import os
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+
+# SQLite's stock settings, for comparison with the Config defaults
+PROFILES = {
+    'default': {
+        'SQLITE_JOURNAL_MODE': 'DELETE',
+        'SQLITE_SYNCHRONOUS': 'FULL',
+        'SQLITE_BUSY_TIMEOUT': '5000',  # pysqlite's own default timeout
+        'SQLITE_MMAP_SIZE': '0',
+        'SQLITE_CACHE_SIZE': '-2000'
+    },
+    'tuned': {}
+}
+
+def percentile(values, fraction):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * fraction))]
+
+def run_profile(threads, messages):
+    import logging
+    from app import create_app
+    from app.models.models import Message
+
+    app = create_app('production')
+    logging.getLogger().setLevel(logging.WARNING)
+    client = app.test_client()
+
+    latencies = []
+    failures = []
+    lock = threading.Lock()
+
+    def sender(worker):
+        for n in range(messages):
+            phone = f'+2547{worker:03d}{n:05d}'
+            start = time.perf_counter()
+            response = client.post('/sms_callback', data={'from': phone, 'text': f'question {n}', 'linkId': f'link-{worker}-{n}'})
+            elapsed = time.perf_counter() - start
+            with lock:
+                latencies.append(elapsed)
+                if response.status_code != 200:
+                    failures.append(response.status_code)
+
+    workers = [threading.Thread(target=sender, args=(w,)) for w in range(threads)]
+    start = time.perf_counter()
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+    elapsed = time.perf_counter() - start
+
+    with app.app_context():
+        saved = Message.query.count()
+    total = threads * messages
+    print(f"{os.environ['BENCHMARK_PROFILE']:>8} {total:>6} {saved:>6} {len(failures):>6} {total / elapsed:>8.0f} "
+          f"{percentile(latencies, 0.5) * 1000:>8.2f} {percentile(latencies, 0.99) * 1000:>8.2f}")
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--threads', type=int, default=8, help='Concurrent senders')
+    parser.add_argument('--messages', type=int, default=250, help='SMS per sender')
+    parser.add_argument('--profile', choices=PROFILES, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.profile:
+        run_profile(args.threads, args.messages)
+        return
+
+    print(f"{'profile':>8} {'sms':>6} {'saved':>6} {'failed':>6} {'sms/s':>8} {'p50 ms':>8} {'p99 ms':>8}")
+    for name, settings in PROFILES.items():
+        db_dir = tempfile.mkdtemp(prefix='sqlite-benchmark-')
+        env = dict(os.environ, **settings)
+        env.update({
+            'BENCHMARK_PROFILE': name,
+            'DATABASE_URL': f"sqlite:///{os.path.join(db_dir, 'benchmark.db')}",
+            'JOB_WORKERS': '0',
+            'SESSION_CLEANUP_INTERVAL': '0',
+            'DELIVERY_REPORT_FLUSH_INTERVAL': '0'
+        })
+        subprocess.run(
+            [sys.executable, '-m', 'benchmarks.sqlite_benchmark', '--profile', name,
+             '--threads', str(args.threads), '--messages', str(args.messages)],
+            env=env, check=True
+        )
+
+if __name__ == '__main__':
+    main()
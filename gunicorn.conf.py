@@ -0,0 +1,24 @@
+"""Gunicorn settings (loaded automatically by `gunicorn run:app`).
+
+Workers share Prometheus metrics through files in PROMETHEUS_MULTIPROC_DIR,
+so /metrics reports totals across every worker process.
+"""
+import os
+import shutil
+import tempfile
+
+bind = os.getenv('GUNICORN_BIND', '0.0.0.0:5000')
+workers = int(os.getenv('GUNICORN_WORKERS', '4'))
+
+# Must be set before prometheus_client is imported, here or in a worker
+os.environ.setdefault('PROMETHEUS_MULTIPROC_DIR', os.path.join(tempfile.gettempdir(), 'sms-africas-talking-metrics'))
+
+def on_starting(server):
+    # Start from zero; files left by a previous run would be summed in
+    metrics_dir = os.environ['PROMETHEUS_MULTIPROC_DIR']
+    shutil.rmtree(metrics_dir, ignore_errors=True)
+    os.makedirs(metrics_dir)
+
+def child_exit(server, worker):
+    from prometheus_client import multiprocess
+    multiprocess.mark_process_dead(worker.pid)
@@ -0,0 +1,78 @@
+"""normalize user phone numbers
+
+Revision ID: 4d8a1c6e9f02
+Revises: 9b3f6d2a7c15
+Create Date: 2026-10-18 11:20:07.154862
+
+"""
+import os
+from collections import defaultdict
+
+from alembic import op
+import sqlalchemy as sa
+
+# Same rules the app applies to new numbers
+from app.services.phone_numbers import _normalize
+
+
+# revision identifiers, used by Alembic.
+revision = '4d8a1c6e9f02'
+down_revision = '9b3f6d2a7c15'
+branch_labels = None
+depends_on = None
+
+
+user = sa.table(
+    'user',
+    sa.column('id', sa.Integer),
+    sa.column('phone_number', sa.String),
+    sa.column('created_at', sa.DateTime),
+    sa.column('last_active', sa.DateTime),
+)
+message = sa.table('message', sa.column('user_id', sa.Integer))
+archived_message = sa.table('archived_message', sa.column('user_id', sa.Integer))
+
+
+def upgrade():
+    """Rewrite stored numbers as E.164 and merge users that share one.
+
+    Users created before normalization may hold "0712 345 678" and
+    "+254712345678" as two rows. The oldest row survives; messages (live
+    and archived) of the others move to it before they are deleted.
+    Numbers that cannot be normalized are left as they are.
+    """
+    conn = op.get_bind()
+    default_country = os.getenv('DEFAULT_COUNTRY_CODE', '254').lstrip('+')
+
+    groups = defaultdict(list)
+    rows = conn.execute(
+        sa.select(user.c.id, user.c.phone_number, user.c.created_at, user.c.last_active).order_by(user.c.id)
+    ).fetchall()
+    for row in rows:
+        number = _normalize(row.phone_number.strip(), default_country) if row.phone_number else None
+        if number is not None:
+            groups[number].append(row)
+
+    for number, members in groups.items():
+        if len(members) == 1 and members[0].phone_number == number:
+            continue
+        survivor = members[0]
+        duplicate_ids = [m.id for m in members[1:]]
+        if duplicate_ids:
+            conn.execute(message.update().where(message.c.user_id.in_(duplicate_ids)).values(user_id=survivor.id))
+            conn.execute(archived_message.update().where(archived_message.c.user_id.in_(duplicate_ids)).values(user_id=survivor.id))
+            conn.execute(user.delete().where(user.c.id.in_(duplicate_ids)))
+        created = [m.created_at for m in members if m.created_at is not None]
+        active = [m.last_active for m in members if m.last_active is not None]
+        conn.execute(
+            user.update().where(user.c.id == survivor.id).values(
+                phone_number=number,
+                created_at=min(created) if created else None,
+                last_active=max(active) if active else None,
+            )
+        )
+
+
+def downgrade():
+    # Merged users cannot be split again; the normalized numbers are kept
+    pass
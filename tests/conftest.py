@@ -0,0 +1,27 @@
+"""Shared fixtures: one testing app, with an empty database for each test."""
+import pytest
+from app import create_app
+from app.models.models import db
+from app.services.conversation_cache import conversation_cache
+from app.services.inbound_dedup import inbound_dedup
+from app.services.user_lookup import user_lookup
+
+@pytest.fixture(scope='session')
+def app():
+    return create_app('testing')
+
+@pytest.fixture
+def app_context(app):
+    """An app context on a freshly created in-memory database and empty per-process caches."""
+    with app.app_context():
+        db.drop_all()
+        db.create_all()
+        conversation_cache.initialize()
+        inbound_dedup.initialize()
+        user_lookup.initialize()
+        yield app
+        db.session.remove()
+
+@pytest.fixture
+def client(app_context):
+    return app_context.test_client()
@@ -0,0 +1,134 @@
+"""Campaign chunking, crash recovery, completion accounting and pause/resume."""
+from datetime import datetime, timedelta
+import pytest
+from app.models.models import db, Campaign, Job, Message, User
+from app.services.campaign_service import campaign_service
+from app.services.job_queue import job_queue
+from app.services.sms_service import sms_service
+
+class FakeBulkSender:
+    """Stands in for `sms_service.send_bulk`, optionally dying on one call."""
+
+    def __init__(self, fail_on_call=None):
+        self.fail_on_call = fail_on_call
+        self.calls = 0
+        self.recipients = []
+
+    def __call__(self, pairs, chunk_size=None):
+        self.calls += 1
+        if self.calls == self.fail_on_call:
+            raise RuntimeError('worker died mid-send')
+        self.recipients.extend(phone for phone, _ in pairs)
+        return [{'status': 'Success', 'messageId': f'ATXid_{phone}'} for phone, _ in pairs]
+
+@pytest.fixture
+def sender(monkeypatch):
+    sender = FakeBulkSender()
+    monkeypatch.setattr(sms_service, 'initialized', True)
+    monkeypatch.setattr(sms_service, 'send_bulk', sender)
+    return sender
+
+def add_users(count):
+    for i in range(count):
+        User.upsert(f'+2547000000{i:02d}')
+    db.session.commit()
+
+def make_job_due():
+    """Skip a failed job's retry backoff."""
+    Job.query.update({Job.run_at: datetime.utcnow() - timedelta(seconds=1)})
+    db.session.commit()
+
+def test_create_rejects_chunks_slower_than_half_the_visibility_timeout(app_context):
+    with pytest.raises(ValueError):
+        campaign_service.create('slow', 'hi', tps=1, chunk_size=job_queue.visibility_timeout)
+
+def test_campaign_sends_every_chunk_and_completes(app_context, sender):
+    add_users(10)
+    campaign = campaign_service.create('launch', 'Hello', tps=1000, chunk_size=4)
+    assert campaign.job_id is not None
+
+    assert job_queue.run_once()
+
+    campaign = db.session.get(Campaign, campaign.id)
+    assert campaign.status == 'completed'
+    assert (campaign.sent, campaign.failed, campaign.total) == (10, 0, 10)
+    assert campaign.claimed_through is None
+    assert campaign.job_id is None
+    assert sender.calls == 3
+    assert Message.query.filter_by(sender_type='ai').count() == 10
+    assert Job.query.count() == 0
+
+def test_a_chunk_lost_mid_send_is_counted_failed_not_skipped_or_resent(app_context, sender):
+    add_users(10)
+    sender.fail_on_call = 2
+    campaign = campaign_service.create('launch', 'Hello', tps=1000, chunk_size=4)
+
+    assert job_queue.run_once()
+    campaign = db.session.get(Campaign, campaign.id)
+    assert (campaign.status, campaign.cursor, campaign.claimed_through) == ('running', 4, 8)
+
+    make_job_due()
+    assert job_queue.run_once()
+
+    campaign = db.session.get(Campaign, campaign.id)
+    assert campaign.status == 'completed'
+    assert (campaign.sent, campaign.failed) == (6, 4)
+    assert 'counted as failed' in campaign.last_error
+    assert len(sender.recipients) == len(set(sender.recipients)) == 6
+
+def test_campaign_is_not_completed_when_recipients_are_unaccounted_for(app_context, sender):
+    add_users(4)
+    since = (datetime.utcnow() - timedelta(hours=1)).isoformat()
+    campaign = campaign_service.create('active', 'Hello', audience={'active_since': since}, tps=1000, chunk_size=4)
+    # One user drops out of the audience before the campaign runs
+    User.query.filter_by(phone_number='+254700000000').update({User.last_active: datetime.utcnow() - timedelta(days=1)})
+    db.session.commit()
+
+    assert job_queue.run_once()
+
+    campaign = db.session.get(Campaign, campaign.id)
+    assert campaign.status == 'failed'
+    assert (campaign.sent, campaign.total) == (3, 4)
+    assert '3 of 4' in campaign.last_error
+
+def test_resume_lets_a_live_job_carry_on(app_context, sender):
+    add_users(4)
+    campaign = campaign_service.create('launch', 'Hello', tps=1000, chunk_size=4)
+    assert campaign_service.pause(campaign)
+
+    assert campaign_service.resume(campaign)
+    assert campaign.status == 'pending'
+    assert Job.query.count() == 1
+
+    assert job_queue.run_once()
+    assert db.session.get(Campaign, campaign.id).status == 'completed'
+
+def test_resume_after_the_paused_job_exits_queues_a_new_job(app_context, sender):
+    add_users(4)
+    campaign = campaign_service.create('launch', 'Hello', tps=1000, chunk_size=4)
+    campaign_service.pause(campaign)
+
+    assert job_queue.run_once()  # Sees the pause and lets go of the campaign
+    campaign = db.session.get(Campaign, campaign.id)
+    assert (campaign.status, campaign.job_id) == ('paused', None)
+    assert Job.query.count() == 0
+    assert sender.calls == 0
+
+    assert campaign_service.resume(campaign)
+    assert campaign.job_id == Job.query.one().id
+    assert not campaign_service.resume(campaign)  # Already running with a live job
+
+    assert job_queue.run_once()
+    campaign = db.session.get(Campaign, campaign.id)
+    assert (campaign.status, campaign.sent) == ('completed', 4)
+    assert not campaign_service.resume(campaign)
+
+def test_running_campaign_without_a_job_can_be_resumed(app_context, sender):
+    add_users(4)
+    campaign = campaign_service.create('launch', 'Hello', tps=1000, chunk_size=4)
+    Job.query.delete()
+    db.session.commit()
+
+    assert campaign_service.resume(campaign)
+    assert job_queue.run_once()
+    assert db.session.get(Campaign, campaign.id).status == 'completed'
@@ -0,0 +1,80 @@
+"""/chat_history keyset pagination, ETags, and the archived-message read path."""
+from datetime import datetime, timedelta
+from app.models.models import db, ArchivedMessage, Message
+from app.services.retention import message_archiver
+
+def add_messages(count, days_ago=0, session_id='s1'):
+    start = datetime.utcnow() - timedelta(days=days_ago, minutes=count)
+    for i in range(count):
+        db.session.add(Message(session_id=session_id, sender_type='user', text=f'{days_ago}d-{i}', timestamp=start + timedelta(minutes=i)))
+    db.session.commit()
+
+def history(client, headers=None, **params):
+    params.setdefault('session_id', 's1')
+    return client.get('/chat_history', query_string=params, headers=headers or {})
+
+def read_all(client, **params):
+    """Follow next_cursor through every page and return the message texts."""
+    texts = []
+    while True:
+        body = history(client, **params).get_json()
+        texts += [m['text'] for m in body['messages']]
+        if body['next_cursor'] is None:
+            return texts
+        params['before'] = body['next_cursor']
+
+def test_pages_walk_the_history_newest_first_without_gaps(client):
+    add_messages(5)
+
+    first = history(client, limit=2).get_json()
+    assert [m['text'] for m in first['messages']] == ['0d-4', '0d-3']
+    assert first['next_cursor']
+
+    assert read_all(client, limit=2) == ['0d-4', '0d-3', '0d-2', '0d-1', '0d-0']
+
+def test_history_is_scoped_to_the_session(client):
+    add_messages(2, session_id='s1')
+    add_messages(3, session_id='s2')
+    assert read_all(client, session_id='s2') == ['0d-2', '0d-1', '0d-0']
+
+def test_unchanged_history_is_a_304(client):
+    add_messages(3)
+    response = history(client, limit=2)
+    etag = response.headers['ETag']
+
+    assert history(client, {'If-None-Match': etag}, limit=2).status_code == 304
+
+    add_messages(1)
+    changed = history(client, {'If-None-Match': etag}, limit=2)
+    assert changed.status_code == 200
+    assert changed.headers['ETag'] != etag
+
+def test_an_older_page_keeps_its_etag_when_a_message_is_added(client):
+    add_messages(3)
+    cursor = history(client, limit=2).get_json()['next_cursor']
+    etag = history(client, before=cursor, limit=2).headers['ETag']
+
+    add_messages(1)
+    assert history(client, {'If-None-Match': etag}, before=cursor, limit=2).status_code == 304
+
+def test_archiving_moves_old_messages_and_changes_the_etag(client):
+    add_messages(3, days_ago=100)
+    add_messages(2)
+    etag = history(client, limit=10).headers['ETag']
+
+    assert message_archiver.archive(retention_days=90) == 3
+    assert ArchivedMessage.query.count() == 3
+
+    response = history(client, {'If-None-Match': etag}, limit=10)
+    assert response.status_code == 200
+    assert [m['text'] for m in response.get_json()['messages']] == ['0d-1', '0d-0']
+
+    assert read_all(client, limit=2, archived=1) == ['0d-1', '0d-0', '100d-2', '100d-1', '100d-0']
+
+def test_archiver_keeps_the_newest_message(app_context):
+    add_messages(2, days_ago=100)
+    assert message_archiver.archive(retention_days=90) == 1
+    assert Message.query.count() == 1
+
+def test_invalid_cursor_is_rejected(client):
+    assert history(client, before='not-a-cursor').status_code == 400
@@ -0,0 +1,87 @@
+"""/chat/stream sends the reply as Server-Sent Events while Gemini generates it."""
+import json
+from types import SimpleNamespace
+import pytest
+from app.models.models import Message
+from app.services.ai_service import ai_service, ERROR_REPLY
+
+class FakeStreamingModel:
+    """Yields `chunks` the way GenerativeModel.generate_content(stream=True) does."""
+
+    def __init__(self, chunks, fail_after=None):
+        self.chunks = chunks
+        self.fail_after = fail_after
+        self.prompts = []
+
+    def generate_content(self, prompt, stream=False):
+        self.prompts.append(prompt)
+        for i, text in enumerate(self.chunks):
+            if i == self.fail_after:
+                raise RuntimeError('stream dropped')
+            part = SimpleNamespace(text=text)
+            yield SimpleNamespace(candidates=[SimpleNamespace(content=SimpleNamespace(parts=[part]))])
+
+@pytest.fixture
+def use_model(monkeypatch):
+    def use(model):
+        monkeypatch.setattr(ai_service, 'model', model)
+        monkeypatch.setattr(ai_service, 'initialized', True)
+        return model
+    return use
+
+def read_events(response):
+    """Parse an SSE body into (event, data) pairs."""
+    events = []
+    for block in response.get_data(as_text=True).split('\n\n'):
+        if not block:
+            continue
+        event = 'message'
+        for line in block.split('\n'):
+            field, _, value = line.partition(': ')
+            if field == 'event':
+                event = value
+            elif field == 'data':
+                events.append((event, json.loads(value)))
+    return events
+
+def test_reply_is_streamed_in_chunks_then_saved(client, use_model):
+    use_model(FakeStreamingModel(['Add up your ', 'costs, then ', 'add a margin.']))
+
+    response = client.post('/chat/stream', json={'message': 'How do I price?', 'session_id': 's1'})
+
+    assert response.mimetype == 'text/event-stream'
+    assert response.headers['Cache-Control'] == 'no-cache'
+    events = read_events(response)
+    assert events[-1] == ('done', {'response': 'Add up your costs, then add a margin.'})
+    chunks = [data['text'] for event, data in events[:-1]]
+    assert all(event == 'message' for event, _ in events[:-1])
+    assert len(chunks) > 1
+    assert ''.join(chunks) == 'Add up your costs, then add a margin.'
+
+    saved = Message.query.filter_by(session_id='s1').order_by(Message.id).all()
+    assert [(m.sender_type, m.text) for m in saved] == [
+        ('user', 'How do I price?'),
+        ('ai', 'Add up your costs, then add a margin.')
+    ]
+
+def test_a_long_reply_is_cut_to_sms_length(client, use_model):
+    use_model(FakeStreamingModel(['word ' * 20, 'word ' * 20, 'word ' * 20]))
+
+    events = read_events(client.post('/chat/stream', json={'message': 'Tell me everything'}))
+
+    reply = events[-1][1]['response']
+    assert len(reply) == 160
+    assert reply.endswith('...')
+    assert ''.join(data['text'] for event, data in events[:-1]) == reply
+
+def test_a_failure_before_any_text_streams_the_error_reply(client, use_model):
+    use_model(FakeStreamingModel(['never sent'], fail_after=0))
+
+    events = read_events(client.post('/chat/stream', json={'message': 'Hello'}))
+
+    assert events[-1] == ('done', {'response': ERROR_REPLY})
+
+def test_empty_message_is_rejected(client):
+    response = client.post('/chat/stream', json={'message': '  '})
+    assert response.status_code == 400
+    assert Message.query.count() == 0
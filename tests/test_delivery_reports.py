@@ -0,0 +1,53 @@
+"""Delivery reports are coalesced in memory and applied in batched UPDATEs."""
+import pytest
+from app.models.models import db, Message
+from app.services.delivery_reports import delivery_reports
+
+@pytest.fixture
+def messages(app_context):
+    delivery_reports.flush()  # Nothing left over from another test
+    for provider_id in ('ATXid_1', 'ATXid_2', 'ATXid_3'):
+        db.session.add(Message(sender_type='ai', text='Hello', status='sent', provider_message_id=provider_id))
+    db.session.commit()
+
+def statuses():
+    return dict(Message.query.with_entities(Message.provider_message_id, Message.status).all())
+
+def test_reports_are_buffered_until_flushed(messages):
+    assert delivery_reports.add('ATXid_1', 'Success')
+    assert statuses()['ATXid_1'] == 'sent'
+
+    assert delivery_reports.flush() == 1
+    assert statuses()['ATXid_1'] == 'delivered'
+
+def test_reports_for_one_message_are_coalesced(messages):
+    batches = delivery_reports.batches
+    delivery_reports.add('ATXid_1', 'Buffered')
+    delivery_reports.add('ATXid_1', 'Success')
+    delivery_reports.add('ATXid_2', 'Failed')
+    delivery_reports.add('ATXid_3', 'Submitted')
+
+    assert delivery_reports.flush() == 3
+    assert delivery_reports.batches == batches + 1
+    assert statuses() == {'ATXid_1': 'delivered', 'ATXid_2': 'failed', 'ATXid_3': 'sent'}
+
+def test_a_late_intermediate_report_does_not_undo_a_final_one(messages):
+    delivery_reports.add('ATXid_1', 'Success')
+    delivery_reports.add('ATXid_1', 'Buffered')  # Out of order in the same batch
+    delivery_reports.flush()
+    assert statuses()['ATXid_1'] == 'delivered'
+
+    delivery_reports.add('ATXid_1', 'Buffered')  # Out of order across batches
+    delivery_reports.flush()
+    assert statuses()['ATXid_1'] == 'delivered'
+
+def test_unknown_statuses_are_not_buffered(messages):
+    assert not delivery_reports.add('ATXid_1', 'Teleported')
+    assert delivery_reports.flush() == 0
+
+def test_delivery_report_callback(client, messages):
+    assert client.post('/delivery_report', data={'id': 'ATXid_2', 'status': 'Rejected'}).status_code == 200
+    assert client.post('/delivery_report', data={'status': 'Success'}).status_code == 400
+
+    delivery_reports.flush()
+    assert statuses()['ATXid_2'] == 'rejected'
@@ -0,0 +1,48 @@
+"""Pins the google-generativeai internals that GeminiClientAdapter relies on.
+
+If an SDK upgrade fails these, connection pooling has silently fallen back
+to the SDK's default clients; update app/services/gemini_client.py.
+"""
+from types import SimpleNamespace
+import requests
+import google.generativeai as genai
+from google.generativeai import client as genai_client
+from app.services.gemini_client import GeminiClientAdapter
+
+class FakeHTTPClient:
+    def __init__(self):
+        self.mounted = []
+
+    def mount(self, session):
+        self.mounted.append(session)
+        return session
+
+def make_model():
+    genai.configure(api_key='test-key', transport='rest')
+    return genai.GenerativeModel('gemini-2.0-flash')
+
+def test_sdk_exposes_the_private_attributes_we_use():
+    model = make_model()
+    assert hasattr(model, '_client')
+    assert hasattr(model, '_async_client')
+    client = genai_client.get_default_generative_client()
+    assert isinstance(client._transport._session, requests.Session)
+
+def test_attach_pool_mounts_the_model_session():
+    model = make_model()
+    http = FakeHTTPClient()
+    assert GeminiClientAdapter().attach_pool(model, http)
+    assert http.mounted == [model._client._transport._session]
+
+def test_attach_pool_falls_back_when_the_sdk_shape_changes():
+    model = SimpleNamespace()  # No _client attribute
+    http = FakeHTTPClient()
+    adapter = GeminiClientAdapter()
+    assert not adapter.attach_pool(model, http)
+    assert not adapter.pooled
+    assert http.mounted == []
+
+def test_ensure_async_client_leaves_an_unknown_model_alone():
+    model = SimpleNamespace()
+    GeminiClientAdapter().ensure_async_client(model, 'test-key')
+    assert not hasattr(model, '_async_client')
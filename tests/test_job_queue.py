@@ -0,0 +1,105 @@
+"""Job queue hand-off at enqueue, lock renewal and completion inside the handler's commit."""
+import os
+import queue
+from datetime import datetime, timedelta
+import pytest
+from app.models.models import db, Job, User
+from app.services.job_queue import job_queue
+
+class RecordingHandler:
+    def __init__(self):
+        self.payloads = []
+
+    def __call__(self, payload):
+        self.payloads.append(payload)
+
+@pytest.fixture
+def handler():
+    handler = RecordingHandler()
+    job_queue.register('test_job', handler)
+    return handler
+
+@pytest.fixture
+def local_consumer(monkeypatch):
+    """Make this process look like it runs consumers, so enqueue hands jobs over."""
+    monkeypatch.setattr(job_queue, '_pid', os.getpid())
+    monkeypatch.setattr(job_queue, '_ready', queue.SimpleQueue())
+    job_queue._stop.clear()
+
+def test_enqueue_without_a_local_consumer_leaves_the_job_pending(app_context, handler):
+    job = job_queue.enqueue('test_job', {'n': 1})
+    assert job.status == 'pending'
+
+    assert job_queue.run_once()
+    assert handler.payloads == [{'n': 1}]
+    assert Job.query.count() == 0
+
+def test_enqueue_hands_the_job_to_a_local_consumer_already_claimed(app_context, handler, local_consumer):
+    job = job_queue.enqueue('test_job', {'n': 1})
+    assert job.status == 'running'
+    assert job.attempts == 1
+    assert job.locked_until > datetime.utcnow()
+
+    assert job_queue.run_once()
+    assert handler.payloads == [{'n': 1}]
+    assert Job.query.count() == 0
+
+def test_hand_off_is_bounded_by_the_ready_queue_size(app_context, handler, local_consumer, monkeypatch):
+    monkeypatch.setattr(job_queue, 'ready_queue_size', 1)
+    first = job_queue.enqueue('test_job', {'n': 1})
+    second = job_queue.enqueue('test_job', {'n': 2})
+    assert first.status == 'running'
+    assert second.status == 'pending'
+
+    assert job_queue.run_once()
+    assert job_queue.run_once()
+    assert handler.payloads == [{'n': 1}, {'n': 2}]
+
+def test_a_handed_over_job_with_a_low_lock_is_renewed_before_it_runs(app_context, handler, local_consumer, monkeypatch):
+    job = job_queue.enqueue('test_job', {'n': 1})
+    job_id, locked_until = job.id, job.locked_until
+
+    # Less than half of the (now longer) visibility timeout is left on the lock
+    monkeypatch.setattr(job_queue, 'visibility_timeout', 1000)
+    taken = job_queue._take_ready()
+
+    assert taken == (job_id, 'test_job', {'n': 1})
+    renewed = db.session.get(Job, job_id)
+    assert renewed.locked_until > locked_until + timedelta(seconds=500)
+
+def test_a_handed_over_job_re_claimed_elsewhere_is_skipped(app_context, handler, local_consumer, monkeypatch):
+    job = job_queue.enqueue('test_job', {'n': 1})
+    # Another worker took the job over after its lock expired
+    Job.query.filter_by(id=job.id).update({Job.locked_until: datetime.utcnow() + timedelta(seconds=60), Job.attempts: 2})
+    db.session.commit()
+
+    monkeypatch.setattr(job_queue, 'visibility_timeout', 1000)
+    assert not job_queue.run_once()
+    assert handler.payloads == []
+    assert db.session.get(Job, job.id).attempts == 2
+
+def test_complete_current_deletes_the_job_in_the_handlers_commit(app_context):
+    def handler(payload):
+        User.upsert(payload['phone'])
+        job_queue.complete_current()
+        db.session.commit()
+
+    job_queue.register('test_complete_job', handler)
+    job_queue.enqueue('test_complete_job', {'phone': '+254712345678'})
+    assert job_queue.run_once()
+    assert Job.query.count() == 0
+    assert User.query.count() == 1
+
+def test_a_failing_handler_is_retried_with_backoff(app_context):
+    def handler(payload):
+        raise RuntimeError('boom')
+
+    job_queue.register('test_failing_job', handler)
+    job = job_queue.enqueue('test_failing_job')
+    assert job_queue.run_once()
+
+    job = db.session.get(Job, job.id)
+    assert job.status == 'pending'
+    assert job.attempts == 1
+    assert job.last_error == 'boom'
+    assert job.run_at > datetime.utcnow()
@@ -0,0 +1,64 @@
+"""Inbound SMS ingestion: user upsert, one transaction per callback, retry dedup."""
+from datetime import datetime, timedelta
+from app.models.models import db, Job, Message, User
+from app.services.inbound_dedup import inbound_dedup
+from app.services.user_lookup import user_lookup
+
+def callback(client, **form):
+    data = {'from': '+254712345678', 'to': '12345', 'text': 'How do I price a table?', 'linkId': 'link-1', 'id': 'in-1'}
+    data.update(form)
+    return client.post('/sms_callback', data=data)
+
+def test_upsert_creates_a_user_once(app_context):
+    user_id, created = User.upsert('+254712345678')
+    db.session.commit()
+    assert created
+
+    User.query.filter_by(id=user_id).update({User.last_active: datetime.utcnow() - timedelta(days=1)})
+    db.session.commit()
+    again_id, created = User.upsert('+254712345678')
+    db.session.commit()
+
+    assert again_id == user_id
+    assert not created
+    assert User.query.count() == 1
+    assert db.session.get(User, user_id).last_active > datetime.utcnow() - timedelta(minutes=1)
+
+def test_callback_stores_the_user_message_and_job_together(client):
+    assert callback(client).status_code == 200
+
+    user = User.query.one()
+    message = Message.query.one()
+    job = Job.query.one()
+    assert user.phone_number == '+254712345678'
+    assert (message.user_id, message.sender_type, message.inbound_id) == (user.id, 'user', 'in-1')
+    assert job.name == 'process_inbound_sms'
+    assert user_lookup.get('+254712345678') == user.id
+
+def test_local_and_e164_numbers_map_to_one_user(client):
+    callback(client, **{'from': '0712 345 678', 'id': 'in-1'})
+    callback(client, **{'from': '+254712345678', 'id': 'in-2'})
+
+    assert User.query.count() == 1
+    assert Message.query.count() == 2
+
+def test_a_retried_callback_is_dropped_by_the_process_filter(client):
+    callback(client)
+    assert callback(client).status_code == 200
+
+    assert Message.query.count() == 1
+    assert Job.query.count() == 1
+    assert inbound_dedup.stats()['duplicates_dropped'] == 1
+
+def test_a_retry_this_process_has_not_seen_is_dropped_by_the_unique_index(client):
+    callback(client)
+    inbound_dedup.initialize()  # As if another process had stored the original
+
+    assert callback(client).status_code == 200
+    assert Message.query.count() == 1
+    assert Job.query.count() == 1
+    assert inbound_dedup.seen('in-1')
+
+def test_missing_sender_or_text_is_rejected(client):
+    assert callback(client, text='  ').status_code == 400
+    assert Message.query.count() == 0